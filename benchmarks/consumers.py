@@ -0,0 +1,162 @@
+"""Compare the sync and the native asyncio subscription consumers.
+
+Runs entirely in memory (InMemoryChannelLayer + WebsocketCommunicator)
+against the test schema:
+
+    python -m benchmarks.consumers --connections 500 --events 50
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import threading
+import time
+import tracemalloc
+
+import django
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'tests.django_settings')
+django.setup()
+
+from channels.layers import channel_layers  # noqa: E402
+from channels.testing import WebsocketCommunicator  # noqa: E402
+
+from graphene_subscriptions.consumers import (  # noqa: E402
+    AsyncGraphqlSubscriptionConsumer, GraphqlSubscriptionConsumer)
+from graphene_subscriptions.events import (EventNames,  # noqa: E402
+                                           ModelSubscriptionEvent)
+from tests.models import TestModel  # noqa: E402
+
+HELLO_SUBSCRIPTION = 'subscription { hello }'
+
+CREATED_SUBSCRIPTION = 'subscription { testModelCreated { name } }'
+
+
+def percentile(values: list[float], percent: float) -> float:
+    if not values:
+        return 0.0
+    values = sorted(values)
+    index = min(len(values) - 1, round(percent / 100 * (len(values) - 1)))
+    return values[index]
+
+
+async def start(communicator: WebsocketCommunicator, query: str, id: int = 1):
+    await communicator.send_json_to({
+        'id': id,
+        'type': 'start_subscription',
+        'payload': {'query': query}
+    })
+
+
+async def open_connections(consumer_class, count: int) -> tuple[list[WebsocketCommunicator], float]:
+    application = consumer_class.as_asgi()
+    communicators = [
+        WebsocketCommunicator(application, '/graphql/')
+        for _ in range(count)
+    ]
+
+    started = time.perf_counter()
+    results = await asyncio.gather(*[c.connect(timeout=30) for c in communicators])
+    elapsed = time.perf_counter() - started
+    assert all(connected for connected, _ in results)
+    return communicators, elapsed
+
+
+async def measure_round_trip(communicators: list[WebsocketCommunicator]) -> list[float]:
+    async def round_trip(communicator):
+        started = time.perf_counter()
+        await start(communicator, HELLO_SUBSCRIPTION)
+        await communicator.receive_json_from(timeout=30)
+        return time.perf_counter() - started
+
+    return list(await asyncio.gather(*map(round_trip, communicators)))
+
+
+async def measure_events(communicators: list[WebsocketCommunicator], events: int) -> list[float]:
+    for communicator in communicators:
+        await start(communicator, CREATED_SUBSCRIPTION, id=2)
+
+    # Let every consumer register its subscription
+    await asyncio.sleep(0.1)
+
+    latencies = []
+    for i in range(events):
+        instance = TestModel(id=i + 1, name=f'item {i}')
+        event = ModelSubscriptionEvent(
+            operation=EventNames.CREATED.value,
+            instance=instance
+        )
+
+        started = time.perf_counter()
+        await event.asend()
+        await asyncio.gather(*[
+            c.receive_json_from(timeout=30)
+            for c in communicators
+        ])
+        latencies.append(time.perf_counter() - started)
+    return latencies
+
+
+async def run(consumer_class, connections: int, events: int) -> dict:
+    # Every run starts from a fresh channel layer
+    channel_layers.backends.clear()
+
+    threads_before = threading.active_count()
+    tracemalloc.start()
+    snapshot_before = tracemalloc.take_snapshot()
+
+    communicators, connect_time = await open_connections(
+        consumer_class,
+        connections
+    )
+    round_trips = await measure_round_trip(communicators)
+
+    snapshot_after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    allocated = sum(
+        stat.size_diff
+        for stat in snapshot_after.compare_to(snapshot_before, 'filename')
+    )
+    threads = threading.active_count() - threads_before
+
+    latencies = await measure_events(communicators, events)
+
+    await asyncio.gather(*[c.disconnect(timeout=30) for c in communicators])
+
+    return {
+        'consumer': consumer_class.__name__,
+        'connections': connections,
+        'connections_per_second': connections / connect_time,
+        'threads': threads,
+        'bytes_per_connection': allocated / connections,
+        'round_trip_p50_ms': percentile(round_trips, 50) * 1000,
+        'round_trip_p99_ms': percentile(round_trips, 99) * 1000,
+        'event_p50_ms': percentile(latencies, 50) * 1000 if latencies else None,
+        'event_p99_ms': percentile(latencies, 99) * 1000 if latencies else None,
+        'event_mean_ms': statistics.mean(latencies) * 1000 if latencies else None
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--connections', type=int, default=200)
+    parser.add_argument('--events', type=int, default=20)
+    arguments = parser.parse_args()
+
+    results = [
+        asyncio.run(run(GraphqlSubscriptionConsumer, arguments.connections, arguments.events)),
+        asyncio.run(run(AsyncGraphqlSubscriptionConsumer, arguments.connections, arguments.events))
+    ]
+
+    for result in results:
+        print(result['consumer'])
+        for key, value in result.items():
+            if key == 'consumer':
+                continue
+            if isinstance(value, float):
+                value = f'{value:.2f}'
+            print(f'  {key:<24} {value}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,115 @@
+"""Measure the memory held by idle subscriptions.
+
+Starts the subscriptions on consumers driven directly, without the
+websocket transport, spread over connections of `--per-connection`
+subscriptions each, and reports the bytes allocated per subscription
+once they all wait for events:
+
+    python -m benchmarks.memory --subscriptions 10000 100000
+"""
+import argparse
+import asyncio
+import gc
+import json
+import os
+import time
+import tracemalloc
+
+import django
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'tests.django_settings')
+django.setup()
+
+from channels.exceptions import StopConsumer  # noqa: E402
+from channels.layers import channel_layers, get_channel_layer  # noqa: E402
+
+from graphene_subscriptions.consumers import \
+    AsyncGraphqlSubscriptionConsumer  # noqa: E402
+
+CREATED_SUBSCRIPTION = 'subscription { testModelCreated { name } }'
+
+
+async def open_connection() -> AsyncGraphqlSubscriptionConsumer:
+    async def base_send(message):
+        pass
+
+    consumer = AsyncGraphqlSubscriptionConsumer()
+    consumer.scope = {'type': 'websocket', 'path': '/graphql/', 'headers': []}
+    consumer.channel_layer = get_channel_layer()
+    consumer.channel_name = await consumer.channel_layer.new_channel()
+    consumer.base_send = base_send
+    return consumer
+
+
+async def start(consumer: AsyncGraphqlSubscriptionConsumer, query: str, id: int):
+    await consumer.websocket_receive({'text': json.dumps({
+        'id': id,
+        'type': 'start_subscription',
+        'payload': {'query': query}
+    })})
+
+
+async def run(subscriptions: int, per_connection: int, query: str) -> dict:
+    # Every run starts from a fresh channel layer
+    channel_layers.backends.clear()
+
+    # Warms up the document cache and the lazily built state
+    warmup = await open_connection()
+    await start(warmup, query, 0)
+
+    connections = []
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+
+    started = time.perf_counter()
+    for id in range(subscriptions):
+        if id % per_connection == 0:
+            connections.append(await open_connection())
+        await start(connections[-1], query, id)
+    elapsed = time.perf_counter() - started
+
+    # Lets the streams of the subscriptions wait for their first event
+    await asyncio.sleep(0.1)
+    gc.collect()
+    allocated = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+
+    active = sum(len(consumer.subscriptions) for consumer in connections)
+    assert active == subscriptions, f'{active} of {subscriptions} subscriptions started'
+
+    for consumer in [warmup, *connections]:
+        try:
+            await consumer.websocket_disconnect({'code': 1000})
+        except StopConsumer:
+            pass
+
+    return {
+        'subscriptions': subscriptions,
+        'connections': len(connections),
+        'subscriptions_per_second': subscriptions / elapsed,
+        'bytes_per_subscription': allocated / subscriptions,
+        'total_mb': allocated / 2 ** 20
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--subscriptions', type=int, nargs='+', default=[10000, 100000])
+    parser.add_argument('--per-connection', type=int, default=100)
+    parser.add_argument('--query', default=CREATED_SUBSCRIPTION)
+    arguments = parser.parse_args()
+
+    for subscriptions in arguments.subscriptions:
+        result = asyncio.run(run(subscriptions, arguments.per_connection, arguments.query))
+        print(f"{result['subscriptions']} subscriptions")
+        for key, value in result.items():
+            if key == 'subscriptions':
+                continue
+            if isinstance(value, float):
+                value = f'{value:.2f}'
+            print(f'  {key:<26} {value}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,121 @@
+"""Soak test of the subscription lifecycle.
+
+Opens and closes connections holding subscriptions over and over while
+a long lived connection keeps receiving events, and samples the memory
+in use, the channel groups and the CPU time spent per event. Leaked
+subscriptions show up as growing memory and per event CPU:
+
+    python -m benchmarks.soak --cycles 100000 --samples 10
+"""
+import argparse
+import asyncio
+import gc
+import os
+import time
+import tracemalloc
+
+import django
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'tests.django_settings')
+django.setup()
+
+from channels.layers import channel_layers, get_channel_layer  # noqa: E402
+from channels.testing import WebsocketCommunicator  # noqa: E402
+
+from benchmarks.consumers import CREATED_SUBSCRIPTION, start  # noqa: E402
+from graphene_subscriptions.consumers import (  # noqa: E402
+    AsyncGraphqlSubscriptionConsumer, GraphqlSubscriptionConsumer)
+from graphene_subscriptions.events import (EventNames,  # noqa: E402
+                                           ModelSubscriptionEvent)
+from tests.models import TestModel  # noqa: E402
+
+UNDECLARED_SUBSCRIPTION = 'subscription { testModelSubscription }'
+
+
+async def cycle(application):
+    communicator = WebsocketCommunicator(application, '/graphql/')
+    connected, _ = await communicator.connect(timeout=30)
+    assert connected
+    await start(communicator, CREATED_SUBSCRIPTION, id=1)
+    await start(communicator, UNDECLARED_SUBSCRIPTION, id=2)
+    await start(communicator, CREATED_SUBSCRIPTION, id=3)
+    await communicator.send_json_to({'id': 3, 'type': 'stop_subscription'})
+    await communicator.disconnect(timeout=30)
+
+
+async def measure_event_cpu(listener: WebsocketCommunicator, events: int) -> float:
+    started = time.process_time()
+    for i in range(events):
+        event = ModelSubscriptionEvent(
+            operation=EventNames.CREATED.value,
+            instance=TestModel(id=i + 1, name=f'item {i}')
+        )
+        await event.asend()
+        await listener.receive_json_from(timeout=30)
+    return (time.process_time() - started) / events
+
+
+def group_members() -> int:
+    return sum(map(len, get_channel_layer().groups.values()))
+
+
+async def run(consumer_class, cycles: int, samples: int, events: int) -> list[dict]:
+    channel_layers.backends.clear()
+    application = consumer_class.as_asgi()
+
+    listener = WebsocketCommunicator(application, '/graphql/')
+    connected, _ = await listener.connect(timeout=30)
+    assert connected
+    await start(listener, CREATED_SUBSCRIPTION)
+    await asyncio.sleep(0.1)
+
+    tracemalloc.start()
+    results = []
+    interval = max(1, cycles // samples)
+    done = 0
+    while done < cycles:
+        for _ in range(min(interval, cycles - done)):
+            await cycle(application)
+        done += interval
+
+        # Let the cancelled tasks finish before sampling
+        await asyncio.sleep(0.05)
+        gc.collect()
+        results.append({
+            'cycles': min(done, cycles),
+            'memory_kb': tracemalloc.get_traced_memory()[0] / 1024,
+            'group_members': group_members(),
+            'event_cpu_us': await measure_event_cpu(listener, events) * 1e6
+        })
+    tracemalloc.stop()
+
+    await listener.disconnect(timeout=30)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--cycles', type=int, default=100000)
+    parser.add_argument('--samples', type=int, default=10)
+    parser.add_argument('--events', type=int, default=50)
+    arguments = parser.parse_args()
+
+    for consumer_class in (GraphqlSubscriptionConsumer, AsyncGraphqlSubscriptionConsumer):
+        results = asyncio.run(run(
+            consumer_class,
+            arguments.cycles,
+            arguments.samples,
+            arguments.events
+        ))
+
+        print(consumer_class.__name__)
+        print(f'  {"cycles":>8} {"memory_kb":>12} {"group_members":>14} {"event_cpu_us":>13}')
+        for result in results:
+            print(
+                f'  {result["cycles"]:>8} {result["memory_kb"]:>12.1f} '
+                f'{result["group_members"]:>14} {result["event_cpu_us"]:>13.1f}'
+            )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,233 @@
+"""Subscription fan-out benchmark suite.
+
+Runs entirely in memory (InMemoryChannelLayer + WebsocketCommunicator)
+against the test schema and writes machine readable results, so that
+runs on different commits can be compared:
+
+    python -m benchmarks.suite --connections 10 100 --json results.json
+    python -m benchmarks.suite --connections 10 100 --compare results.json
+
+With `--local-delivery`, the async consumers receive the events from
+the local bus of the process instead of the channel layer.
+
+Measured for each consumer and number of connections:
+
+* connect rate in connections per second
+* memory allocated per subscription
+* latency from `BaseEvent.asend` to each frame received, p50 and p99
+* events and frames per second when events are sent back to back
+* process CPU time spent per event fanned out and per frame
+"""
+import argparse
+import asyncio
+import datetime
+import gc
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+from typing import Any, Optional
+
+import django
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'tests.django_settings')
+django.setup()
+
+from channels.layers import channel_layers, get_channel_layer  # noqa: E402
+from channels.testing import WebsocketCommunicator  # noqa: E402
+from django.test import override_settings  # noqa: E402
+
+from benchmarks.consumers import (CREATED_SUBSCRIPTION,  # noqa: E402
+                                  open_connections, percentile, start)
+from graphene_subscriptions.consumers import (  # noqa: E402
+    AsyncGraphqlSubscriptionConsumer, GraphqlSubscriptionConsumer)
+from graphene_subscriptions.events import (EventNames,  # noqa: E402
+                                           ModelSubscriptionEvent)
+from graphene_subscriptions.topics import Topic  # noqa: E402
+from tests.models import TestModel  # noqa: E402
+
+CONSUMERS = {
+    'sync': GraphqlSubscriptionConsumer,
+    'async': AsyncGraphqlSubscriptionConsumer
+}
+
+CREATED_GROUP = Topic('created', 'tests', 'testmodel').group_name
+
+# Metrics where a higher value is an improvement
+HIGHER_IS_BETTER = {'connections_per_second', 'events_per_second', 'frames_per_second'}
+
+
+async def wait_for_group(group: str, members: int, timeout: float = 30):
+    """Waits for the consumers to register their subscriptions"""
+    groups = get_channel_layer().groups
+    deadline = time.perf_counter() + timeout
+    while len(groups.get(group, ())) < members:
+        if time.perf_counter() > deadline:
+            raise TimeoutError(f'{group} has {len(groups.get(group, ()))} members')
+        await asyncio.sleep(0.01)
+
+
+def created_event(i: int) -> ModelSubscriptionEvent:
+    return ModelSubscriptionEvent(
+        operation=EventNames.CREATED.value,
+        instance=TestModel(id=i + 1, name=f'item {i}')
+    )
+
+
+async def subscribe_all(communicators: list[WebsocketCommunicator]) -> float:
+    """Starts a subscription on every connection and returns
+    the memory allocated per subscription"""
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    for communicator in communicators:
+        await start(communicator, CREATED_SUBSCRIPTION)
+    await wait_for_group(CREATED_GROUP, len(communicators))
+    gc.collect()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return (after - before) / len(communicators)
+
+
+async def measure_latency(communicators: list[WebsocketCommunicator], events: int) -> list[float]:
+    async def receive(communicator) -> float:
+        await communicator.receive_json_from(timeout=30)
+        return time.perf_counter()
+
+    latencies = []
+    for i in range(events):
+        receivers = [asyncio.ensure_future(receive(c)) for c in communicators]
+        started = time.perf_counter()
+        await created_event(i).asend()
+        received = await asyncio.gather(*receivers)
+        latencies.extend(at - started for at in received)
+    return latencies
+
+
+async def measure_throughput(communicators: list[WebsocketCommunicator], events: int) -> tuple[float, float]:
+    async def receive_all(communicator):
+        for _ in range(events):
+            await communicator.receive_json_from(timeout=30)
+
+    receivers = [asyncio.ensure_future(receive_all(c)) for c in communicators]
+    started = time.perf_counter()
+    cpu_started = time.process_time()
+    for i in range(events):
+        await created_event(i).asend()
+    await asyncio.gather(*receivers)
+    return time.perf_counter() - started, time.process_time() - cpu_started
+
+
+async def run(consumer: str, connections: int, events: int) -> dict[str, Any]:
+    # Every run starts from a fresh channel layer
+    channel_layers.backends.clear()
+
+    communicators, connect_time = await open_connections(
+        CONSUMERS[consumer],
+        connections
+    )
+    bytes_per_subscription = await subscribe_all(communicators)
+    latencies = await measure_latency(communicators, events)
+    elapsed, cpu = await measure_throughput(communicators, events)
+
+    await asyncio.gather(*[c.disconnect(timeout=30) for c in communicators])
+
+    return {
+        'consumer': consumer,
+        'connections': connections,
+        'events': events,
+        'connections_per_second': connections / connect_time,
+        'bytes_per_subscription': bytes_per_subscription,
+        'latency_p50_ms': percentile(latencies, 50) * 1000,
+        'latency_p99_ms': percentile(latencies, 99) * 1000,
+        'events_per_second': events / elapsed,
+        'frames_per_second': events * connections / elapsed,
+        'cpu_per_event_us': cpu / events * 1e6,
+        'cpu_per_frame_us': cpu / (events * connections) * 1e6
+    }
+
+
+def get_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', 'HEAD'],
+            capture_output=True,
+            check=True,
+            text=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results: list[dict[str, Any]], baseline: list[dict[str, Any]]):
+    previous = {(r['consumer'], r['connections']): r for r in baseline}
+    for result in results:
+        old = previous.get((result['consumer'], result['connections']))
+        if old is None:
+            continue
+
+        print(f"{result['consumer']} x {result['connections']}")
+        for key, value in result.items():
+            if not isinstance(value, float) or not old.get(key):
+                continue
+            change = (value - old[key]) / old[key] * 100
+            better = (change > 0) == (key in HIGHER_IS_BETTER)
+            print(f'  {key:<24} {old[key]:>12.2f} {value:>12.2f} {change:>+8.1f}% {"" if better else "worse"}')
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__,
+        formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument('--connections', type=int, nargs='+', default=[10, 100])
+    parser.add_argument('--events', type=int, default=50)
+    parser.add_argument('--consumers', nargs='+', choices=CONSUMERS, default=list(CONSUMERS))
+    parser.add_argument('--json', help='write the results to this file, - for stdout')
+    parser.add_argument('--compare', help='compare the results with a previous JSON file')
+    parser.add_argument('--local-delivery', action='store_true', help='deliver the events through the local bus only')
+    arguments = parser.parse_args()
+    if arguments.local_delivery and 'sync' in arguments.consumers:
+        parser.error('--local-delivery only applies to the async consumer, use --consumers async')
+
+    subscription_settings = {}
+    if arguments.local_delivery:
+        subscription_settings = {'LOCAL_DELIVERY': True, 'REMOTE_DELIVERY': False}
+
+    with override_settings(GRAPHENE_SUBSCRIPTIONS=subscription_settings):
+        results = [
+            asyncio.run(run(consumer, connections, arguments.events))
+            for consumer in arguments.consumers
+            for connections in arguments.connections
+        ]
+    report = {
+        'commit': get_commit(),
+        'python': platform.python_version(),
+        'date': datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        'local_delivery': arguments.local_delivery,
+        'results': results
+    }
+
+    if arguments.json == '-':
+        json.dump(report, sys.stdout, indent=2)
+        print()
+    elif arguments.json:
+        with open(arguments.json, 'w') as output:
+            json.dump(report, output, indent=2)
+
+    if arguments.compare:
+        with open(arguments.compare) as baseline:
+            compare(results, json.load(baseline)['results'])
+    elif arguments.json != '-':
+        for result in results:
+            print(f"{result['consumer']} x {result['connections']}")
+            for key, value in result.items():
+                if isinstance(value, float):
+                    print(f'  {key:<24} {value:.2f}')
+
+
+if __name__ == '__main__':
+    main()
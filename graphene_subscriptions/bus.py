@@ -0,0 +1,62 @@
+import asyncio
+import threading
+import uuid
+from typing import TYPE_CHECKING, Protocol
+
+from graphene_subscriptions.settings import subscription_settings
+
+if TYPE_CHECKING:
+    from graphene_subscriptions.events import BaseEvent
+
+
+class LocalConsumer(Protocol):
+    def receive_local_events(self, events: list['BaseEvent']):
+        ...
+
+
+class LocalBus:
+    """Consumers of the process by the channel groups they joined. The
+    events sent in the process are handed to them directly, on their
+    own event loop, without going through the channel layer and the
+    encoding of the events. The channel layer messages carry the
+    `origin` of the process so that its consumers skip them"""
+
+    def __init__(self):
+        self.origin = uuid.uuid4().hex
+        self._groups: dict[str, dict[LocalConsumer, asyncio.AbstractEventLoop]] = {}
+        # Events are sent from any thread of the process
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return subscription_settings.LOCAL_DELIVERY
+
+    def group_add(self, group: str, consumer: LocalConsumer):
+        with self._lock:
+            self._groups.setdefault(group, {})[consumer] = asyncio.get_running_loop()
+
+    def group_discard(self, group: str, consumer: LocalConsumer):
+        with self._lock:
+            consumers = self._groups.get(group)
+            if consumers is not None:
+                consumers.pop(consumer, None)
+                if not consumers:
+                    del self._groups[group]
+
+    def publish(self, events: list['BaseEvent']):
+        recipients: dict[LocalConsumer, tuple[asyncio.AbstractEventLoop, list['BaseEvent']]] = {}
+        with self._lock:
+            for event in events:
+                for group in event.group_names():
+                    for consumer, loop in self._groups.get(group, {}).items():
+                        _, consumer_events = recipients.setdefault(consumer, (loop, []))
+                        # Consumers in several groups of the event get it once
+                        if not consumer_events or consumer_events[-1] is not event:
+                            consumer_events.append(event)
+
+        for consumer, (loop, consumer_events) in recipients.items():
+            if not loop.is_closed():
+                loop.call_soon_threadsafe(consumer.receive_local_events, consumer_events)
+
+
+local_bus = LocalBus()
@@ -0,0 +1,137 @@
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Any, Optional
+
+import graphql
+
+from graphene_subscriptions.settings import subscription_settings
+
+
+def hash_query(query: str) -> str:
+    return hashlib.sha256(query.encode('utf-8')).hexdigest()
+
+
+class CachedDocument:
+    def __init__(self, key: str, document: graphql.DocumentNode, errors: list[graphql.GraphQLError]):
+        self.key = key
+        self.document = document
+        self.errors = errors
+        self._operations: dict[Optional[str], Optional[graphql.OperationDefinitionNode]] = {}
+
+    def get_operation(self, operation_name: Optional[str] = None) -> Optional[graphql.OperationDefinitionNode]:
+        try:
+            return self._operations[operation_name]
+        except KeyError:
+            operation = graphql.get_operation_ast(self.document, operation_name)
+            self._operations[operation_name] = operation
+            return operation
+
+
+class DocumentCache:
+    """Bounded LRU cache of parsed and validated documents
+    keyed by the sha256 hash of their source"""
+
+    def __init__(self, maxsize: Optional[int] = None):
+        self._maxsize = maxsize
+        self._documents: OrderedDict[str, CachedDocument] = OrderedDict()
+        # Sync consumers use the cache from their worker threads
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self._documents)
+
+    def __contains__(self, key: str):
+        return key in self._documents
+
+    @property
+    def maxsize(self) -> int:
+        if self._maxsize is None:
+            return subscription_settings.DOCUMENT_CACHE_SIZE
+        return self._maxsize
+
+    def get(self, key: str) -> Optional[CachedDocument]:
+        with self._lock:
+            cached = self._documents.get(key)
+            if cached is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+                self._documents.move_to_end(key)
+            return cached
+
+    def set(self, key: str, value: CachedDocument):
+        with self._lock:
+            self._documents[key] = value
+            self._documents.move_to_end(key)
+            while len(self._documents) > self.maxsize:
+                self._documents.popitem(last=False)
+                self.evictions += 1
+
+    def parse(self, schema: graphql.GraphQLSchema, query: str, key: Optional[str] = None) -> CachedDocument:
+        key = key or hash_query(query)
+        cached = self.get(key)
+        if cached is None:
+            document = graphql.parse(query)
+            cached = CachedDocument(key, document, graphql.validate(schema, document))
+            self.set(key, cached)
+        return cached
+
+    def clear(self):
+        with self._lock:
+            self._documents.clear()
+            self.hits = 0
+            self.misses = 0
+            self.evictions = 0
+
+    def info(self) -> dict[str, int]:
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'size': len(self._documents),
+            'maxsize': self.maxsize
+        }
+
+
+document_cache = DocumentCache()
+
+
+def _error_result(message: str) -> graphql.ExecutionResult:
+    return graphql.ExecutionResult(data=None, errors=[graphql.GraphQLError(message)])
+
+
+def resolve_document(schema: graphql.GraphQLSchema, payload: dict[str, Any]) -> CachedDocument | graphql.ExecutionResult:
+    """Returns the cached document for the query of a `start_subscription`
+    payload or an `ExecutionResult` holding the errors to send back
+
+    When persisted queries are enabled, clients can send the hash of the
+    document in `extensions.persistedQuery.sha256Hash` and omit the query
+    once it has been registered by a previous request"""
+    query: Optional[str] = payload.get('query')
+    key: Optional[str] = None
+
+    if subscription_settings.PERSISTED_QUERIES:
+        extensions = payload.get('extensions') or {}
+        persisted_query = extensions.get('persistedQuery') or {}
+        key = persisted_query.get('sha256Hash')
+
+        if key is not None:
+            if query is None:
+                cached = document_cache.get(key)
+                if cached is None:
+                    return _error_result('PersistedQueryNotFound')
+                return cached
+            elif hash_query(query) != key:
+                return _error_result('Provided sha256Hash does not match query')
+
+    if not query:
+        return _error_result('Must provide a query')
+
+    try:
+        return document_cache.parse(schema, query, key=key)
+    except graphql.GraphQLError as error:
+        return graphql.ExecutionResult(data=None, errors=[error])
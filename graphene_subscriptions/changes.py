@@ -0,0 +1,101 @@
+import copy
+from typing import Any, Iterable, Optional
+
+import graphql
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import Model
+from graphene.utils.str_converters import to_snake_case
+
+# Attribute of the tracked instances holding the
+# values of their fields when they were loaded
+SNAPSHOT_ATTR = '_subscription_snapshot'
+
+
+def _copy_value(value: Any) -> Any:
+    # Mutable values such as those of a JSONField can
+    # be changed in place after the snapshot is taken
+    if isinstance(value, (dict, list)):
+        return copy.deepcopy(value)
+    return value
+
+
+def take_snapshot(instance: Model):
+    state = instance.__dict__
+    setattr(instance, SNAPSHOT_ATTR, {
+        field.attname: _copy_value(state[field.attname])
+        for field in instance._meta.concrete_fields
+        if field.attname in state
+    })
+
+
+def get_attnames(model: type[Model], names: Iterable[str]) -> list[str]:
+    return [model._meta.get_field(name).attname for name in names]
+
+
+def get_changed_fields(instance: Model, update_fields: Optional[Iterable[str]] = None) -> Optional[list[str]]:
+    """Attribute names of the fields of an instance changed since it
+    was loaded or last saved, restricted to `update_fields` when the
+    save was. None when the instance is not tracked and the save
+    was not restricted"""
+    snapshot = getattr(instance, SNAPSHOT_ATTR, None)
+
+    if update_fields is not None:
+        attnames = get_attnames(type(instance), update_fields)
+    elif snapshot is not None:
+        state = instance.__dict__
+        attnames = [
+            field.attname for field in instance._meta.concrete_fields
+            if field.attname in state
+        ]
+    else:
+        return None
+
+    if snapshot is None:
+        return attnames
+
+    missing = object()
+    return [
+        attname for attname in attnames
+        if snapshot.get(attname, missing) != getattr(instance, attname)
+    ]
+
+
+def post_init_subscription(sender, instance, **kwargs):
+    """Tracks the changes of the instances of a model, so that
+    `post_save_subscription` only sends updates that changed fields
+    and tells the subscriptions which fields changed"""
+    take_snapshot(instance)
+
+
+def _collect_fields(info: graphql.GraphQLResolveInfo, model: type[Model], selection_set: graphql.SelectionSetNode, attnames: set[str]) -> bool:
+    for selection in selection_set.selections:
+        if isinstance(selection, graphql.FieldNode):
+            name = selection.name.value
+            if name.startswith('__'):
+                continue
+            try:
+                field = model._meta.get_field(to_snake_case(name))
+            except FieldDoesNotExist:
+                return False
+            if not field.concrete:
+                return False
+            attnames.add(field.attname)
+        else:
+            if isinstance(selection, graphql.FragmentSpreadNode):
+                selection = info.fragments[selection.name.value]
+            if not _collect_fields(info, model, selection.selection_set, attnames):
+                return False
+    return True
+
+
+def get_selected_fields(info: graphql.GraphQLResolveInfo, model: type[Model]) -> Optional[list[str]]:
+    """Attribute names of the model fields selected by a subscription,
+    matched by name. None when a selected field is not a concrete
+    field of the model, since it could depend on any of them"""
+    attnames: set[str] = set()
+    for field_node in info.field_nodes:
+        if field_node.selection_set is None:
+            return None
+        if not _collect_fields(info, model, field_node.selection_set, attnames):
+            return None
+    return sorted(attnames)
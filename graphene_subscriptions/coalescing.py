@@ -0,0 +1,194 @@
+import asyncio
+import threading
+from typing import Any, Callable, Hashable, Optional
+
+import reactivex
+from django.test.signals import setting_changed
+from reactivex import Observable
+from reactivex.disposable import CompositeDisposable, Disposable
+
+from graphene_subscriptions.events import (BaseEvent, EventNames,
+                                           ModelSubscriptionEvent)
+from graphene_subscriptions.settings import subscription_settings
+
+type CallLater = Callable[[float, Callable[[], None]], Any]
+
+
+def thread_call_later(delay: float, callback: Callable[[], None]):
+    timer = threading.Timer(delay, callback)
+    timer.daemon = True
+    timer.start()
+
+
+def get_call_later() -> CallLater:
+    """Schedules the flushes on the running event loop, from any
+    thread, or on a timer thread when there is no event loop"""
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        return thread_call_later
+
+    def call_later(delay: float, callback: Callable[[], None]):
+        loop.call_soon_threadsafe(loop.call_later, delay, callback)
+    return call_later
+
+
+def merge_events(previous: ModelSubscriptionEvent, event: ModelSubscriptionEvent) -> Optional[ModelSubscriptionEvent]:
+    """Net effect of two events on the same instance, None
+    when the second one cancels the first one"""
+    match (previous.operation, event.operation):
+        case (EventNames.CREATED.value, EventNames.DELETED.value):
+            return None
+        case (EventNames.CREATED.value, EventNames.UPDATED.value):
+            return event.with_operation(EventNames.CREATED.value)
+        case (EventNames.DELETED.value, EventNames.CREATED.value):
+            return event.with_operation(EventNames.UPDATED.value)
+        case (EventNames.UPDATED.value, EventNames.UPDATED.value):
+            if previous.changed_fields is None or event.changed_fields is None:
+                changed_fields = None
+            else:
+                changed_fields = list(dict.fromkeys(
+                    [*previous.changed_fields, *event.changed_fields]
+                ))
+            return event.with_operation(EventNames.UPDATED.value, changed_fields)
+        case _:
+            return event
+
+
+class Coalescer:
+    """Holds the model events for `window` seconds after the first one
+    and emits their net effect per instance: successive updates collapse
+    into the latest one and an instance created then deleted within the
+    window emits nothing. Other events are emitted right away"""
+
+    def __init__(self, window: float, emit: Callable[[list[BaseEvent]], None], call_later: Optional[CallLater] = None):
+        self.window = window
+        self.emit = emit
+        self.call_later = call_later or thread_call_later
+        self.coalesced = 0
+        self._pending: dict[Hashable, ModelSubscriptionEvent] = {}
+        self._lock = threading.Lock()
+        self._scheduled = False
+        self._closed = False
+
+    def __len__(self):
+        return len(self._pending)
+
+    @staticmethod
+    def key(event: BaseEvent) -> Optional[Hashable]:
+        if not isinstance(event, ModelSubscriptionEvent) or event.pk is None:
+            return None
+        return (event.model._meta.label_lower, str(event.pk))
+
+    def add(self, event: BaseEvent):
+        key = self.key(event)
+        if key is None:
+            self.emit([event])
+            return
+
+        # Held for the window, during which the instance can go on
+        # changing or have its primary key reset by a deletion
+        event = event.capture()
+        with self._lock:
+            previous = self._pending.pop(key, None)
+            if previous is None:
+                self._pending[key] = event
+            else:
+                merged = merge_events(previous, event)
+                if merged is None:
+                    self.coalesced += 2
+                else:
+                    self.coalesced += 1
+                    self._pending[key] = merged
+
+            schedule = not self._scheduled and bool(self._pending)
+            if schedule:
+                self._scheduled = True
+
+        if schedule:
+            self.call_later(self.window, self.flush)
+
+    def flush(self):
+        with self._lock:
+            events = list(self._pending.values())
+            self._pending.clear()
+            self._scheduled = False
+
+        if events and not self._closed:
+            self.emit(events)
+
+    def close(self):
+        self._closed = True
+        with self._lock:
+            self._pending.clear()
+
+
+def coalesce_events(window: float, emit: Optional[Callable[[BaseEvent, Callable[[BaseEvent], None]], None]] = None) -> Callable[[Observable], Observable]:
+    """Rx operator coalescing the events of a subscription. The
+    optional `emit` function wraps the emission of each event"""
+    def operator(source: Observable) -> Observable:
+        def on_subscribe(observer, scheduler=None):
+            def emit_events(events: list[BaseEvent]):
+                for event in events:
+                    if emit is None:
+                        observer.on_next(event)
+                    else:
+                        emit(event, observer.on_next)
+
+            coalescer = Coalescer(window, emit_events, get_call_later())
+            subscription = source.subscribe(
+                coalescer.add,
+                observer.on_error,
+                observer.on_completed,
+                scheduler=scheduler
+            )
+            return CompositeDisposable(subscription, Disposable(coalescer.close))
+        return reactivex.create(on_subscribe)
+    return operator
+
+
+class ModelCoalescers:
+    """Coalescers of the models configured in the `COALESCE_MODELS`
+    setting, applied to the events before they are published"""
+
+    def __init__(self):
+        self._coalescers: dict[str, Coalescer] = {}
+        self._lock = threading.Lock()
+
+    def get(self, event: BaseEvent, emit: Callable[[list[BaseEvent]], None]) -> Optional[Coalescer]:
+        if not isinstance(event, ModelSubscriptionEvent):
+            return None
+
+        label = event.model._meta.label_lower
+        coalescer = self._coalescers.get(label)
+        if coalescer is not None:
+            return coalescer
+
+        windows = subscription_settings.COALESCE_MODELS
+        window = windows.get(label, windows.get(event.model._meta.label))
+        if not window:
+            return None
+
+        with self._lock:
+            return self._coalescers.setdefault(label, Coalescer(window, emit))
+
+    def flush(self):
+        for coalescer in list(self._coalescers.values()):
+            coalescer.flush()
+
+    def clear(self):
+        with self._lock:
+            for coalescer in self._coalescers.values():
+                coalescer.close()
+            self._coalescers.clear()
+
+
+model_coalescers = ModelCoalescers()
+
+
+def clear_model_coalescers(*args, **kwargs):
+    if kwargs['setting'] == 'GRAPHENE_SUBSCRIPTIONS':
+        model_coalescers.clear()
+
+
+setting_changed.connect(clear_model_coalescers)
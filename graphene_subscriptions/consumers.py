@@ -1,22 +1,279 @@
+import asyncio
 import json
-from typing import TYPE_CHECKING, Any, AsyncIterable, Optional
+from collections import deque
+from contextlib import nullcontext
+from functools import partial
+from typing import (TYPE_CHECKING, Any, AsyncIterable, Callable, Iterable,
+                    NamedTuple, Optional)
 
 import graphql
-from asgiref.sync import async_to_sync
-from channels.consumer import SyncConsumer
+from asgiref.sync import async_to_sync, sync_to_async
+from channels.consumer import AsyncConsumer, SyncConsumer
+from channels.exceptions import StopConsumer
 from graphene.types.schema import Schema
 from graphene_django.settings import graphene_settings
-from reactivex import Observable, Subject
-
+from django.db.models import Model
+import reactivex
+from reactivex import Observable, Subject, operators
+from reactivex.abc import DisposableBase, ObserverBase
+
+from graphene_subscriptions.bus import local_bus
+from graphene_subscriptions.cache import CachedDocument, resolve_document
+from graphene_subscriptions.changes import get_attnames
+from graphene_subscriptions.coalescing import coalesce_events
+from graphene_subscriptions.costs import (CostLimitExceeded, analyze_cost,
+                                          check_cost, process_costs)
+from graphene_subscriptions.dispatcher import SubscriptionDispatcher, deliver
+from graphene_subscriptions.events import (BaseEvent,
+                                           BulkModelSubscriptionEvent,
+                                           EventNames)
+from graphene_subscriptions.frames import FrameBuffer
+from graphene_subscriptions.interest import (get_interest_keys,
+                                             interest_registry)
+from graphene_subscriptions.live import JsonPatch, LiveResult
+from graphene_subscriptions.loaders import (EventLoader, current_loader,
+                                            event_loaders, get_event_loader)
+from graphene_subscriptions.metrics import metrics
+from graphene_subscriptions.profiling import profiler
+from graphene_subscriptions.replay import parse_event_seq, replay_log
+from graphene_subscriptions.settings import subscription_settings
+from graphene_subscriptions.sharing import (ShareKey, get_share_key,
+                                            shared_executions)
+from graphene_subscriptions.topics import GLOBAL_GROUP, Topic
 from graphene_subscriptions.typings import WsMessage
-from graphene_subscriptions.utils import (WsOperationTypes,
+from graphene_subscriptions.utils import (ExecutionScheduler,
+                                          MappedAsyncIterator, SourceEvent,
+                                          SubscriptionOverflow,
+                                          SubscriptionQueue,
+                                          SubscriptionTimeout, TimeoutPolicies,
+                                          WsOperationTypes,
                                           observable_to_async_iterable,
                                           value_to_async_iterable)
 
 if TYPE_CHECKING:
     from channels.consumer import _ChannelScope
 
-stream = Subject()
+
+# Events remembered by a resumed subscription on top of the replayed ones
+RESUMED_SEEN_EVENTS = 256
+
+
+class SubscriptionRecord:
+    """Resources held by one subscription of a connection: the task
+    streaming its results, the Rx subscriptions feeding it and the
+    channel groups it joined. They are released together when the
+    subscription is stopped, fails or the connection is closed"""
+
+    __slots__ = (
+        'id', 'topics', 'groups', 'interests', 'disposables', 'task',
+        'listeners', 'last_event_id', 'cost', 'live', 'seen_events'
+    )
+
+    def __init__(self, id: str):
+        self.id = id
+        self.topics: list[Topic] = []
+        # Only iterated, tuples take a fraction of the memory of sets
+        self.groups: tuple[str, ...] = ()
+        self.interests: tuple[str, ...] = ()
+        self.disposables: list[DisposableBase] = []
+        self.task: Optional[asyncio.Task] = None
+        # Observers registered by the resolvers with the topics they
+        # listen to, kept until the missed events are replayed
+        self.listeners: list[tuple[list[Topic], ObserverBase]] = []
+        self.last_event_id: Optional[str] = None
+        # Estimated cost admitted for the subscription
+        self.cost = 0
+        # Last result of a live subscription
+        self.live: Optional[LiveResult] = None
+        # Events received by a resumed subscription, live or replayed
+        self.seen_events: Optional[deque[str]] = None
+
+    def is_duplicate(self, event_id: Optional[str]) -> bool:
+        """Whether a resumed subscription already received the event"""
+        if event_id is None or self.seen_events is None:
+            return False
+        if event_id in self.seen_events:
+            return True
+        self.seen_events.append(event_id)
+        return False
+
+    def dispose(self):
+        if self.task is not None and self.task is not asyncio.current_task():
+            self.task.cancel()
+        for disposable in self.disposables:
+            disposable.dispose()
+        self.disposables.clear()
+
+
+class ResumedObserver(ObserverBase):
+    """Observer of a resumed subscription, skipping the events it
+    receives both from the replay log and from its channel groups"""
+
+    __slots__ = ('record', 'observer')
+
+    def __init__(self, record: SubscriptionRecord, observer: ObserverBase):
+        self.record = record
+        self.observer = observer
+
+    def on_next(self, value: Any):
+        if not self.record.is_duplicate(getattr(value, 'id', None)):
+            self.observer.on_next(value)
+
+    def on_error(self, error: Exception):
+        self.observer.on_error(error)
+
+    def on_completed(self):
+        self.observer.on_completed()
+
+
+class EventStream(Subject):
+    """Root value of the subscriptions. Resolvers that declare the events
+    they listen to with `model_events` or `events` are registered on an
+    indexed dispatcher and only make the connection join the channel
+    groups of these events. Resolvers chaining Rx operators on the
+    stream itself receive every event"""
+
+    def __init__(self):
+        super().__init__()
+        self.dispatcher = SubscriptionDispatcher()
+        self.current_event: Optional[BaseEvent] = None
+        # Record of the subscription currently being started, collecting
+        # the topics its resolver declares and the Rx subscriptions
+        self.starting: Optional[SubscriptionRecord] = None
+
+    def track(self, disposable: DisposableBase):
+        if self.starting is not None:
+            self.starting.disposables.append(disposable)
+
+    def _listen(self, topics: list[Topic]) -> Observable:
+        if self.starting is not None:
+            self.starting.topics.extend(topics)
+
+        def on_subscribe(observer, scheduler=None):
+            if self.starting is not None:
+                if self.starting.seen_events is not None:
+                    observer = ResumedObserver(self.starting, observer)
+                self.starting.listeners.append((topics, observer))
+            return self.dispatcher.register(topics, observer)
+
+        return reactivex.create(on_subscribe)
+
+    def on_next(self, value: Any):
+        if not isinstance(value, BaseEvent):
+            super().on_next(value)
+            return
+
+        if isinstance(value, BulkModelSubscriptionEvent):
+            self._on_next_bulk(value)
+            return
+
+        self.current_event = value
+        try:
+            with metrics.timer('graphene_subscriptions_dispatch_seconds'):
+                observers = self.dispatcher.dispatch(value)
+                super().on_next(value)
+            metrics.observe(
+                'graphene_subscriptions_dispatch_observers',
+                observers + len(self.observers)
+            )
+        finally:
+            self.current_event = None
+
+    def _on_next_core(self, value: Any):
+        with self.lock:
+            observers = self.observers.copy()
+        for observer in observers:
+            deliver(observer, value)
+
+    def _on_next_bulk(self, value: BulkModelSubscriptionEvent):
+        # Subscriptions receive an event per instance, so that they
+        # handle bulk operations like any other model event
+        try:
+            for event, observers in self.dispatcher.bulk_candidates(value):
+                self.current_event = event
+                for observer in observers:
+                    deliver(observer, event)
+                super().on_next(event)
+        finally:
+            self.current_event = None
+
+    def emit_as_current(self, event: BaseEvent, callback: Callable[[BaseEvent], None]):
+        # Values emitted after the dispatch of their event (e.g. once
+        # coalesced) are still tagged with the id of the event
+        self.current_event = event
+        try:
+            callback(event)
+        finally:
+            self.current_event = None
+
+    def get_current_event_id(self) -> Optional[str]:
+        if self.current_event is None:
+            return None
+        return self.current_event.id
+
+    def get_current_event_seq(self) -> Optional[str]:
+        if self.current_event is None:
+            return None
+        return self.current_event.seq
+
+    def replay(self, event: BaseEvent, listeners: list[tuple[list[Topic], ObserverBase]], after_index: Optional[int] = None):
+        """Hands a missed event to the given observers only, skipping
+        the instances of a bulk event up to `after_index`"""
+        if isinstance(event, BulkModelSubscriptionEvent):
+            events = event.events()
+        else:
+            events = [event]
+
+        try:
+            for index, instance_event in enumerate(events):
+                if after_index is not None and index <= after_index:
+                    continue
+                self.current_event = instance_event
+                for topics, observer in listeners:
+                    if any(topic.matches(instance_event) for topic in topics):
+                        deliver(observer, instance_event)
+        finally:
+            self.current_event = None
+
+    def model_events(self, model: type[Model], operations: Optional[list[EventNames | str]] = None, pk: Optional[Any] = None, coalesce: Optional[float] = None, fields: Optional[Iterable[str]] = None) -> Observable:
+        """Events of the instances of a model, or of the instance `pk`.
+        With `fields`, the updates changing none of them are dropped by
+        the connection. They are still published and sent through the
+        channel layer to every connection subscribed to the model, so
+        this saves the executions, not the fan-out"""
+        if operations is None:
+            operations = [
+                EventNames.CREATED,
+                EventNames.UPDATED,
+                EventNames.DELETED
+            ]
+
+        options = model._meta
+        pk = None if pk is None else str(pk)
+        observable = self._listen([
+            Topic(
+                getattr(operation, 'value', operation),
+                options.app_label,
+                options.model_name,
+                pk
+            )
+            for operation in operations
+        ])
+
+        if fields is not None:
+            # Updates that did not change any of the fields are dropped
+            attnames = set(get_attnames(model, fields))
+            observable = observable.pipe(
+                operators.filter(lambda event: event.changed(attnames))
+            )
+        if coalesce:
+            observable = observable.pipe(
+                coalesce_events(coalesce, self.emit_as_current)
+            )
+        return observable
+
+    def events(self, operation: EventNames | str) -> Observable:
+        return self._listen([Topic(getattr(operation, 'value', operation))])
 
 
 class ContextDict:
@@ -29,8 +286,14 @@ class ContextDict:
     def get(self, item):
         return self.scope.get(item)
 
+    @property
+    def loader(self) -> Optional[EventLoader]:
+        """Loader batching the lookups of the executions
+        of the subscriptions for the current event"""
+        return get_event_loader()
+
 
-def _graphene_subscribe_field_resolver(root: Subject, info: graphql.GraphQLResolveInfo, **args):
+def _graphene_subscribe_field_resolver(root: EventStream, info: graphql.GraphQLResolveInfo, **args):
     field_def: graphql.GraphQLField = info.parent_type.fields.get(
         info.field_name
     )
@@ -48,19 +311,188 @@ def _graphene_subscribe_field_resolver(root: Subject, info: graphql.GraphQLResol
 
     # Bridge the result to AsyncIterable based on its type
     if isinstance(result, Observable):
-        return observable_to_async_iterable(result)
+        queue_options = getattr(getattr(field_def, 'resolve', None), 'queue_options', {})
+        iterator = observable_to_async_iterable(
+            result,
+            getattr(root, 'get_current_event_id', None),
+            SubscriptionQueue.from_settings(**queue_options),
+            getattr(root, 'get_current_event_seq', None)
+        )
+        if isinstance(root, EventStream):
+            root.track(iterator)
+        return iterator
     elif isinstance(result, AsyncIterable):
         return result
     # Plain value (e.g. 'Hello World!') — wrap in a single-item async generator
     return value_to_async_iterable(result)
 
 
-class GraphqlSubscriptionConsumer(SyncConsumer):
+def _subscription_root_middleware(next, root, info: graphql.GraphQLResolveInfo, **args):
+    # The subscription field resolvers build the source stream from
+    # the root observable. When executing the selection set for each
+    # emitted value, the root field simply resolves to that value
+    if info.path.prev is None:
+        return root
+    return next(root, info, **args)
+
+
+async def subscribe(schema: Schema, document: graphql.DocumentNode, root_value: EventStream, context_value: 'ContextDict', variable_values: Optional[dict[str, Any]] = None, operation_name: Optional[str] = None, share_key: Optional[ShareKey] = None, scheduler: Optional[ExecutionScheduler] = None, document_key: Optional[str] = None) -> MappedAsyncIterator | graphql.ExecutionResult:
+    source = await graphql.create_source_event_stream(
+        schema.graphql_schema,
+        document,
+        root_value=root_value,
+        context_value=context_value,
+        variable_values=variable_values,
+        operation_name=operation_name,
+        subscribe_field_resolver=_graphene_subscribe_field_resolver
+    )
+
+    if isinstance(source, graphql.ExecutionResult):
+        return source
+
+    # Profiles are tagged with the name of the operation
+    # even when the client did not send it
+    operation = graphql.get_operation_ast(document, operation_name)
+    profile_name = operation.name.value if operation and operation.name else operation_name
+
+    return MappedAsyncIterator(source, SubscriptionExecutor(
+        schema,
+        document,
+        context_value,
+        variable_values,
+        operation_name,
+        share_key,
+        scheduler,
+        document_key,
+        profile_name
+    ))
+
+
+def build_result_payload(result: graphql.ExecutionResult) -> dict[str, Any]:
+    return {
+        'data': result.data,
+        'errors': list(map(str, result.errors)) if result.errors else None
+    }
+
+
+class EncodedResult(str):
+    """JSON encoded payload of an execution result"""
+
+
+class EventResult(NamedTuple):
+    """Result of a subscription for an event of the replay log"""
+
+    result: graphql.ExecutionResult | EncodedResult
+    seq: str
+
+
+def encode_result(result: graphql.ExecutionResult) -> EncodedResult:
+    return EncodedResult(json.dumps(build_result_payload(result)))
+
+
+class SubscriptionExecutor:
+    """Executes the document of a subscription for each value of its
+    source stream. Kept by idle subscriptions, so it holds its state in
+    slots rather than in closures"""
+
+    __slots__ = ('schema', 'document', 'context_value', 'variable_values', 'operation_name', 'share_key', 'scheduler', 'document_key', 'profile_name')
+
+    def __init__(self, schema: Schema, document: graphql.DocumentNode, context_value: 'ContextDict', variable_values: Optional[dict[str, Any]], operation_name: Optional[str], share_key: Optional[ShareKey], scheduler: Optional[ExecutionScheduler], document_key: Optional[str], profile_name: Optional[str]):
+        self.schema = schema
+        self.document = document
+        self.context_value = context_value
+        self.variable_values = variable_values
+        self.operation_name = operation_name
+        self.share_key = share_key
+        self.scheduler = scheduler
+        self.document_key = document_key
+        self.profile_name = profile_name
+
+    async def execute(self, payload: Any, event_id: Optional[str] = None) -> graphql.ExecutionResult:
+        middleware = [_subscription_root_middleware]
+        profile = profiler.start(self.document_key, self.profile_name, event_id)
+        if profile is not None:
+            middleware.append(profile.middleware)
+
+        with metrics.timer('graphene_subscriptions_execution_seconds'), profile or nullcontext():
+            result = graphql.execute(
+                self.schema.graphql_schema,
+                self.document,
+                root_value=payload,
+                context_value=self.context_value,
+                variable_values=self.variable_values,
+                operation_name=self.operation_name,
+                middleware=middleware
+            )
+            if graphql.pyutils.is_awaitable(result):
+                return await result
+            return result
+
+    async def execute_shared(self, payload: Any, event_id: Optional[str]) -> graphql.ExecutionResult | EncodedResult:
+        if self.share_key is None or event_id is None:
+            return await self.execute(payload, event_id)
+
+        async def execute_and_encode() -> EncodedResult:
+            return encode_result(await self.execute(payload, event_id))
+
+        return await shared_executions.get_or_execute(
+            event_id,
+            self.share_key,
+            execute_and_encode
+        )
+
+    async def __call__(self, payload: Any) -> Optional[graphql.ExecutionResult | EncodedResult | EventResult]:
+        event_id = seq = None
+        if isinstance(payload, SourceEvent):
+            payload, event_id, seq = payload
+
+        # The executions for the same event share their lookups
+        token = current_loader.set(event_loaders.get(event_id))
+        try:
+            if self.scheduler is None:
+                result = await self.execute_shared(payload, event_id)
+            else:
+                result = await self.scheduler.run(partial(self.execute_shared, payload, event_id))
+                if result is None:
+                    # The execution timed out and the event is skipped
+                    return None
+        finally:
+            current_loader.reset(token)
+
+        if seq is not None:
+            return EventResult(result, seq)
+        return result
+
+
+class SubscriptionConsumerMixin:
     groups = None
+    # Whether the consumer can receive the events
+    # sent in its process from the local bus
+    supports_local_delivery = False
 
     def __init__(self, *args, **kwargs):
         if self.groups is None:
             self.groups = []
+        self.stream = EventStream()
+        # Active subscriptions keyed by operation id, each one
+        # streaming its results from its own task
+        self.subscriptions: dict[str, SubscriptionRecord] = {}
+        # Subscriptions holding each of the channel groups joined
+        self.group_members: dict[str, set[str]] = {}
+        self.recent_events: deque[str] = deque(maxlen=256)
+        # Set when the client accepts batch frames
+        self.frame_buffer: Optional[FrameBuffer] = None
+        self.scheduler = ExecutionScheduler.from_settings()
+        self.local_delivery = self.supports_local_delivery and local_bus.enabled
+        self._context: Optional[ContextDict] = None
+
+    @property
+    def context(self) -> ContextDict:
+        """Context of the executions, shared by
+        every subscription of the connection"""
+        if self._context is None:
+            self._context = ContextDict(self.scope)
+        return self._context
 
     @staticmethod
     def decode_json(text_data: dict | str | None) -> WsMessage:
@@ -75,126 +507,483 @@ class GraphqlSubscriptionConsumer(SyncConsumer):
             except json.JSONDecodeError:
                 return {'text': text_data}
 
-    def _send_result(self, id: str, result: graphql.MapAsyncIterator):
-        async def resolve_map_async_iterator() -> list[dict[str, Any] | str]:
-            container = []
-            async for item in result:
-                if isinstance(item, graphql.ExecutionResult):
-                    container.append({
-                        'data': item.data,
-                        'errors': list(map(str, item.errors)) if item.errors else None
-                    })
-            return container
+    @staticmethod
+    def build_frame(id: str, result: graphql.ExecutionResult | EncodedResult, seq: Optional[str] = None) -> dict[str, Any]:
+        if not isinstance(result, EncodedResult):
+            result = encode_result(result)
 
-        data = async_to_sync(resolve_map_async_iterator)()
+        # Clients resume their subscriptions from the
+        # sequence number of the last event they received
+        seq = '' if seq is None else f', "seq": {json.dumps(seq)}'
 
-        self.send(
-            {
-                'type': 'websocket.send',
-                'text': json.dumps(
-                    {
-                        'id': id,
-                        'type': 'data',
-                        'payload': {
-                            'data': data,
-                            # 'errors': list(map(str, errors)) if errors else None
-                        }
-                    }
-                )
-            }
-        )
+        # The payload is spliced in as is since shared
+        # results are encoded once for every connection
+        return {
+            'type': 'websocket.send',
+            'text': f'{{"id": {json.dumps(id)}, "type": "data"{seq}, "payload": {result}}}'
+        }
 
-        # breakpoint()
-        # errors = result.errors
-        # self.send(
-        #     {
-        #         'type': 'websocket.send',
-        #         'text': json.dumps(
-        #             {
-        #                 'id': id,
-        #                 'type': 'data',
-        #                 'payload': {
-        #                     'data': result.data,
-        #                     'errors': list(map(str, errors)) if errors else None
-        #                 }
-        #             }
-        #         )
-        #     }
-        # )
+    @staticmethod
+    def build_patch_frame(id: str, patch: JsonPatch, seq: Optional[str] = None) -> dict[str, Any]:
+        seq = '' if seq is None else f', "seq": {json.dumps(seq)}'
+        return {
+            'type': 'websocket.send',
+            'text': f'{{"id": {json.dumps(id)}, "type": "patch"{seq}, "payload": {patch}}}'
+        }
 
-    def send_json(self, message_type: str, **kwargs: Any):
-        self.send({'type': message_type, **kwargs})
+    @staticmethod
+    def build_error_frame(id: str, error: CostLimitExceeded) -> dict[str, Any]:
+        return {
+            'type': 'websocket.send',
+            'text': json.dumps({
+                'id': id,
+                'type': 'error',
+                'payload': {
+                    'message': str(error),
+                    error.measure: error.value,
+                    'limit': error.limit
+                }
+            })
+        }
 
-    def send_error(self, error: str):
-        self.send_json('websocket.send', message=error)
+    @staticmethod
+    def get_operation(schema: Schema, payload: dict[str, Any]) -> tuple[CachedDocument, graphql.OperationDefinitionNode] | graphql.ExecutionResult:
+        document = resolve_document(schema.graphql_schema, payload)
+        if isinstance(document, graphql.ExecutionResult):
+            return document
+
+        if document.errors:
+            return graphql.ExecutionResult(data=None, errors=document.errors)
+
+        operation = document.get_operation(payload.get('operationName'))
+        if operation is None:
+            return graphql.ExecutionResult(
+                data=None,
+                errors=[graphql.GraphQLError('Must provide a valid operation name')]
+            )
+        return document, operation
+
+    async def _asend(self, message: dict[str, Any]):
+        raise NotImplementedError
+
+    def _init_connection(self, payload: dict[str, Any]):
+        window = subscription_settings.FRAME_BATCH_WINDOW
+        if payload.get('batch') and window:
+            self.frame_buffer = FrameBuffer(
+                self._asend,
+                window,
+                subscription_settings.FRAME_BATCH_SIZE
+            )
+
+    async def _send_frame(self, frame: dict[str, Any]):
+        if self.frame_buffer is None:
+            await self._asend(frame)
+        else:
+            await self.frame_buffer.add(frame)
 
-    def websocket_connect(self, message: str):
-        async_to_sync(self.channel_layer.group_add)(
-            'subscriptions',
-            self.channel_name
+    async def _stream_result(self, record: SubscriptionRecord, result: MappedAsyncIterator):
+        try:
+            async for item in result:
+                seq = None
+                if isinstance(item, EventResult):
+                    item, seq = item
+                if isinstance(item, (graphql.ExecutionResult, EncodedResult)):
+                    frame = self._result_frame(record, item, seq)
+                    if frame is None:
+                        continue
+                    with metrics.timer('graphene_subscriptions_send_seconds'):
+                        await self._send_frame(frame)
+                    metrics.inc('graphene_subscriptions_frames_sent_total')
+        except SubscriptionOverflow:
+            # The client does not keep up with its subscription
+            await self._asend({'type': 'websocket.close', 'code': 1013})
+        except SubscriptionTimeout as error:
+            if error.policy is TimeoutPolicies.DISCONNECT:
+                await self._asend({'type': 'websocket.close', 'code': 1013})
+            else:
+                await self._send_failure(record, error)
+        except Exception as error:
+            # A failing subscription is stopped without
+            # holding back the others of the connection
+            metrics.inc('graphene_subscriptions_subscription_failures_total')
+            await self._send_failure(record, error)
+        finally:
+            await result.aclose()
+            if self.subscriptions.get(record.id) is record:
+                await self._release(record)
+
+    def _result_frame(self, record: SubscriptionRecord, result: graphql.ExecutionResult | EncodedResult, seq: Optional[str] = None) -> Optional[dict[str, Any]]:
+        if record.live is None:
+            return self.build_frame(record.id, result, seq)
+
+        if not isinstance(result, EncodedResult):
+            result = encode_result(result)
+        update = record.live.update(result)
+        if update is None:
+            # Live subscriptions only send the results that changed
+            metrics.inc('graphene_subscriptions_results_unchanged_total')
+            return None
+        if isinstance(update, JsonPatch):
+            metrics.inc('graphene_subscriptions_patches_sent_total')
+            return self.build_patch_frame(record.id, update, seq)
+        return self.build_frame(record.id, result, seq)
+
+    async def _send_failure(self, record: SubscriptionRecord, error: Exception):
+        result = graphql.ExecutionResult(
+            data=None,
+            errors=[graphql.GraphQLError(str(error))]
         )
-        self.send_json('websocket.accept', subprotocol='graphql-ws')
-
-    def websocket_disconnect(self, message: str):
-        self.send_json('websocket.close', code=1000)
-
-    def websocket_receive(self, message: dict[str, Any] | str):
-        message = self.decode_json(message['text'])
+        await self._send_frame(self.build_frame(record.id, result))
+
+    def _admit(self, id: str, schema: Schema, document: CachedDocument, operation: graphql.OperationDefinitionNode, variables: Optional[dict[str, Any]] = None) -> int:
+        """Estimates the cost of a subscription before it is started and
+        reserves it, raising `CostLimitExceeded` when it is over a limit"""
+        cost = analyze_cost(schema.graphql_schema, document.document, operation, variables)
+        metrics.observe('graphene_subscriptions_subscription_cost', cost.cost)
+
+        # The subscription replaces the one with the same operation id
+        connection_cost = sum(
+            record.cost for record in self.subscriptions.values()
+            if record.id != id
+        )
+        replaced = self.subscriptions.get(id)
+        try:
+            check_cost(cost, connection_cost)
+            process_costs.admit(cost.cost, replaced.cost if replaced else 0)
+        except CostLimitExceeded:
+            metrics.inc('graphene_subscriptions_subscriptions_rejected_total')
+            raise
+
+        metrics.inc('graphene_subscriptions_admitted_cost', cost.cost)
+        return cost.cost
+
+    def _release_cost(self, record: SubscriptionRecord):
+        cost, record.cost = record.cost, 0
+        if cost:
+            process_costs.release(cost)
+            metrics.dec('graphene_subscriptions_admitted_cost', cost)
+
+    async def _subscribe(self, id: str, last_event_id: Optional[str] = None, cost: int = 0, live: Optional[LiveResult] = None, **kwargs: Any) -> tuple[MappedAsyncIterator | graphql.ExecutionResult, SubscriptionRecord]:
+        record = self.stream.starting = SubscriptionRecord(id)
+        record.last_event_id = last_event_id
+        if last_event_id is not None:
+            record.seen_events = deque(maxlen=RESUMED_SEEN_EVENTS)
+        record.cost = cost
+        record.live = live
+        try:
+            with metrics.timer('graphene_subscriptions_subscribe_seconds'):
+                result = await subscribe(
+                    root_value=self.stream,
+                    scheduler=self.scheduler,
+                    **kwargs
+                )
+        except BaseException:
+            record.dispose()
+            self._release_cost(record)
+            raise
+        finally:
+            self.stream.starting = None
+
+        if isinstance(result, graphql.ExecutionResult):
+            record.dispose()
+            self._release_cost(record)
+        return result, record
+
+    async def _join_groups(self, record: SubscriptionRecord):
+        record.groups = tuple({topic.group_name for topic in record.topics}) or (GLOBAL_GROUP,)
+        record.interests = tuple(get_interest_keys(record.topics))
+        await interest_registry.add(record.interests)
+
+        for group in record.groups:
+            members = self.group_members.setdefault(group, set())
+            if not members:
+                await self.channel_layer.group_add(group, self.channel_name)
+                if self.local_delivery:
+                    local_bus.group_add(group, self)
+            members.add(record.id)
+
+    async def _leave_groups(self, record: SubscriptionRecord):
+        interests, record.interests = record.interests, ()
+        await interest_registry.remove(interests)
+
+        groups, record.groups = record.groups, ()
+        for group in groups:
+            members = self.group_members.get(group, set())
+            members.discard(record.id)
+            if not members:
+                self.group_members.pop(group, None)
+                await self.channel_layer.group_discard(group, self.channel_name)
+                if self.local_delivery:
+                    local_bus.group_discard(group, self)
+
+    async def _release(self, record: SubscriptionRecord):
+        if self.subscriptions.get(record.id) is record:
+            del self.subscriptions[record.id]
+            metrics.dec('graphene_subscriptions_subscriptions')
+        record.dispose()
+        self._release_cost(record)
+        await self._leave_groups(record)
+
+    async def _start_stream(self, record: SubscriptionRecord, result: MappedAsyncIterator):
+        # A client reusing an operation id replaces the previous subscription
+        await self._stop_stream(record.id)
+        self.subscriptions[record.id] = record
+        metrics.inc('graphene_subscriptions_subscriptions')
+        metrics.inc('graphene_subscriptions_subscriptions_total')
+        await self._join_groups(record)
+        if record.last_event_id is not None:
+            # Replayed once the groups are joined so that no event
+            # is missed, the events received since are skipped
+            await self._replay(record)
+        record.listeners = []
+        record.task = asyncio.create_task(self._stream_result(record, result))
+
+    async def _replay(self, record: SubscriptionRecord):
+        backend = replay_log.backend
+        position = parse_event_seq(record.last_event_id)
+        messages = None
+        if backend is not None and position is not None and record.topics:
+            seq, index = position
+            messages = await sync_to_async(backend.replay, thread_sensitive=False)(
+                record.topics,
+                seq if index >= 0 else seq + 1
+            )
+
+        if messages is None:
+            # The missed events are no longer kept, the client
+            # has to fetch the current state again
+            await self._asend({
+                'type': 'websocket.send',
+                'text': json.dumps({'id': record.id, 'type': 'resync_required'})
+            })
+            return
+
+        # Makes room for the replayed events, whose copies can still be
+        # on their way through the channel groups joined before the replay
+        record.seen_events = deque(
+            record.seen_events,
+            maxlen=len(messages) + RESUMED_SEEN_EVENTS
+        )
+        for message in messages:
+            event = BaseEvent.from_dict(message['event'])
+            event.id = message['id']
+            event.seq = str(message['seq'])
+            self.stream.replay(
+                event,
+                record.listeners,
+                index if message['seq'] == seq else None
+            )
+
+    async def _stop_stream(self, id: str):
+        record = self.subscriptions.get(id)
+        if record is not None:
+            await self._release(record)
+
+    def _is_duplicate(self, event_id: Optional[str]) -> bool:
+        if event_id is None:
+            return False
+        if event_id in self.recent_events:
+            metrics.inc('graphene_subscriptions_events_duplicate_total')
+            return True
+        self.recent_events.append(event_id)
+        return False
+
+    def _receive_event(self, message: dict[str, Any]) -> Optional[BaseEvent]:
+        if self.local_delivery and message.get('origin') == local_bus.origin:
+            # Already received from the local bus
+            return None
+
+        metrics.inc('graphene_subscriptions_events_received_total')
+        event_id = message.get('id')
+        if self._is_duplicate(event_id):
+            return None
+
+        event = BaseEvent.from_dict(message['event'])
+        event.id = event_id
+        seq = message.get('seq')
+        if seq is not None:
+            event.seq = str(seq)
+        return event
+
+    async def _send_result(self, id: str, result: graphql.ExecutionResult):
+        await self._asend(self.build_frame(id, result))
+
+    async def _execute(self, **kwargs: Any) -> graphql.ExecutionResult:
+        result = graphql.execute(**kwargs)
+        if graphql.pyutils.is_awaitable(result):
+            result = await result
+        return result
 
+    async def _receive(self, message: WsMessage):
+        """Handles a message of the client, on the event loop for the
+        sync consumer as well"""
         request_type = message.get('type')
-        text = self.decode_json(message.get('text'))
 
         match request_type:
             case WsOperationTypes.INITIAL_CONNECTION.value:
+                self._init_connection(message.get('payload') or {})
                 return
             case WsOperationTypes.START_SUBSCRIPTION.value:
                 payload: dict[str, Any] = message['payload']
-                context = ContextDict(self.scope)
                 schema: Schema = graphene_settings.SCHEMA
+                request_id: str = message.get('id')
 
-                document = graphql.parse(payload['query'])
-                operation = graphql.get_operation_ast(
-                    document,
-                    payload.get('operationName')
-                )
+                prepared = self.get_operation(schema, payload)
+                if isinstance(prepared, graphql.ExecutionResult):
+                    await self._send_result(request_id, prepared)
+                    return
+
+                document, operation = prepared
                 is_subscription = operation.operation == graphql.OperationType.SUBSCRIPTION
 
-                request_id: str = message.get('id')
                 if is_subscription:
-                    result = async_to_sync(graphql.subscribe)(
-                        schema=schema.graphql_schema,
-                        document=document,
-                        root_value=stream,
-                        context_value=context,
+                    try:
+                        cost = self._admit(
+                            request_id,
+                            schema,
+                            document,
+                            operation,
+                            payload.get('variables')
+                        )
+                    except CostLimitExceeded as error:
+                        await self._asend(self.build_error_frame(request_id, error))
+                        return
+
+                    result, record = await self._subscribe(
+                        request_id,
+                        cost=cost,
+                        schema=schema,
+                        document=document.document,
+                        document_key=document.key,
+                        context_value=self.context,
                         variable_values=payload.get('variables'),
                         operation_name=payload.get('operationName'),
-                        subscribe_field_resolver=_graphene_subscribe_field_resolver
+                        last_event_id=payload.get('lastEventId'),
+                        live=LiveResult.from_payload(payload),
+                        share_key=get_share_key(
+                            schema.graphql_schema,
+                            document,
+                            operation,
+                            payload.get('variables')
+                        )
                     )
 
-                    if hasattr(result, 'subscribe'):
-                        result.subscribe(
-                            lambda _result: self._send_result(
-                                request_id,
-                                _result
-                            )
-                        )
+                    if isinstance(result, graphql.ExecutionResult):
+                        await self._send_result(request_id, result)
+                    else:
+                        # The results are streamed from a task on the event
+                        # loop, which releases the worker thread of a sync consumer
+                        await self._start_stream(record, result)
                 else:
-                    result = schema.execute(
-                        payload['query'],
-                        operation_name=payload.get('operationName'),
+                    result = await self._execute(
+                        schema=schema.graphql_schema,
+                        document=document.document,
+                        root_value=self.stream,
+                        context_value=self.context,
                         variable_values=payload.get('variables'),
-                        context_value=context,
-                        root_value=stream
+                        operation_name=payload.get('operationName')
                     )
-
-                self._send_result(request_id, result)
+                    await self._send_result(request_id, result)
             case WsOperationTypes.STOP_SUBSCRIPTION.value:
-                return
+                await self._stop_stream(message.get('id'))
             case _:
-                self.send_error('Unknown message type')
+                await self._asend({'type': 'websocket.send', 'message': 'Unknown message type'})
                 return
 
-    def signal_fired(self, message: str):
-        stream.on_next('')
-        stream.on_next('')
-        stream.on_next('')
+    def _connected(self):
+        metrics.inc('graphene_subscriptions_connections')
+        metrics.inc('graphene_subscriptions_connections_total')
+
+    def _disconnected(self):
+        metrics.dec('graphene_subscriptions_connections')
+        if self.frame_buffer is not None:
+            self.frame_buffer.close()
+
+    async def _stop_streams(self):
+        for record in list(self.subscriptions.values()):
+            await self._release(record)
+
+
+class GraphqlSubscriptionConsumer(SubscriptionConsumerMixin, SyncConsumer):
+    async def _asend(self, message: dict[str, Any]):
+        await sync_to_async(self.send, thread_sensitive=False)(message)
+
+    def send_json(self, message_type: str, **kwargs: Any):
+        self.send({'type': message_type, **kwargs})
+
+    def send_error(self, error: str):
+        self.send_json('websocket.send', message=error)
+
+    def websocket_connect(self, message: str):
+        self.send_json('websocket.accept', subprotocol='graphql-ws')
+        self._connected()
+
+    def websocket_disconnect(self, message: str):
+        async_to_sync(self._stop_streams)()
+        self._disconnected()
+        raise StopConsumer()
+
+    def websocket_receive(self, message: dict[str, Any] | str):
+        async_to_sync(self._receive)(self.decode_json(message['text']))
+
+    async def _execute(self, **kwargs: Any) -> graphql.ExecutionResult:
+        # Queries are resolved in the worker thread of the consumer,
+        # where their resolvers can use the ORM
+        result = await sync_to_async(graphql.execute)(**kwargs)
+        if graphql.pyutils.is_awaitable(result):
+            result = await result
+        return result
+
+    def signal_fired(self, message: dict[str, Any]):
+        event = self._receive_event(message)
+        if event is not None:
+            self.stream.on_next(event)
+
+    def signal_batch(self, message: dict[str, Any]):
+        for item in message['events']:
+            self.signal_fired(item)
+
+
+class AsyncGraphqlSubscriptionConsumer(SubscriptionConsumerMixin, AsyncConsumer):
+    """Subscription consumer running entirely on the connection's
+    event loop: the channel layer, graphql-core and the iteration
+    of the subscription results are awaited without bridging
+    through `async_to_sync` and a worker thread"""
+
+    supports_local_delivery = True
+
+    async def _asend(self, message: dict[str, Any]):
+        await self.send(message)
+
+    async def send_json(self, message_type: str, **kwargs: Any):
+        await self.send({'type': message_type, **kwargs})
+
+    async def send_error(self, error: str):
+        await self.send_json('websocket.send', message=error)
+
+    async def websocket_connect(self, message: dict[str, Any]):
+        await self.send_json('websocket.accept', subprotocol='graphql-ws')
+        self._connected()
+
+    async def websocket_disconnect(self, message: dict[str, Any]):
+        await self._stop_streams()
+        self._disconnected()
+        raise StopConsumer()
+
+    async def websocket_receive(self, message: dict[str, Any]):
+        await self._receive(self.decode_json(message['text']))
+
+    async def signal_fired(self, message: dict[str, Any]):
+        event = self._receive_event(message)
+        if event is not None:
+            self.stream.on_next(event)
+
+    def receive_local_events(self, events: list[BaseEvent]):
+        for event in events:
+            metrics.inc('graphene_subscriptions_events_local_total')
+            if not self._is_duplicate(event.id):
+                self.stream.on_next(event)
+
+    async def signal_batch(self, message: dict[str, Any]):
+        for item in message['events']:
+            await self.signal_fired(item)
@@ -0,0 +1,177 @@
+import threading
+from typing import Any, NamedTuple, Optional
+
+import graphql
+
+from graphene_subscriptions.settings import subscription_settings
+
+# Arguments of list fields giving the number of items they return
+LIST_SIZE_ARGUMENTS = ('first', 'last', 'limit')
+
+
+class SubscriptionCost(NamedTuple):
+    """Estimated cost of executing a subscription for one event and
+    depth of its selections"""
+
+    cost: int
+    depth: int
+
+
+class CostLimitExceeded(Exception):
+    """Raised when a subscription is over a limit. `measure` names what
+    went over it, `cost` or `depth`, and `value` how much it measured"""
+
+    def __init__(self, message: str, value: int, limit: int, measure: str = 'cost'):
+        super().__init__(message)
+        self.value = value
+        self.limit = limit
+        self.measure = measure
+
+
+class CostAnalyzer:
+    """Estimates the cost of an operation from its document. Each field
+    costs its weight, 1 unless declared in `field_weights` by
+    'TypeName.fieldName', and the selections of a list field are counted
+    once per item: as many as its `first`, `last` or `limit` argument
+    or `list_size` otherwise"""
+
+    def __init__(self, schema: graphql.GraphQLSchema, document: graphql.DocumentNode, variables: Optional[dict[str, Any]] = None, field_weights: Optional[dict[str, int]] = None, list_size: int = 10):
+        self.schema = schema
+        self.variables = variables or {}
+        self.field_weights = field_weights or {}
+        self.list_size = list_size
+        self.fragments = {
+            definition.name.value: definition
+            for definition in document.definitions
+            if isinstance(definition, graphql.FragmentDefinitionNode)
+        }
+
+    def analyze(self, operation: graphql.OperationDefinitionNode) -> SubscriptionCost:
+        root_type = self.schema.get_root_type(operation.operation)
+        return self._selections_cost(root_type, operation.selection_set, frozenset())
+
+    def _selections_cost(self, parent_type: graphql.GraphQLNamedType, selection_set: graphql.SelectionSetNode, fragments: frozenset[str]) -> SubscriptionCost:
+        cost = depth = 0
+        for selection in selection_set.selections:
+            if isinstance(selection, graphql.FieldNode):
+                selection_cost = self._field_cost(parent_type, selection, fragments)
+            elif isinstance(selection, graphql.InlineFragmentNode):
+                fragment_type = parent_type
+                if selection.type_condition is not None:
+                    fragment_type = self.schema.get_type(selection.type_condition.name.value)
+                selection_cost = self._selections_cost(fragment_type, selection.selection_set, fragments)
+            else:
+                name = selection.name.value
+                fragment = self.fragments.get(name)
+                if fragment is None or name in fragments:
+                    continue
+                selection_cost = self._selections_cost(
+                    self.schema.get_type(fragment.type_condition.name.value),
+                    fragment.selection_set,
+                    fragments | {name}
+                )
+            cost += selection_cost.cost
+            depth = max(depth, selection_cost.depth)
+        return SubscriptionCost(cost, depth)
+
+    def _field_cost(self, parent_type: graphql.GraphQLNamedType, field: graphql.FieldNode, fragments: frozenset[str]) -> SubscriptionCost:
+        name = field.name.value
+        field_def = getattr(parent_type, 'fields', {}).get(name)
+        if field_def is None:
+            # Introspection fields such as __typename
+            return SubscriptionCost(0, 1)
+
+        weight = self.field_weights.get(f'{parent_type.name}.{name}', 1)
+        if field.selection_set is None:
+            return SubscriptionCost(weight, 1)
+
+        children = self._selections_cost(
+            graphql.get_named_type(field_def.type),
+            field.selection_set,
+            fragments
+        )
+        items = self._list_size(field) if self._is_list(field_def.type) else 1
+        return SubscriptionCost(weight + items * children.cost, children.depth + 1)
+
+    @staticmethod
+    def _is_list(type_: graphql.GraphQLOutputType) -> bool:
+        return graphql.is_list_type(graphql.get_nullable_type(type_))
+
+    def _list_size(self, field: graphql.FieldNode) -> int:
+        for argument in field.arguments:
+            if argument.name.value not in LIST_SIZE_ARGUMENTS:
+                continue
+            value = graphql.value_from_ast_untyped(argument.value, self.variables)
+            if isinstance(value, int):
+                return max(value, 0)
+        return self.list_size
+
+
+def analyze_cost(schema: graphql.GraphQLSchema, document: graphql.DocumentNode, operation: graphql.OperationDefinitionNode, variables: Optional[dict[str, Any]] = None) -> SubscriptionCost:
+    return CostAnalyzer(
+        schema,
+        document,
+        variables,
+        field_weights=subscription_settings.COST_FIELD_WEIGHTS,
+        list_size=subscription_settings.COST_LIST_SIZE
+    ).analyze(operation)
+
+
+def check_cost(cost: SubscriptionCost, connection_cost: int):
+    """Raises `CostLimitExceeded` when a subscription is too deep or
+    costly on its own or for the connection opening it"""
+    limit = subscription_settings.MAX_SUBSCRIPTION_DEPTH
+    if limit is not None and cost.depth > limit:
+        raise CostLimitExceeded(
+            f'Subscription depth {cost.depth} exceeds the limit of {limit}',
+            cost.depth,
+            limit,
+            measure='depth'
+        )
+
+    limit = subscription_settings.MAX_SUBSCRIPTION_COST
+    if limit is not None and cost.cost > limit:
+        raise CostLimitExceeded(
+            f'Subscription cost {cost.cost} exceeds the limit of {limit}',
+            cost.cost,
+            limit
+        )
+
+    limit = subscription_settings.MAX_CONNECTION_COST
+    if limit is not None and connection_cost + cost.cost > limit:
+        raise CostLimitExceeded(
+            f'Subscription cost {cost.cost} exceeds the {limit - connection_cost} left to the connection',
+            cost.cost,
+            limit
+        )
+
+
+class ProcessCosts:
+    """Cost of the subscriptions admitted by all the connections of
+    the process, bounded by the `MAX_PROCESS_COST` setting"""
+
+    def __init__(self):
+        # Sync consumers admit subscriptions from their worker threads
+        self._lock = threading.Lock()
+        self.admitted = 0
+
+    def admit(self, cost: int, released: int = 0):
+        """Reserves `cost`, counting `released` as already freed for the
+        subscription it replaces, which releases it once stopped"""
+        limit = subscription_settings.MAX_PROCESS_COST
+        with self._lock:
+            admitted = self.admitted - released
+            if limit is not None and admitted + cost > limit:
+                raise CostLimitExceeded(
+                    f'Subscription cost {cost} exceeds the {max(limit - admitted, 0)} left to the server',
+                    cost,
+                    limit
+                )
+            self.admitted += cost
+
+    def release(self, cost: int):
+        with self._lock:
+            self.admitted = max(self.admitted - cost, 0)
+
+
+process_costs = ProcessCosts()
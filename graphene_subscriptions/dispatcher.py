@@ -0,0 +1,93 @@
+import threading
+from typing import TYPE_CHECKING
+
+from reactivex import Observer
+from reactivex.disposable import Disposable
+
+from graphene_subscriptions.topics import Topic
+
+if TYPE_CHECKING:
+    from graphene_subscriptions.events import (BaseEvent,
+                                               BulkModelSubscriptionEvent,
+                                               ModelSubscriptionEvent)
+
+
+def deliver(observer: Observer, event: 'BaseEvent'):
+    """Hands an event to an observer. An observer that raises is
+    sent the error so that only its own subscription fails"""
+    try:
+        observer.on_next(event)
+    except Exception as error:
+        observer.on_error(error)
+
+
+class SubscriptionDispatcher:
+    """Index of the observers of the subscriptions by the topics they
+    declared. An event is only handed to the observers registered for
+    one of its own topics instead of being tested against the filters
+    of every subscription"""
+
+    def __init__(self):
+        self._index: dict[Topic, dict[int, Observer]] = {}
+        # Events can be dispatched from the worker thread of a
+        # sync consumer while subscriptions are registered
+        self._lock = threading.Lock()
+        self._next_key = 0
+
+    def __len__(self):
+        return sum(map(len, self._index.values()))
+
+    def register(self, topics: list[Topic], observer: Observer) -> Disposable:
+        with self._lock:
+            key = self._next_key
+            self._next_key += 1
+            for topic in topics:
+                self._index.setdefault(topic, {})[key] = observer
+
+        def unregister():
+            with self._lock:
+                for topic in topics:
+                    observers = self._index.get(topic)
+                    if observers is None:
+                        continue
+                    observers.pop(key, None)
+                    if not observers:
+                        del self._index[topic]
+
+        return Disposable(unregister)
+
+    def candidates(self, event: 'BaseEvent') -> list[Observer]:
+        with self._lock:
+            candidates = []
+            for topic in event.topics():
+                observers = self._index.get(topic)
+                if observers:
+                    candidates.extend(observers.values())
+            return candidates
+
+    def bulk_candidates(self, event: 'BulkModelSubscriptionEvent') -> list[tuple['ModelSubscriptionEvent', list[Observer]]]:
+        """The observers of each of the instances of a bulk event, found
+        in a single pass with the observers of the whole model looked
+        up once"""
+        model_topic, *_ = event.topics()
+        with self._lock:
+            model_observers = list(self._index.get(model_topic, {}).values())
+            candidates = []
+            for instance_event in event.events():
+                pk = instance_event.pk
+                observers = None
+                if pk is not None:
+                    observers = self._index.get(model_topic._replace(pk=str(pk)))
+                if observers:
+                    candidates.append(
+                        (instance_event, [*model_observers, *observers.values()])
+                    )
+                else:
+                    candidates.append((instance_event, model_observers))
+            return candidates
+
+    def dispatch(self, event: 'BaseEvent') -> int:
+        candidates = self.candidates(event)
+        for observer in candidates:
+            deliver(observer, event)
+        return len(candidates)
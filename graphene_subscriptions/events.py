@@ -1,11 +1,27 @@
+import copy
+import datetime
 import enum
-from typing import Optional
+import functools
+import uuid
+from decimal import Decimal
+from typing import Any, Optional
 
-from asgiref.sync import async_to_sync
+from asgiref.sync import async_to_sync, sync_to_async
 from channels.layers import get_channel_layer
-from django.db.models import Model
+from django.apps import apps
+from django.db.models import Field, Model, QuerySet
+from django.test.signals import setting_changed
+from django.utils.duration import duration_iso_string
 from django.utils.module_loading import import_string
 
+from graphene_subscriptions.bus import local_bus
+from graphene_subscriptions.replay import replay_log
+from graphene_subscriptions.settings import subscription_settings
+from graphene_subscriptions.topics import GLOBAL_GROUP, Topic
+
+# Version of the encoding of the events in the channel layer messages
+WIRE_FORMAT_VERSION = 1
+
 
 class EventNames(enum.Enum):
     CREATED = 'created'
@@ -14,54 +30,398 @@ class EventNames(enum.Enum):
     CUSTOM_EVENT = 'custom_event'
 
 
+def encode_value(value: Any) -> Any:
+    """Converts the values the msgpack encoder of the channel
+    layers cannot carry to strings that `Field.to_python`
+    converts back"""
+    if isinstance(value, (datetime.date, datetime.time)):
+        return value.isoformat()
+    if isinstance(value, datetime.timedelta):
+        return duration_iso_string(value)
+    if isinstance(value, (Decimal, uuid.UUID)):
+        return str(value)
+    return value
+
+
+@functools.cache
+def get_event_fields(model: type[Model]) -> tuple[Field, ...]:
+    """The fields of a model sent with its events: the primary key and the
+    fields declared for the model in the `EVENT_FIELDS` setting, or all
+    the concrete fields by default. They are kept in the order of the
+    concrete fields of the model"""
+    declared = subscription_settings.EVENT_FIELDS.get(model._meta.label_lower)
+    if declared is None:
+        declared = subscription_settings.EVENT_FIELDS.get(model._meta.label)
+
+    if declared is None:
+        return tuple(model._meta.concrete_fields)
+
+    names = {model._meta.get_field(name).attname for name in declared}
+    return tuple(
+        field for field in model._meta.concrete_fields
+        if field.primary_key or field.attname in names
+    )
+
+
+def get_event_values(instance: Model) -> dict[str, Any]:
+    return {
+        field.attname: encode_value(getattr(instance, field.attname))
+        for field in get_event_fields(type(instance))
+    }
+
+
+def get_event_rows(queryset: QuerySet) -> list[dict[str, Any]]:
+    """Encoded values of the rows of a queryset, fetched
+    with a single query"""
+    attnames = [field.attname for field in get_event_fields(queryset.model)]
+    return [
+        {name: encode_value(value) for name, value in row.items()}
+        for row in queryset.values(*attnames)
+    ]
+
+
+def clear_event_fields(*args, **kwargs):
+    if kwargs['setting'] == 'GRAPHENE_SUBSCRIPTIONS':
+        get_event_fields.cache_clear()
+
+
+setting_changed.connect(clear_event_fields)
+
+
+def get_event_class(key: str) -> type['BaseEvent']:
+    try:
+        return BaseEvent.registry[key]
+    except KeyError:
+        klass = BaseEvent.registry[key] = import_string(key)
+        return klass
+
+
 class BaseEvent:
-    def __init__(self, operation: Optional[str] = None, instance: Optional[Model | str] = None):
+    # Event classes by dotted path, so that decoding a message
+    # does not need to import the class of the event
+    registry: dict[str, type['BaseEvent']] = {}
+
+    def __init__(self, operation: Optional[str] = None, instance: Optional[Model | Any] = None):
         self.operation = operation
-        self.instance: Optional[Model | str] = instance
+        self.instance: Optional[Model | Any] = instance
+        # Assigned when the event is sent and kept by the
+        # events rebuilt from the channel layer message
+        self.id: Optional[str] = None
+        # Position of the event in the replay log, when enabled
+        self.seq: Optional[str] = None
 
-        # if instance is not None and type(instance) == str:
-        #     self.instance = deserialize('json', instance)[0].object
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        BaseEvent.registry[cls.class_key()] = cls
 
-        if not isinstance(self.instance, Model):
-            raise ValueError('BaseEvent instance value must be a Django model')
+    @classmethod
+    def class_key(cls) -> str:
+        return f'{cls.__module__}.{cls.__qualname__}'
+
+    @classmethod
+    def from_dict(cls, values: dict[str, Any]) -> "BaseEvent":
+        version = values.get('v')
+        if version != WIRE_FORMAT_VERSION:
+            raise ValueError(f'Unsupported event wire format version {version}')
+        return get_event_class(values['c']).build_from_dict(values)
 
     @classmethod
-    def from_dict(cls, values: dict[str, str]) -> "BaseEvent":
-        module_name, class_name = values.get('__class__')
-        module = import_string(f"{module_name}.{class_name}")
-        klass = getattr(module, class_name)
-        return cls(operation=values.get('operation'), instance=klass)
+    def build_from_dict(cls, values: dict[str, Any]) -> "BaseEvent":
+        return cls(operation=values.get('o'), instance=values.get('i'))
+
+    def topics(self) -> list[Topic]:
+        return [Topic(self.operation)]
+
+    def group_names(self) -> list[str]:
+        # The global group still reaches the subscriptions
+        # that do not declare their topics
+        return [GLOBAL_GROUP, *(topic.group_name for topic in self.topics())]
+
+    def ensure_id(self) -> str:
+        if self.id is None:
+            self.id = uuid.uuid4().hex
+        return self.id
+
+    def snapshot(self) -> "BaseEvent":
+        """The event handed to the consumers of the process, which
+        later changes to the objects it holds must not affect"""
+        return self
+
+    def capture(self) -> "BaseEvent":
+        """The event to send later, e.g. once the transaction is
+        committed, with the values its objects have now"""
+        return self
+
+    def to_message(self) -> dict[str, Any]:
+        self.ensure_id()
+
+        # Connections in several of the groups of the event receive
+        # it more than once and use the id to drop the duplicates
+        message = {
+            'type': 'signal.fired',
+            'id': self.id,
+            'event': self.to_dict()
+        }
+
+        if self.seq is not None:
+            message['seq'] = int(self.seq)
+
+        if local_bus.enabled:
+            # Consumers of this process already received the event
+            message['origin'] = local_bus.origin
+        return message
+
+    def record(self, message: dict[str, Any]):
+        """Positions the message of the event in the replay log. The
+        backend may block on its cache, so async code calls it from
+        a worker thread"""
+        if self.seq is None and replay_log.backend is not None:
+            replay_log.backend.record(self.topics(), message)
+            self.seq = str(message['seq'])
 
     def send(self):
+        async_to_sync(self.asend)()
+
+    async def asend(self):
         channel_layer = get_channel_layer()
-        if channel_layer is not None:
-            async_to_sync(channel_layer.group_send)(
-                'subscriptions',
-                {
-                    'type': 'signal.fired',
-                    'event': self.to_dict()
-                }
-            )
+        remote = channel_layer is not None and subscription_settings.REMOTE_DELIVERY
+        message = None
+        if remote or replay_log.backend is not None:
+            message = self.to_message()
+            if self.seq is None and replay_log.backend is not None:
+                await sync_to_async(self.record, thread_sensitive=False)(message)
+
+        if local_bus.enabled:
+            self.ensure_id()
+            local_bus.publish([self.snapshot()])
+
+        if remote:
+            for group_name in self.group_names():
+                await channel_layer.group_send(group_name, message)
 
     def to_dict(self):
         return {
-            'operation': self.operation,
-            'instance': self.instance,
-            '__class__': (self.__module__, self.__class__.__name__),
+            'v': WIRE_FORMAT_VERSION,
+            'c': self.class_key(),
+            'o': self.operation,
+            'i': self.instance
         }
 
 
+BaseEvent.registry[BaseEvent.class_key()] = BaseEvent
+
+
 class ModelSubscriptionEvent(BaseEvent):
-    def __init__(self, operation=None, instance=None):
+    """Event on a model instance. Events rebuilt from a channel layer
+    message only hold the encoded values of the instance, which is
+    created the first time `instance` is accessed"""
+
+    def __init__(self, operation=None, instance=None, model: Optional[type[Model]] = None, values: Optional[dict[str, Any]] = None, changed_fields: Optional[list[str]] = None):
+        self._values = values
+        # Attribute names of the fields changed by an update,
+        # None when they are not known
+        self.changed_fields = changed_fields
         super().__init__(operation, instance)
 
-    def to_dict(self):
-        data = super().to_dict()
-        if self.instance is None:
+        if instance is not None:
+            if not isinstance(instance, Model):
+                raise ValueError(
+                    'ModelSubscriptionEvent instance value must be a Django model'
+                )
+            model = type(instance)
+
+        if model is None or (instance is None and values is None):
             raise ValueError(
-                'ModelSubscriptionEvent instance value cannot be None'
+                'ModelSubscriptionEvent requires a Django model instance'
+            )
+        self.model: type[Model] = model
+
+    @property
+    def instance(self) -> Optional[Model]:
+        if self._instance is None and self._values is not None:
+            self._instance = self.build_instance(self.model, self._values)
+        return self._instance
+
+    @instance.setter
+    def instance(self, value: Optional[Model]):
+        self._instance = value
+
+    @property
+    def pk(self) -> Any:
+        if self._instance is not None:
+            return self._instance.pk
+        return self._values.get(self.model._meta.pk.attname)
+
+    def with_operation(self, operation: str, changed_fields: Optional[list[str]] = None) -> "ModelSubscriptionEvent":
+        event = type(self)(
+            operation=operation,
+            instance=self._instance,
+            model=self.model,
+            values=self._values,
+            changed_fields=changed_fields
+        )
+        event.id = self.id
+        # Resumed subscriptions continue after the latest merged event
+        event.seq = self.seq
+        return event
+
+    def snapshot(self) -> "ModelSubscriptionEvent":
+        if self._instance is None:
+            return self
+        # The writer can go on changing the saved instance
+        event = type(self)(
+            operation=self.operation,
+            instance=copy.copy(self._instance),
+            changed_fields=self.changed_fields
+        )
+        event.id = self.id
+        event.seq = self.seq
+        return event
+
+    def capture(self) -> "ModelSubscriptionEvent":
+        if self._instance is None:
+            return self
+        # Deleting an instance resets its primary key once the
+        # enclosing transaction is committed
+        event = type(self)(
+            operation=self.operation,
+            model=self.model,
+            values=get_event_values(self._instance),
+            changed_fields=self.changed_fields
+        )
+        event.id = self.id
+        event.seq = self.seq
+        return event
+
+    def changed(self, fields: set[str]) -> bool:
+        """Whether an update may have changed one of the fields"""
+        if self.operation != EventNames.UPDATED.value or self.changed_fields is None:
+            return True
+        return not fields.isdisjoint(self.changed_fields)
+
+    @staticmethod
+    def build_instance(model: type[Model], values: dict[str, Any]) -> Model:
+        # Fields that were not sent are deferred
+        field_names = []
+        field_values = []
+        for field in model._meta.concrete_fields:
+            if field.attname in values:
+                value = values[field.attname]
+                field_names.append(field.attname)
+                field_values.append(
+                    None if value is None else field.to_python(value)
+                )
+        return model.from_db(None, field_names, field_values)
+
+    @classmethod
+    def build_from_dict(cls, values: dict[str, Any]) -> "ModelSubscriptionEvent":
+        return cls(
+            operation=values.get('o'),
+            model=apps.get_model(values['m']),
+            values=values['f'],
+            changed_fields=values.get('d')
+        )
+
+    def topics(self) -> list[Topic]:
+        options = self.model._meta
+        topics = [Topic(self.operation, options.app_label, options.model_name)]
+
+        pk = self.pk
+        if pk is not None:
+            topics.append(
+                Topic(self.operation, options.app_label, options.model_name, str(pk))
             )
-        data['instance'] = {
-            k: v for k, v in self.instance.__dict__.items() if not k.startswith('_')
+        return topics
+
+    def to_dict(self):
+        if self._instance is None:
+            values = self._values
+        else:
+            values = get_event_values(self._instance)
+
+        values = {
+            'v': WIRE_FORMAT_VERSION,
+            'c': self.class_key(),
+            'o': self.operation,
+            'm': self.model._meta.label_lower,
+            'f': values
+        }
+        if self.changed_fields is not None:
+            values['d'] = self.changed_fields
+        return values
+
+
+class BulkModelSubscriptionEvent(BaseEvent):
+    """Single event for an operation on many instances of a model, e.g.
+    a `bulk_create` or a `QuerySet.update`. Subscriptions receive one
+    `ModelSubscriptionEvent` per instance"""
+
+    def __init__(self, operation: Optional[str] = None, model: Optional[type[Model]] = None, instances: Optional[list[Model]] = None, rows: Optional[list[dict[str, Any]]] = None, changed_fields: Optional[list[str]] = None):
+        super().__init__(operation)
+        self.changed_fields = changed_fields
+        if model is None:
+            raise ValueError('BulkModelSubscriptionEvent requires a Django model')
+        self.model: type[Model] = model
+
+        if rows is None:
+            rows = [get_event_values(instance) for instance in instances or ()]
+        self.rows: list[dict[str, Any]] = rows
+
+    def __len__(self):
+        return len(self.rows)
+
+    @property
+    def pks(self) -> list[Any]:
+        attname = self.model._meta.pk.attname
+        return [row.get(attname) for row in self.rows]
+
+    def events(self) -> list[ModelSubscriptionEvent]:
+        events = []
+        for index, row in enumerate(self.rows):
+            event = ModelSubscriptionEvent(
+                operation=self.operation,
+                model=self.model,
+                values=row,
+                changed_fields=self.changed_fields
+            )
+            if self.id is not None:
+                event.id = f'{self.id}.{index}'
+            if self.seq is not None:
+                event.seq = f'{self.seq}.{index}'
+            events.append(event)
+        return events
+
+    def topics(self) -> list[Topic]:
+        options = self.model._meta
+        topics = [Topic(self.operation, options.app_label, options.model_name)]
+        topics.extend(
+            Topic(self.operation, options.app_label, options.model_name, str(pk))
+            for pk in dict.fromkeys(self.pks)
+            if pk is not None
+        )
+        return topics
+
+    def group_names(self) -> list[str]:
+        # The instances share a bounded number of bucket groups
+        return list(dict.fromkeys(super().group_names()))
+
+    @classmethod
+    def build_from_dict(cls, values: dict[str, Any]) -> "BulkModelSubscriptionEvent":
+        return cls(
+            operation=values.get('o'),
+            model=apps.get_model(values['m']),
+            rows=values['r'],
+            changed_fields=values.get('d')
+        )
+
+    def to_dict(self):
+        values = {
+            'v': WIRE_FORMAT_VERSION,
+            'c': self.class_key(),
+            'o': self.operation,
+            'm': self.model._meta.label_lower,
+            'r': self.rows
         }
-        return data
+        if self.changed_fields is not None:
+            values['d'] = self.changed_fields
+        return values
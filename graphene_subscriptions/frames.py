@@ -0,0 +1,90 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Optional
+
+from graphene_subscriptions.metrics import metrics
+
+
+def build_batch_frame(texts: list[str]) -> str:
+    # The frames are already encoded and are spliced in as is
+    return f'{{"type": "batch", "payload": [{", ".join(texts)}]}}'
+
+
+class FrameBuffer:
+    """Write buffer of the data frames of a connection. A frame sent
+    while the connection is idle goes out right away, the frames
+    following it within `window` seconds are sent together in a
+    `batch` frame once the window ends or `max_frames` are pending"""
+
+    def __init__(self, send: Callable[[dict[str, Any]], Awaitable[None]], window: float, max_frames: int):
+        self.send = send
+        self.window = window
+        self.max_frames = max_frames
+        self.pending: list[str] = []
+        self.last_flush = float('-inf')
+        self._flush_handle: Optional[asyncio.TimerHandle] = None
+        # Flush started once the window ends, cancelled on close
+        self._flush_task: Optional[asyncio.Task] = None
+        self.closed = False
+
+    async def add(self, frame: dict[str, Any]):
+        loop = asyncio.get_running_loop()
+        now = loop.time()
+        if not self.pending and now - self.last_flush >= self.window:
+            self.last_flush = now
+            await self.send(frame)
+            return
+
+        self.pending.append(frame['text'])
+        if len(self.pending) >= self.max_frames:
+            await self.flush()
+        elif self._flush_handle is None:
+            self._flush_handle = loop.call_at(
+                max(now, self.last_flush + self.window),
+                self._start_flush
+            )
+
+    def _start_flush(self):
+        self._flush_handle = None
+        self._flush_task = asyncio.ensure_future(self.flush())
+        self._flush_task.add_done_callback(self._flush_done)
+
+    def _flush_done(self, task: asyncio.Task):
+        if self._flush_task is task:
+            self._flush_task = None
+        if task.cancelled():
+            return
+
+        error = task.exception()
+        # Sends failing once the connection is closed are expected
+        if error is not None and not self.closed:
+            task.get_loop().call_exception_handler({
+                'message': 'Flushing the batched frames failed',
+                'exception': error,
+                'task': task
+            })
+
+    async def flush(self):
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+
+        texts, self.pending = self.pending, []
+        if not texts:
+            return
+
+        self.last_flush = asyncio.get_running_loop().time()
+        if len(texts) == 1:
+            await self.send({'type': 'websocket.send', 'text': texts[0]})
+        else:
+            metrics.inc('graphene_subscriptions_batches_sent_total')
+            await self.send({'type': 'websocket.send', 'text': build_batch_frame(texts)})
+
+    def close(self):
+        self.closed = True
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        if self._flush_task is not None and self._flush_task is not asyncio.current_task():
+            self._flush_task.cancel()
+            self._flush_task = None
+        self.pending.clear()
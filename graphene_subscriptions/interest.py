@@ -0,0 +1,228 @@
+import threading
+import time
+from typing import TYPE_CHECKING, Iterable, Optional
+
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from django.core.cache import caches
+from django.db.models import Model
+from django.test.signals import setting_changed
+from django.utils.module_loading import import_string
+
+from graphene_subscriptions.settings import subscription_settings
+
+if TYPE_CHECKING:
+    from graphene_subscriptions.topics import Topic
+
+# Interest of the subscriptions that do not declare
+# their events, which receive every event
+ANY_INTEREST = '*'
+
+
+def get_interest_key(app_label: str, model_name: str, operation: str) -> str:
+    return f'{app_label}.{model_name}.{operation}'
+
+
+def get_interest_keys(topics: Iterable['Topic']) -> set[str]:
+    """Interest of a subscription listening to the given topics.
+    Only model events are skipped by the publishers, so custom
+    operations are not advertised"""
+    topics = list(topics)
+    if not topics:
+        return {ANY_INTEREST}
+    return {
+        get_interest_key(topic.app_label, topic.model_name, topic.operation)
+        for topic in topics
+        if topic.is_model_topic
+    }
+
+
+class InterestBackend:
+    """Number of subscriptions interested in each key, across
+    every process holding connections"""
+
+    # Seconds the publishers can keep the counts in memory
+    cache_ttl: float = 0
+
+    async def add(self, keys: Iterable[str]):
+        raise NotImplementedError
+
+    async def remove(self, keys: Iterable[str]):
+        raise NotImplementedError
+
+    def get_counts(self, keys: list[str]) -> dict[str, int]:
+        raise NotImplementedError
+
+
+class LocalInterestBackend(InterestBackend):
+    """Counts kept in the memory of the process, for tests and for
+    deployments where connections and writes share a process"""
+
+    def __init__(self):
+        self.counts: dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    async def add(self, keys: Iterable[str]):
+        with self._lock:
+            for key in keys:
+                self.counts[key] = self.counts.get(key, 0) + 1
+
+    async def remove(self, keys: Iterable[str]):
+        with self._lock:
+            for key in keys:
+                count = self.counts.get(key, 0) - 1
+                if count > 0:
+                    self.counts[key] = count
+                else:
+                    self.counts.pop(key, None)
+
+    def get_counts(self, keys: list[str]) -> dict[str, int]:
+        return {key: self.counts.get(key, 0) for key in keys}
+
+
+class ChannelLayerInterestBackend(LocalInterestBackend):
+    """Counts kept in the store of the channel layer: the Redis server of
+    a channels_redis `RedisChannelLayer`, under the prefix of the layer
+    and on the shard of each key. Layers without a store of their own,
+    such as the in memory layer reaching a single process, keep them in
+    the memory of the process"""
+
+    def __init__(self):
+        super().__init__()
+        self.channel_layer = get_channel_layer()
+        self.shared = callable(getattr(self.channel_layer, 'connection', None))
+        if self.shared:
+            self.cache_ttl = subscription_settings.INTEREST_CACHE_TTL
+
+    def _connection(self, key: str):
+        return self.channel_layer.connection(self.channel_layer.consistent_hash(key))
+
+    def _name(self, key: str) -> str:
+        return f'{self.channel_layer.prefix}:interest:{key}'
+
+    async def add(self, keys: Iterable[str]):
+        if not self.shared:
+            return await super().add(keys)
+        for key in keys:
+            await self._connection(key).incr(self._name(key))
+
+    async def remove(self, keys: Iterable[str]):
+        if not self.shared:
+            return await super().remove(keys)
+        for key in keys:
+            await self._connection(key).decr(self._name(key))
+
+    def get_counts(self, keys: list[str]) -> dict[str, int]:
+        if not self.shared:
+            return super().get_counts(keys)
+        return async_to_sync(self._get_counts)(keys)
+
+    async def _get_counts(self, keys: list[str]) -> dict[str, int]:
+        counts = {}
+        for key in keys:
+            value = await self._connection(key).get(self._name(key))
+            counts[key] = max(int(value or 0), 0)
+        return counts
+
+
+class CacheInterestBackend(InterestBackend):
+    """Counts shared through the `INTEREST_CACHE` cache, usually
+    the Redis server of the channel layer. A process stopping
+    without closing its connections leaves its interest behind,
+    which only costs sending events nobody receives"""
+
+    prefix = 'graphene_subscriptions.interest.'
+
+    def __init__(self):
+        self.cache = caches[subscription_settings.INTEREST_CACHE]
+        self.cache_ttl = subscription_settings.INTEREST_CACHE_TTL
+
+    async def add(self, keys: Iterable[str]):
+        for key in keys:
+            await self.cache.aadd(self.prefix + key, 0, timeout=None)
+            await self.cache.aincr(self.prefix + key)
+
+    async def remove(self, keys: Iterable[str]):
+        for key in keys:
+            try:
+                await self.cache.adecr(self.prefix + key)
+            except ValueError:
+                pass
+
+    def get_counts(self, keys: list[str]) -> dict[str, int]:
+        values = self.cache.get_many([self.prefix + key for key in keys])
+        return {key: values.get(self.prefix + key, 0) for key in keys}
+
+
+class InterestRegistry:
+    def __init__(self):
+        self._backend: Optional[InterestBackend] = None
+        self._loaded = False
+        # Counts read from the backend and when they expire
+        self._counts: dict[str, tuple[int, float]] = {}
+
+    @property
+    def backend(self) -> Optional[InterestBackend]:
+        if not self._loaded:
+            path = subscription_settings.INTEREST_BACKEND
+            self._backend = import_string(path)() if path else None
+            self._loaded = True
+        return self._backend
+
+    async def add(self, keys: Iterable[str]):
+        if self.backend is not None and keys:
+            await self.backend.add(keys)
+            # The publishers of this process see the new interest at once,
+            # those of other processes once their counts expire
+            for key in keys:
+                self._counts.pop(key, None)
+
+    async def remove(self, keys: Iterable[str]):
+        if self.backend is not None and keys:
+            await self.backend.remove(keys)
+
+    def _get_counts(self, keys: list[str]) -> dict[str, int]:
+        backend = self.backend
+        if not backend.cache_ttl:
+            return backend.get_counts(keys)
+
+        now = time.monotonic()
+        counts = {}
+        missing = []
+        for key in keys:
+            count, expires = self._counts.get(key, (0, 0))
+            if expires > now:
+                counts[key] = count
+            else:
+                missing.append(key)
+
+        if missing:
+            expires = now + backend.cache_ttl
+            for key, count in backend.get_counts(missing).items():
+                self._counts[key] = (count, expires)
+                counts[key] = count
+        return counts
+
+    def has_interest(self, model: type[Model], operation: str) -> bool:
+        if self.backend is None:
+            return True
+
+        options = model._meta
+        key = get_interest_key(options.app_label, options.model_name, operation)
+        return any(self._get_counts([ANY_INTEREST, key]).values())
+
+    def reset(self):
+        self._backend = None
+        self._loaded = False
+        self._counts.clear()
+
+
+interest_registry = InterestRegistry()
+
+
+def reset_interest_registry(*args, **kwargs):
+    if kwargs['setting'] == 'GRAPHENE_SUBSCRIPTIONS':
+        interest_registry.reset()
+
+
+setting_changed.connect(reset_interest_registry)
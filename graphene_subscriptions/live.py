@@ -0,0 +1,94 @@
+import hashlib
+import json
+from typing import Any, Optional
+
+
+class JsonPatch(str):
+    """JSON encoded RFC 6902 patch from the previous result of a
+    live subscription to the new one"""
+
+
+def escape_pointer(token: Any) -> str:
+    return str(token).replace('~', '~0').replace('/', '~1')
+
+
+def json_patch(previous: Any, current: Any, path: str = '') -> list[dict[str, Any]]:
+    """Operations turning the `previous` JSON value into `current`. Lists
+    are compared item by item, so an item inserted in the middle of a
+    list replaces the items following it"""
+    if type(previous) is not type(current):
+        return [{'op': 'replace', 'path': path, 'value': current}]
+
+    if isinstance(current, dict):
+        operations = []
+        for key, value in previous.items():
+            pointer = f'{path}/{escape_pointer(key)}'
+            if key in current:
+                operations.extend(json_patch(value, current[key], pointer))
+            else:
+                operations.append({'op': 'remove', 'path': pointer})
+        for key, value in current.items():
+            if key not in previous:
+                operations.append({
+                    'op': 'add',
+                    'path': f'{path}/{escape_pointer(key)}',
+                    'value': value
+                })
+        return operations
+
+    if isinstance(current, list):
+        common = min(len(previous), len(current))
+        operations = []
+        for index in range(common):
+            operations.extend(json_patch(previous[index], current[index], f'{path}/{index}'))
+        # Removed from the end so that the indexes stay valid
+        for index in range(len(previous) - 1, common - 1, -1):
+            operations.append({'op': 'remove', 'path': f'{path}/{index}'})
+        for index in range(common, len(current)):
+            operations.append({'op': 'add', 'path': f'{path}/{index}', 'value': current[index]})
+        return operations
+
+    if previous == current:
+        return []
+    return [{'op': 'replace', 'path': path, 'value': current}]
+
+
+class LiveResult:
+    """Last result delivered to a live subscription. Only the digest of
+    the result is kept unless the client accepts patches, in which case
+    the decoded result is kept to compute the next patch"""
+
+    def __init__(self, patch: bool = False):
+        self.patch = patch
+        self.digest: Optional[bytes] = None
+        self.payload: Any = None
+
+    @classmethod
+    def from_payload(cls, payload: dict[str, Any]) -> Optional['LiveResult']:
+        """The live result requested with the `live` or `patch`
+        flag of a `start_subscription` payload, if any"""
+        patch = bool(payload.get('patch'))
+        if payload.get('live') or patch:
+            return cls(patch)
+        return None
+
+    def update(self, text: str) -> Optional[str]:
+        """What to send for a new encoded result: None when it is the same
+        as the previous one, a `JsonPatch` when it is smaller than the
+        result or the result itself"""
+        digest = hashlib.blake2b(text.encode(), digest_size=16).digest()
+        if digest == self.digest:
+            return None
+        self.digest = digest
+
+        if not self.patch:
+            return text
+
+        previous, self.payload = self.payload, json.loads(text)
+        if previous is None:
+            return text
+
+        patch = JsonPatch(json.dumps(json_patch(previous, self.payload)))
+        if len(patch) >= len(text):
+            return text
+        return patch
@@ -0,0 +1,159 @@
+import asyncio
+from collections import OrderedDict
+from contextvars import ContextVar
+from typing import Any, Iterable, Optional
+
+from asgiref.sync import sync_to_async
+from django.db.models import Field, ForeignObjectRel, Model
+
+# Key of the batches: the model, the field looked up and whether
+# every instance matching a value is loaded or only one
+type BatchKey = tuple[type[Model], str, bool]
+
+
+def get_lookup_field(model: type[Model], name: str) -> Field:
+    if name == 'pk':
+        return model._meta.pk
+    return model._meta.get_field(name)
+
+
+class EventLoader:
+    """Batches the database lookups of the executions of the
+    subscriptions for one event. The lookups requested while the
+    executions run are grouped by model and field, fetched with a
+    single query once they all wait, and the instances are shared by
+    every execution for the event
+
+    Resolvers reach the loader of the event they are executed for
+    with `info.context.loader`::
+
+        async def resolve_author(book, info):
+            return await info.context.loader.related(book, 'author')
+    """
+
+    def __init__(self):
+        self.loop = asyncio.get_running_loop()
+        self._results: dict[tuple[BatchKey, Any], asyncio.Future] = {}
+        self._pending: dict[BatchKey, dict[Any, asyncio.Future]] = {}
+        self.queries = 0
+
+    def load(self, model: type[Model], value: Any, field: str = 'pk') -> asyncio.Future:
+        """The instance of `model` whose `field` is `value`, or None"""
+        return self._get((model, field, False), value)
+
+    def load_many(self, model: type[Model], values: Iterable[Any], field: str = 'pk') -> asyncio.Future:
+        return asyncio.gather(*(self.load(model, value, field) for value in values))
+
+    def filter(self, model: type[Model], field: str, value: Any) -> asyncio.Future:
+        """The instances of `model` whose `field` is `value`"""
+        return self._get((model, field, True), value)
+
+    def related(self, instance: Model, name: str) -> asyncio.Future:
+        """The object of a foreign key or one-to-one field of an
+        instance, or the objects of a reverse foreign key"""
+        field = instance._meta.get_field(name)
+        if isinstance(field, ForeignObjectRel):
+            remote_field = field.remote_field
+            value = getattr(instance, remote_field.target_field.attname)
+            if field.one_to_many:
+                return self.filter(field.related_model, remote_field.name, value)
+            return self.load(field.related_model, value, remote_field.name)
+
+        return self.load(
+            field.related_model,
+            getattr(instance, field.attname),
+            field.target_field.name
+        )
+
+    def _get(self, key: BatchKey, value: Any) -> asyncio.Future:
+        # Lookups by pk and by the name of the primary key share a batch
+        model, name, many = key
+        field = get_lookup_field(model, name)
+        key = (model, field.name, many)
+        if value is not None:
+            value = field.to_python(value)
+
+        future = self._results.get((key, value))
+        if future is not None:
+            return future
+
+        future = self._results[(key, value)] = self.loop.create_future()
+        if value is None:
+            future.set_result([] if many else None)
+            return future
+
+        pending = self._pending.get(key)
+        if pending is None:
+            pending = self._pending[key] = {}
+            self.loop.create_task(self._dispatch(key))
+        pending[value] = future
+        return future
+
+    async def _dispatch(self, key: BatchKey):
+        # The executions woken by the event run before the batch is
+        # sent, one more round lets the ones they started add to it
+        await asyncio.sleep(0)
+        futures = self._pending.pop(key)
+        try:
+            instances = await sync_to_async(self._fetch)(key, list(futures))
+        except Exception as error:
+            for future in futures.values():
+                if not future.done():
+                    future.set_exception(error)
+            return
+
+        _, _, many = key
+        for value, future in futures.items():
+            if future.done():
+                continue
+            matches = instances.get(value, [])
+            if many:
+                future.set_result(matches)
+            else:
+                future.set_result(matches[0] if matches else None)
+
+    def _fetch(self, key: BatchKey, values: list[Any]) -> dict[Any, list[Model]]:
+        model, field, _ = key
+        attname = get_lookup_field(model, field).attname
+        self.queries += 1
+
+        instances: dict[Any, list[Model]] = {}
+        for instance in model._default_manager.filter(**{f'{field}__in': values}):
+            instances.setdefault(getattr(instance, attname), []).append(instance)
+        return instances
+
+
+class EventLoaders:
+    """Loaders of the most recent events, so that the executions of
+    every connection of the process share the lookups of an event"""
+
+    def __init__(self, maxsize: int = 1024):
+        self.maxsize = maxsize
+        self._loaders: OrderedDict[str, EventLoader] = OrderedDict()
+
+    def __len__(self):
+        return len(self._loaders)
+
+    def get(self, event_id: Optional[str] = None) -> EventLoader:
+        if event_id is None:
+            return EventLoader()
+
+        loader = self._loaders.get(event_id)
+        if loader is None or loader.loop is not asyncio.get_running_loop():
+            loader = self._loaders[event_id] = EventLoader()
+            while len(self._loaders) > self.maxsize:
+                self._loaders.popitem(last=False)
+        return loader
+
+    def clear(self):
+        self._loaders.clear()
+
+
+event_loaders = EventLoaders()
+
+# Loader of the event being executed
+current_loader: ContextVar[Optional[EventLoader]] = ContextVar('current_loader', default=None)
+
+
+def get_event_loader() -> Optional[EventLoader]:
+    return current_loader.get()
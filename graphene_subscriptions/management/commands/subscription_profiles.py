@@ -0,0 +1,49 @@
+import datetime
+import io
+import os
+import pstats
+
+from django.core.management.base import BaseCommand
+
+from graphene_subscriptions.profiling import clear_reports, read_reports
+
+
+class Command(BaseCommand):
+    help = 'Shows the profiles of the subscription executions recorded by the processes of this host'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--limit', type=int, default=10, help='number of reports shown')
+        parser.add_argument('--slowest', action='store_true', help='show the slowest reports instead of the latest')
+        parser.add_argument('--resolvers', type=int, default=10, help='number of resolvers shown per report')
+        parser.add_argument('--stats', type=int, default=0, help='number of cProfile functions shown per report')
+        parser.add_argument('--directory', help='directory of the reports, PROFILE_DIRECTORY by default')
+        parser.add_argument('--clear', action='store_true', help='delete the reports')
+
+    def handle(self, *args, **options):
+        if options['clear']:
+            clear_reports(options['directory'])
+            return
+
+        reports = read_reports(options['directory'])
+        if options['slowest']:
+            reports.sort(key=lambda report: report['duration'])
+        for report in reports[-options['limit']:]:
+            self.show(report, options['resolvers'], options['stats'])
+
+    def show(self, report, resolvers, stats):
+        timestamp = datetime.datetime.fromtimestamp(report['timestamp']).isoformat(timespec='seconds')
+        self.stdout.write(
+            f"{timestamp} {report['duration'] * 1000:.1f}ms"
+            f" document={report['document']} operation={report['operation']}"
+            f" event={report['event']}{' sampled' if report['sampled'] else ''}"
+        )
+
+        timings = sorted(report['resolvers'], key=lambda timing: -timing[1])
+        for path, duration in timings[:resolvers]:
+            self.stdout.write(f'  {duration * 1000:>9.3f}ms  {path}')
+
+        profile = report['profile']
+        if stats and profile and os.path.exists(profile):
+            output = io.StringIO()
+            pstats.Stats(profile, stream=output).sort_stats('cumulative').print_stats(stats)
+            self.stdout.write(output.getvalue())
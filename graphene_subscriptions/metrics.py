@@ -0,0 +1,232 @@
+import bisect
+import contextlib
+import threading
+import time
+from typing import Any, ContextManager, Optional
+
+from django.test.signals import setting_changed
+from django.utils.module_loading import import_string
+
+from graphene_subscriptions.settings import subscription_settings
+
+LATENCY_BUCKETS = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10
+)
+
+SIZE_BUCKETS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 5000)
+
+# Type, help and histogram buckets of the metrics recorded by the package
+METRICS: dict[str, tuple[str, str, tuple[float, ...]]] = {
+    'graphene_subscriptions_connections': (
+        'gauge', 'Open connections', ()),
+    'graphene_subscriptions_connections_total': (
+        'counter', 'Connections accepted', ()),
+    'graphene_subscriptions_subscriptions': (
+        'gauge', 'Active subscriptions', ()),
+    'graphene_subscriptions_subscriptions_total': (
+        'counter', 'Subscriptions started', ()),
+    'graphene_subscriptions_subscription_cost': (
+        'histogram', 'Estimated cost of the subscriptions started', SIZE_BUCKETS),
+    'graphene_subscriptions_admitted_cost': (
+        'gauge', 'Estimated cost of the active subscriptions', ()),
+    'graphene_subscriptions_subscriptions_rejected_total': (
+        'counter', 'Subscriptions rejected by the cost limits', ()),
+    'graphene_subscriptions_subscribe_seconds': (
+        'histogram', 'Time spent starting a subscription', LATENCY_BUCKETS),
+    'graphene_subscriptions_events_received_total': (
+        'counter', 'Events received from the channel layer', ()),
+    'graphene_subscriptions_events_local_total': (
+        'counter', 'Events received from the local bus of the process', ()),
+    'graphene_subscriptions_events_duplicate_total': (
+        'counter', 'Events received more than once and dropped', ()),
+    'graphene_subscriptions_dispatch_seconds': (
+        'histogram', 'Time spent handing an event to the subscriptions of a connection', LATENCY_BUCKETS),
+    'graphene_subscriptions_dispatch_observers': (
+        'histogram', 'Subscriptions of a connection an event is handed to', SIZE_BUCKETS),
+    'graphene_subscriptions_execution_seconds': (
+        'histogram', 'Time spent executing a subscription for an event', LATENCY_BUCKETS),
+    'graphene_subscriptions_execution_timeouts_total': (
+        'counter', 'Subscription executions that timed out', ()),
+    'graphene_subscriptions_subscription_failures_total': (
+        'counter', 'Subscriptions stopped by an error', ()),
+    'graphene_subscriptions_send_seconds': (
+        'histogram', 'Time spent sending a frame', LATENCY_BUCKETS),
+    'graphene_subscriptions_frames_sent_total': (
+        'counter', 'Data frames sent', ()),
+    'graphene_subscriptions_patches_sent_total': (
+        'counter', 'Patch frames sent to live subscriptions', ()),
+    'graphene_subscriptions_results_unchanged_total': (
+        'counter', 'Results of live subscriptions not sent because they did not change', ()),
+    'graphene_subscriptions_batches_sent_total': (
+        'counter', 'Batch frames sent', ()),
+    'graphene_subscriptions_queue_depth': (
+        'histogram', 'Values pending in a subscription queue when a value is added', SIZE_BUCKETS),
+    'graphene_subscriptions_queue_dropped_total': (
+        'counter', 'Values dropped by full subscription queues', ()),
+    'graphene_subscriptions_queue_disconnected_total': (
+        'counter', 'Connections closed because of a full subscription queue', ()),
+}
+
+
+def format_value(value: float) -> str:
+    # Counters are written in full, the `g` format
+    # would round them to 6 significant digits
+    if isinstance(value, int):
+        return str(value)
+    return repr(float(value))
+
+
+class MetricsSink:
+    """Receives the metrics recorded while they are enabled. Gauges
+    are changed with `inc` and negative values or with `set`"""
+
+    def inc(self, name: str, value: float = 1):
+        pass
+
+    def set(self, name: str, value: float):
+        pass
+
+    def observe(self, name: str, value: float):
+        pass
+
+
+class PrometheusSink(MetricsSink):
+    """Keeps the metrics in memory and renders them in the
+    Prometheus text exposition format"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.values: dict[str, float] = {}
+        # Count of each bucket, sum and count of the histograms
+        self.histograms: dict[str, tuple[list[int], list[float]]] = {}
+
+    def inc(self, name: str, value: float = 1):
+        with self._lock:
+            self.values[name] = self.values.get(name, 0) + value
+
+    def set(self, name: str, value: float):
+        with self._lock:
+            self.values[name] = value
+
+    def observe(self, name: str, value: float):
+        buckets = METRICS.get(name, ('', '', LATENCY_BUCKETS))[2]
+        with self._lock:
+            histogram = self.histograms.get(name)
+            if histogram is None:
+                histogram = self.histograms[name] = ([0] * len(buckets), [0.0, 0])
+            counts, totals = histogram
+            index = bisect.bisect_left(buckets, value)
+            if index < len(counts):
+                counts[index] += 1
+            totals[0] += value
+            totals[1] += 1
+
+    def render(self) -> str:
+        lines = []
+        with self._lock:
+            for name, value in sorted(self.values.items()):
+                kind, help, _ = METRICS.get(name, ('untyped', '', ()))
+                lines.extend([
+                    f'# HELP {name} {help}',
+                    f'# TYPE {name} {kind}',
+                    f'{name} {format_value(value)}'
+                ])
+
+            for name, (counts, (total, count)) in sorted(self.histograms.items()):
+                _, help, buckets = METRICS.get(name, ('', '', LATENCY_BUCKETS))
+                lines.extend([
+                    f'# HELP {name} {help}',
+                    f'# TYPE {name} histogram'
+                ])
+                cumulative = 0
+                for bound, bucket_count in zip(buckets, counts):
+                    cumulative += bucket_count
+                    lines.append(f'{name}_bucket{{le="{format_value(bound)}"}} {cumulative}')
+                lines.extend([
+                    f'{name}_bucket{{le="+Inf"}} {count}',
+                    f'{name}_sum {format_value(total)}',
+                    f'{name}_count {count}'
+                ])
+        return '\n'.join(lines) + '\n'
+
+
+class Timer:
+    def __init__(self, metrics: 'Metrics', name: str):
+        self.metrics = metrics
+        self.name = name
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *args: Any):
+        self.metrics.observe(self.name, time.perf_counter() - self.started)
+
+
+NULL_TIMER = contextlib.nullcontext()
+
+
+class Metrics:
+    """Sends the metrics to the configured sinks. While metrics
+    are disabled there is no sink and recording a metric only
+    loops over an empty list"""
+
+    def __init__(self):
+        self._sinks: Optional[list[MetricsSink]] = None
+
+    @property
+    def sinks(self) -> list[MetricsSink]:
+        if self._sinks is None:
+            if subscription_settings.METRICS_ENABLED:
+                self._sinks = [
+                    import_string(path)()
+                    for path in subscription_settings.METRICS_SINKS
+                ]
+            else:
+                self._sinks = []
+        return self._sinks
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.sinks)
+
+    def get_sink(self, sink_class: type[MetricsSink]) -> Optional[MetricsSink]:
+        for sink in self.sinks:
+            if isinstance(sink, sink_class):
+                return sink
+        return None
+
+    def inc(self, name: str, value: float = 1):
+        for sink in self._sinks if self._sinks is not None else self.sinks:
+            sink.inc(name, value)
+
+    def dec(self, name: str, value: float = 1):
+        for sink in self._sinks if self._sinks is not None else self.sinks:
+            sink.inc(name, -value)
+
+    def set(self, name: str, value: float):
+        for sink in self._sinks if self._sinks is not None else self.sinks:
+            sink.set(name, value)
+
+    def observe(self, name: str, value: float):
+        for sink in self._sinks if self._sinks is not None else self.sinks:
+            sink.observe(name, value)
+
+    def timer(self, name: str) -> ContextManager:
+        if not (self._sinks if self._sinks is not None else self.sinks):
+            return NULL_TIMER
+        return Timer(self, name)
+
+    def reset(self):
+        self._sinks = None
+
+
+metrics = Metrics()
+
+
+def reset_metrics(*args, **kwargs):
+    if kwargs['setting'] == 'GRAPHENE_SUBSCRIPTIONS':
+        metrics.reset()
+
+
+setting_changed.connect(reset_metrics)
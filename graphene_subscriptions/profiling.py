@@ -0,0 +1,189 @@
+import cProfile
+import glob
+import json
+import os
+import random
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Optional
+
+import graphql
+
+from graphene_subscriptions.settings import subscription_settings
+
+
+class ResolverTimings:
+    """Middleware recording the time spent in each resolver. The time
+    of async resolvers runs until their result is awaited"""
+
+    def __init__(self):
+        self.timings: list[tuple[str, float]] = []
+
+    def resolve(self, next, root, info: graphql.GraphQLResolveInfo, **args):
+        start = time.perf_counter()
+        result = next(root, info, **args)
+        if graphql.pyutils.is_awaitable(result):
+            return self._await(result, info, start)
+        self._record(info, start)
+        return result
+
+    async def _await(self, result, info: graphql.GraphQLResolveInfo, start: float):
+        try:
+            return await result
+        finally:
+            self._record(info, start)
+
+    def _record(self, info: graphql.GraphQLResolveInfo, start: float):
+        path = '.'.join(map(str, info.path.as_list()))
+        self.timings.append((path, time.perf_counter() - start))
+
+
+class ExecutionProfile:
+    """Profile of one execution of a subscription, saved once it ends
+    when it was sampled or took longer than the slow threshold"""
+
+    def __init__(self, profiler: 'Profiler', document: Optional[str], operation_name: Optional[str], event_id: Optional[str], sampled: bool, threshold: Optional[float], cprofile: bool):
+        self.profiler = profiler
+        self.document = document
+        self.operation_name = operation_name
+        self.event_id = event_id
+        self.sampled = sampled
+        self.threshold = threshold
+        self.middleware = ResolverTimings()
+        self.stats: Optional[cProfile.Profile] = None
+        if cprofile:
+            self.stats = profiler.acquire_cprofile()
+        self._start = 0.0
+
+    def __enter__(self) -> 'ExecutionProfile':
+        self._start = time.perf_counter()
+        if self.stats is not None:
+            self.stats.enable()
+        return self
+
+    def __exit__(self, *exc_info):
+        duration = time.perf_counter() - self._start
+        if self.stats is not None:
+            self.stats.disable()
+            self.profiler.release_cprofile()
+
+        if self.sampled or (self.threshold is not None and duration >= self.threshold):
+            self.profiler.save({
+                'timestamp': time.time(),
+                'document': self.document,
+                'operation': self.operation_name,
+                'event': self.event_id,
+                'duration': duration,
+                'sampled': self.sampled,
+                'resolvers': self.middleware.timings
+            }, self.stats)
+
+
+class Profiler:
+    """Samples the executions of the subscriptions and writes their
+    reports to a ring of files in `PROFILE_DIRECTORY`, read by the
+    `subscription_profiles` management command. Each process keeps
+    its last `PROFILE_REPORTS` reports. The reports are written by a
+    background thread so that slow executions do not also block the
+    event loop they run on"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._count = 0
+        # Only one cProfile profiler can be enabled at a time
+        self._cprofile_active = False
+        self._writer: Optional[ThreadPoolExecutor] = None
+
+    @staticmethod
+    def get_directory() -> str:
+        return subscription_settings.PROFILE_DIRECTORY or os.path.join(
+            tempfile.gettempdir(),
+            'graphene_subscriptions_profiles'
+        )
+
+    def start(self, document: Optional[str] = None, operation_name: Optional[str] = None, event_id: Optional[str] = None) -> Optional[ExecutionProfile]:
+        """Profile of an execution, None when it is not profiled"""
+        rate = subscription_settings.PROFILE_SAMPLE_RATE
+        threshold = subscription_settings.PROFILE_SLOW_THRESHOLD
+        sampled = bool(rate) and random.random() < rate
+        if not sampled and threshold is None:
+            return None
+
+        return ExecutionProfile(
+            self,
+            document,
+            operation_name,
+            event_id,
+            sampled,
+            threshold,
+            cprofile=sampled and subscription_settings.PROFILE_CPROFILE
+        )
+
+    def acquire_cprofile(self) -> Optional[cProfile.Profile]:
+        with self._lock:
+            if self._cprofile_active:
+                return None
+            self._cprofile_active = True
+        return cProfile.Profile()
+
+    def release_cprofile(self):
+        with self._lock:
+            self._cprofile_active = False
+
+    def save(self, report: dict[str, Any], stats: Optional[cProfile.Profile] = None):
+        with self._lock:
+            slot = self._count % subscription_settings.PROFILE_REPORTS
+            self._count += 1
+            if self._writer is None:
+                self._writer = ThreadPoolExecutor(
+                    max_workers=1,
+                    thread_name_prefix='graphene_subscriptions_profiles'
+                )
+        self._writer.submit(self.write, self.get_directory(), slot, report, stats)
+
+    def flush(self):
+        """Waits for the reports saved so far to be written"""
+        if self._writer is not None:
+            self._writer.submit(lambda: None).result()
+
+    @staticmethod
+    def write(directory: str, slot: int, report: dict[str, Any], stats: Optional[cProfile.Profile] = None):
+        os.makedirs(directory, exist_ok=True)
+        name = os.path.join(directory, f'{os.getpid()}-{slot}')
+
+        report['profile'] = None
+        if stats is not None:
+            stats.dump_stats(f'{name}.prof')
+            report['profile'] = f'{name}.prof'
+        elif os.path.exists(f'{name}.prof'):
+            # Left by the report previously in the slot
+            os.remove(f'{name}.prof')
+
+        with open(f'{name}.tmp', 'w') as output:
+            json.dump(report, output)
+        os.replace(f'{name}.tmp', f'{name}.json')
+
+
+def read_reports(directory: Optional[str] = None) -> list[dict[str, Any]]:
+    """Reports of every process, oldest first"""
+    reports = []
+    for path in glob.glob(os.path.join(directory or Profiler.get_directory(), '*.json')):
+        try:
+            with open(path) as report:
+                reports.append(json.load(report))
+        except (OSError, ValueError):
+            # Replaced while being read
+            continue
+    return sorted(reports, key=lambda report: report['timestamp'])
+
+
+def clear_reports(directory: Optional[str] = None):
+    directory = directory or Profiler.get_directory()
+    for pattern in ('*.json', '*.prof'):
+        for path in glob.glob(os.path.join(directory, pattern)):
+            os.remove(path)
+
+
+profiler = Profiler()
@@ -0,0 +1,248 @@
+from typing import Any, Optional
+
+from asgiref.local import Local
+from asgiref.sync import async_to_sync, sync_to_async
+from channels.layers import get_channel_layer
+from django.db import DEFAULT_DB_ALIAS, transaction
+from django.db.backends.base.base import BaseDatabaseWrapper
+
+from graphene_subscriptions.bus import local_bus
+from graphene_subscriptions.coalescing import model_coalescers
+from graphene_subscriptions.events import BaseEvent
+from graphene_subscriptions.replay import replay_log
+from graphene_subscriptions.settings import subscription_settings
+
+
+class EventBatch:
+    """Events sent together with a single channel layer
+    message for each of the groups they are destined to"""
+
+    def __init__(self, events: Optional[list[BaseEvent]] = None):
+        self.events: list[BaseEvent] = events or []
+
+    def __len__(self):
+        return len(self.events)
+
+    def add(self, event: BaseEvent):
+        self.events.append(event)
+
+    def record(self, messages: list[dict[str, Any]]):
+        for event, message in zip(self.events, messages):
+            event.record(message)
+
+    def group_messages(self, messages: list[dict[str, Any]]) -> dict[str, dict[str, Any]]:
+        groups: dict[str, list[dict[str, Any]]] = {}
+        for event, message in zip(self.events, messages):
+            for group_name in event.group_names():
+                groups.setdefault(group_name, []).append(message)
+
+        messages = {}
+        for group_name, group_events in groups.items():
+            if len(group_events) == 1:
+                messages[group_name] = group_events[0]
+            else:
+                messages[group_name] = {
+                    'type': 'signal.batch',
+                    'events': [
+                        {key: value for key, value in message.items() if key != 'type'}
+                        for message in group_events
+                    ]
+                }
+        return messages
+
+    def send(self):
+        if self.events:
+            async_to_sync(self.asend)()
+
+    async def asend(self):
+        channel_layer = get_channel_layer()
+        remote = channel_layer is not None and subscription_settings.REMOTE_DELIVERY
+        messages = {}
+        if remote or replay_log.backend is not None:
+            event_messages = [event.to_message() for event in self.events]
+            if replay_log.backend is not None:
+                # The backend may block on its cache
+                await sync_to_async(self.record, thread_sensitive=False)(event_messages)
+            messages = self.group_messages(event_messages)
+
+        if local_bus.enabled:
+            for event in self.events:
+                event.ensure_id()
+            local_bus.publish([event.snapshot() for event in self.events])
+
+        if remote:
+            for group_name, message in messages.items():
+                await channel_layer.group_send(group_name, message)
+
+
+class SavepointMarker:
+    """Commit callback registered inside a savepoint, which Django
+    discards if the savepoint is rolled back"""
+
+    __slots__ = ('committed',)
+
+    def __init__(self):
+        self.committed = False
+
+    def __call__(self):
+        self.committed = True
+
+
+class TransactionBuffer:
+    """Events sent inside a transaction, in the order they were sent,
+    with the marker of the savepoint each one was sent in. The buffer
+    is its own commit callback and is kept after the markers so that
+    it only sends the events of the savepoints that were committed"""
+
+    def __init__(self, publisher: 'TransactionPublisher', using: str, key: tuple[str, ...]):
+        self.publisher = publisher
+        self.using = using
+        # The events sent at the level the buffer was registered
+        # at are committed along with the buffer itself
+        self.markers: dict[tuple[str, ...], Optional[SavepointMarker]] = {key: None}
+        self.entries: list[tuple[Optional[SavepointMarker], BaseEvent]] = []
+        self.key = key
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __call__(self):
+        self.publisher.discard_buffer(self.using, self)
+        self.publisher.send_events([
+            event
+            for marker, event in self.entries
+            if marker is None or marker.committed
+        ])
+
+    def add(self, connection: BaseDatabaseWrapper, event: BaseEvent):
+        key = tuple(connection.savepoint_ids)
+        if key != self.key:
+            self._leave_savepoint(connection)
+            self.key = key
+
+        if key not in self.markers:
+            marker = self.markers[key] = SavepointMarker()
+            transaction.on_commit(marker, using=self.using)
+        self.entries.append((self.markers[key], event))
+        move_callback_to_end(connection, self)
+
+    def _leave_savepoint(self, connection: BaseDatabaseWrapper):
+        # The events of rolled back savepoints are dropped as soon
+        # as they are noticed rather than held until the commit
+        marker = self.markers.get(self.key)
+        if marker is None or is_registered(connection, marker):
+            return
+
+        alive = {
+            marker: marker is None or is_registered(connection, marker)
+            for marker in self.markers.values()
+        }
+        self.markers = {key: marker for key, marker in self.markers.items() if alive[marker]}
+        self.entries = [entry for entry in self.entries if alive[entry[0]]]
+
+
+# The savepoint markers and the order of the buffer rely on Django's
+# private `run_on_commit` list, its only record of the commit callbacks
+# that survived the savepoints rolled back so far. Its items are
+# (savepoint ids, callback, robust) tuples since Django 4.2, checked
+# against Django 6.0 and 6.1. Any other layout raises rather than
+# silently sending rolled back events or dropping committed ones
+COMMIT_CALLBACK_LENGTH = 3
+
+
+def get_commit_callback(item: Any) -> Any:
+    if type(item) is not tuple or len(item) != COMMIT_CALLBACK_LENGTH:
+        raise RuntimeError(
+            f'Unsupported layout of the Django commit callbacks: {item!r}'
+        )
+    return item[1]
+
+
+def is_registered(connection: BaseDatabaseWrapper, callback: Any) -> bool:
+    # The callbacks of rolled back savepoints and transactions
+    # are discarded by Django
+    return any(
+        get_commit_callback(item) is callback
+        for item in reversed(connection.run_on_commit)
+    )
+
+
+def move_callback_to_end(connection: BaseDatabaseWrapper, callback: Any):
+    """Moves a commit callback after the ones registered since,
+    keeping the savepoints it was registered in"""
+    callbacks = connection.run_on_commit
+    if get_commit_callback(callbacks[-1]) is callback:
+        return
+    for index in range(len(callbacks) - 2, -1, -1):
+        if get_commit_callback(callbacks[index]) is callback:
+            callbacks.append(callbacks.pop(index))
+            return
+
+
+class TransactionPublisher:
+    """Buffers the events sent inside a transaction and sends them as
+    a batch once it is committed. The events of a transaction or a
+    savepoint that is rolled back are never sent, and the events keep
+    the values their instances had when they were sent"""
+
+    def __init__(self):
+        # Django connections are local to each thread
+        # and each coroutine, so are the buffers
+        self._local = Local()
+
+    def _buffers(self) -> dict[str, TransactionBuffer]:
+        buffers = getattr(self._local, 'buffers', None)
+        if buffers is None:
+            buffers = self._local.buffers = {}
+        return buffers
+
+    def get_buffer(self, using: Optional[str] = None) -> Optional[TransactionBuffer]:
+        using = using or DEFAULT_DB_ALIAS
+        connection = transaction.get_connection(using)
+        if not connection.in_atomic_block:
+            return None
+
+        buffers = self._buffers()
+        buffer = buffers.get(using)
+        # A buffer discarded by Django was rolled back along with
+        # every event sent since it was registered
+        if buffer is None or not is_registered(connection, buffer):
+            buffer = buffers[using] = TransactionBuffer(
+                self,
+                using,
+                tuple(connection.savepoint_ids)
+            )
+            transaction.on_commit(buffer, using=using)
+        return buffer
+
+    def discard_buffer(self, using: str, buffer: TransactionBuffer):
+        buffers = self._buffers()
+        if buffers.get(using) is buffer:
+            del buffers[using]
+
+    def send_events(self, events: list[BaseEvent]):
+        batch = EventBatch()
+        for event in events:
+            coalescer = model_coalescers.get(event, self.send_coalesced_events)
+            if coalescer is None:
+                batch.add(event)
+            else:
+                coalescer.add(event)
+        batch.send()
+
+    @staticmethod
+    def send_coalesced_events(events: list[BaseEvent]):
+        EventBatch(events).send()
+
+    def publish(self, event: BaseEvent, using: Optional[str] = None):
+        buffer = self.get_buffer(using)
+        if buffer is None:
+            self.send_events([event])
+        else:
+            buffer.add(
+                transaction.get_connection(buffer.using),
+                event.capture()
+            )
+
+
+publisher = TransactionPublisher()
@@ -0,0 +1,87 @@
+from django.db import connections, models
+
+from graphene_subscriptions.changes import get_attnames
+from graphene_subscriptions.events import EventNames, get_event_rows
+from graphene_subscriptions.interest import interest_registry
+from graphene_subscriptions.signals import (_publishing_bulk_event,
+                                            bulk_subscription)
+
+
+class SubscriptionQuerySet(models.QuerySet):
+    """QuerySet publishing a single bulk event for `bulk_create`,
+    `bulk_update`, `update` and `delete`, which do not send the
+    `post_save` signal for each of their rows"""
+
+    def _bulk_operation(self, operation, *args, **kwargs):
+        token = _publishing_bulk_event.set(self.model)
+        try:
+            return operation(*args, **kwargs)
+        finally:
+            _publishing_bulk_event.reset(token)
+
+    def bulk_create(self, objs, *args, **kwargs):
+        if _publishing_bulk_event.get() is self.model:
+            return super().bulk_create(objs, *args, **kwargs)
+
+        objs = self._bulk_operation(super().bulk_create, objs, *args, **kwargs)
+        bulk_subscription(self.model, EventNames.CREATED, instances=objs, using=self.db)
+        return objs
+
+    def bulk_update(self, objs, fields, *args, **kwargs):
+        if _publishing_bulk_event.get() is self.model:
+            return super().bulk_update(objs, fields, *args, **kwargs)
+
+        objs = list(objs)
+        updated = self._bulk_operation(super().bulk_update, objs, fields, *args, **kwargs)
+        bulk_subscription(
+            self.model,
+            EventNames.UPDATED,
+            instances=objs,
+            using=self.db,
+            changed_fields=get_attnames(self.model, fields)
+        )
+        return updated
+
+    def update(self, **kwargs):
+        if _publishing_bulk_event.get() is self.model or not interest_registry.has_interest(self.model, EventNames.UPDATED.value):
+            return super().update(**kwargs)
+
+        # The rows are selected by their primary keys afterwards
+        # since the update can change the filtered values
+        pks = list(self.values_list('pk', flat=True))
+        updated = self._bulk_operation(super().update, **kwargs)
+        if pks:
+            # Selected in batches within the limit of query
+            # parameters of the database, e.g. SQLite
+            manager = self.model._base_manager.using(self.db)
+            batch_size = connections[self.db].ops.bulk_batch_size(['pk'], pks) or len(pks)
+            rows = []
+            for start in range(0, len(pks), batch_size):
+                rows.extend(get_event_rows(
+                    manager.filter(pk__in=pks[start:start + batch_size])
+                ))
+            bulk_subscription(
+                self.model,
+                EventNames.UPDATED,
+                rows=rows,
+                using=self.db,
+                changed_fields=get_attnames(self.model, kwargs)
+            )
+        return updated
+
+    update.alters_data = True
+
+    def delete(self):
+        if _publishing_bulk_event.get() is self.model or not interest_registry.has_interest(self.model, EventNames.DELETED.value):
+            return super().delete()
+
+        rows = get_event_rows(self)
+        deleted = self._bulk_operation(super().delete)
+        bulk_subscription(self.model, EventNames.DELETED, rows=rows, using=self.db)
+        return deleted
+
+    delete.alters_data = True
+    delete.queryset_only = True
+
+
+SubscriptionManager = models.Manager.from_queryset(SubscriptionQuerySet)
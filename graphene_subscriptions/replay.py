@@ -0,0 +1,166 @@
+import threading
+import time
+from collections import deque
+from typing import Any, Iterable, Optional
+
+from django.core.cache import caches
+from django.test.signals import setting_changed
+from django.utils.module_loading import import_string
+
+from graphene_subscriptions.settings import subscription_settings
+from graphene_subscriptions.topics import Topic
+
+type Message = dict[str, Any]
+
+
+def parse_event_seq(value: Any) -> Optional[tuple[int, int]]:
+    """Sequence number and index in a bulk event of the last event a
+    client received, e.g. '1712' or '1712.3' for the fourth instance
+    of a bulk event. The index is -1 for the other events"""
+    seq, _, index = str(value).partition('.')
+    try:
+        return int(seq), int(index) if index else -1
+    except ValueError:
+        return None
+
+
+def _topic_key(topic: Topic) -> Topic:
+    return topic._replace(pk=None)
+
+
+class ReplayBackend:
+    """Keeps the recently published events so that a subscription
+    resumed with the sequence number of the last event it received
+    is sent the events it missed"""
+
+    def __init__(self, size: int):
+        self.size = size
+
+    def record(self, topics: list[Topic], message: Message):
+        """Assigns the next sequence number to the message and keeps it"""
+        raise NotImplementedError
+
+    def replay(self, topics: Iterable[Topic], seq: int) -> Optional[list[Message]]:
+        """The messages of the topics from the sequence number `seq`
+        on, in order, or None when some of them are no longer kept"""
+        raise NotImplementedError
+
+
+class LocalReplayBackend(ReplayBackend):
+    """Ring buffers per model and operation in the memory of the process.
+    It only sees the events published by the process, so it is meant for
+    deployments where writes and connections share a process and for
+    tests. Sequence numbers are based on the clock so that they keep
+    increasing across restarts"""
+
+    def __init__(self, size: int):
+        super().__init__(size)
+        self._lock = threading.Lock()
+        self._last_seq = 0
+        self.started = self.next_seq()
+        self._buffers: dict[Topic, deque[Message]] = {}
+        # Last sequence number dropped from each buffer
+        self._evicted: dict[Topic, int] = {}
+
+    def next_seq(self) -> int:
+        with self._lock:
+            self._last_seq = max(self._last_seq + 1, time.time_ns() // 1000)
+            return self._last_seq
+
+    def record(self, topics: list[Topic], message: Message):
+        message['seq'] = self.next_seq()
+        with self._lock:
+            for key in dict.fromkeys(map(_topic_key, topics)):
+                buffer = self._buffers.get(key)
+                if buffer is None:
+                    buffer = self._buffers[key] = deque()
+                if len(buffer) >= self.size:
+                    self._evicted[key] = buffer.popleft()['seq']
+                buffer.append(message)
+
+    def replay(self, topics: Iterable[Topic], seq: int) -> Optional[list[Message]]:
+        if seq <= self.started:
+            return None
+
+        messages: dict[str, Message] = {}
+        with self._lock:
+            for key in dict.fromkeys(map(_topic_key, topics)):
+                if self._evicted.get(key, 0) >= seq:
+                    return None
+                for message in reversed(self._buffers.get(key, ())):
+                    if message['seq'] < seq:
+                        break
+                    messages[message['id']] = message
+        return sorted(messages.values(), key=lambda message: message['seq'])
+
+
+class CacheReplayBackend(ReplayBackend):
+    """Events shared through the `REPLAY_CACHE` cache, usually the Redis
+    server of the channel layer. Sequence numbers come from a counter
+    in the cache and the last `size` events are kept under a key per
+    sequence number, whatever their topic"""
+
+    prefix = 'graphene_subscriptions.replay.'
+
+    def __init__(self, size: int):
+        super().__init__(size)
+        self.cache = caches[subscription_settings.REPLAY_CACHE]
+        self.cache.add(f'{self.prefix}seq', 0, timeout=None)
+
+    def record(self, topics: list[Topic], message: Message):
+        message['seq'] = seq = self.cache.incr(f'{self.prefix}seq')
+        self.cache.set(
+            f'{self.prefix}event.{seq}',
+            {'topics': [tuple(_topic_key(topic)) for topic in topics], 'message': message},
+            timeout=None
+        )
+        self.cache.delete(f'{self.prefix}event.{seq - self.size}')
+
+    def replay(self, topics: Iterable[Topic], seq: int) -> Optional[list[Message]]:
+        last_seq = self.cache.get(f'{self.prefix}seq', 0)
+        if last_seq - seq >= self.size:
+            return None
+
+        keys = {_topic_key(topic) for topic in topics}
+        names = [f'{self.prefix}event.{number}' for number in range(seq, last_seq + 1)]
+        entries = self.cache.get_many(names)
+
+        messages = []
+        for name in names:
+            entry = entries.get(name)
+            if entry is None:
+                # Evicted, or still being recorded by its publisher
+                return None
+            if keys.intersection(Topic(*topic) for topic in entry['topics']):
+                messages.append(entry['message'])
+        return messages
+
+
+class ReplayLog:
+    def __init__(self):
+        self._backend: Optional[ReplayBackend] = None
+        self._loaded = False
+
+    @property
+    def backend(self) -> Optional[ReplayBackend]:
+        if not self._loaded:
+            size = subscription_settings.REPLAY_BUFFER_SIZE
+            if size:
+                self._backend = import_string(subscription_settings.REPLAY_BACKEND)(size)
+            self._loaded = True
+        return self._backend
+
+    def reset(self):
+        self._backend = None
+        self._loaded = False
+
+
+replay_log = ReplayLog()
+
+
+def reset_replay_log(*args, **kwargs):
+    if kwargs['setting'] == 'GRAPHENE_SUBSCRIPTIONS':
+        replay_log.reset()
+
+
+setting_changed.connect(reset_replay_log)
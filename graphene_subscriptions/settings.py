@@ -0,0 +1,134 @@
+"""
+Settings for Graphene Subscriptions are all namespaced in the
+GRAPHENE_SUBSCRIPTIONS setting. For example your project's `settings.py`
+file might look like this:
+
+GRAPHENE_SUBSCRIPTIONS = {
+    'DOCUMENT_CACHE_SIZE': 500,
+    'PERSISTED_QUERIES': True
+}
+"""
+from typing import Any
+
+from django.conf import settings
+from django.test.signals import setting_changed
+
+DEFAULTS: dict[str, Any] = {
+    # Maximum number of parsed and validated documents kept in memory
+    'DOCUMENT_CACHE_SIZE': 1000,
+    # Accept Apollo style persisted queries where clients only
+    # send the sha256 hash of an already registered document
+    'PERSISTED_QUERIES': False,
+    # Maximum number of values waiting to be sent for a single
+    # subscription and what to do with the new values once it
+    # is reached: drop_oldest, drop_newest, keep_latest or disconnect.
+    # keep_latest also replaces the pending value of the same instance
+    # before the queue is full
+    'QUEUE_MAXSIZE': 1000,
+    'QUEUE_OVERFLOW_POLICY': 'drop_oldest',
+    # Number of channel groups the instances of a model are spread
+    # over for the subscriptions listening to a single instance
+    'INSTANCE_GROUP_BUCKETS': 16,
+    # Fields sent with the events of each model, by model label
+    # ('app_label.model_name'). The primary key is always sent and
+    # all the concrete fields are sent for the models not listed
+    'EVENT_FIELDS': {},
+    # Window in seconds during which the events of the instances of
+    # a model are coalesced before being published, by model label
+    'COALESCE_MODELS': {},
+    # Record the metrics of the consumers, and the dotted paths of
+    # the sinks they are sent to
+    'METRICS_ENABLED': False,
+    'METRICS_SINKS': ['graphene_subscriptions.metrics.PrometheusSink'],
+    # Dotted path of the registry of the models and operations the
+    # connections subscribe to, used to skip the events nobody listens
+    # to. None sends every event
+    'INTEREST_BACKEND': None,
+    # Cache used by CacheInterestBackend, and number of seconds the
+    # publishers keep the counts read from CacheInterestBackend or
+    # ChannelLayerInterestBackend. The events of a model published by
+    # another process within that window after it gets its first
+    # subscriber are skipped
+    'INTEREST_CACHE': 'default',
+    'INTEREST_CACHE_TTL': 1.0,
+    # Seconds during which the data frames of a connection that opted
+    # in are sent together in a batch frame after a frame was sent,
+    # and maximum number of frames in a batch. 0 disables batching
+    'FRAME_BATCH_WINDOW': 0,
+    'FRAME_BATCH_SIZE': 50,
+    # Number of recent events kept to resume subscriptions, per model
+    # and operation with LocalReplayBackend or in total with
+    # CacheReplayBackend. 0 disables replay
+    'REPLAY_BUFFER_SIZE': 0,
+    'REPLAY_BACKEND': 'graphene_subscriptions.replay.LocalReplayBackend',
+    'REPLAY_CACHE': 'default',
+    # Maximum number of subscriptions of a connection executed at
+    # once (0 for no limit), seconds given to each execution (None
+    # for no limit) and what to do when it times out: skip the
+    # event, stop the subscription or disconnect
+    'EXECUTION_CONCURRENCY': 16,
+    'EXECUTION_TIMEOUT': None,
+    'EXECUTION_TIMEOUT_POLICY': 'skip',
+    # Weights of the fields by 'TypeName.fieldName' (1 by default) and
+    # number of items assumed for the lists without a size argument
+    # when estimating the cost of a subscription
+    'COST_FIELD_WEIGHTS': {},
+    'COST_LIST_SIZE': 10,
+    # Subscriptions deeper or more costly than these limits, or taking
+    # the cost of the connection or of the process above them, are
+    # rejected. None for no limit
+    'MAX_SUBSCRIPTION_DEPTH': None,
+    'MAX_SUBSCRIPTION_COST': None,
+    'MAX_CONNECTION_COST': None,
+    'MAX_PROCESS_COST': None,
+    # Hand the events sent in a process directly to its own async
+    # consumers, and send them through the channel layer to reach
+    # the other processes. Single process deployments can turn the
+    # channel layer off once local delivery is on
+    'LOCAL_DELIVERY': False,
+    'REMOTE_DELIVERY': True,
+    # Fraction of the executions of the subscriptions profiled, with
+    # cProfile as well when enabled, and seconds above which every
+    # execution is reported. Each process keeps its last reports in
+    # the directory, a temporary directory by default
+    'PROFILE_SAMPLE_RATE': 0,
+    'PROFILE_SLOW_THRESHOLD': None,
+    'PROFILE_CPROFILE': False,
+    'PROFILE_REPORTS': 100,
+    'PROFILE_DIRECTORY': None
+}
+
+
+class SubscriptionSettings:
+    def __init__(self, defaults: dict[str, Any]):
+        self.defaults = defaults
+        self._cached_attrs: set[str] = set()
+
+    @property
+    def user_settings(self) -> dict[str, Any]:
+        return getattr(settings, 'GRAPHENE_SUBSCRIPTIONS', {})
+
+    def __getattr__(self, attr: str):
+        if attr not in self.defaults:
+            raise AttributeError(f"Invalid Graphene Subscriptions setting: '{attr}'")
+
+        value = self.user_settings.get(attr, self.defaults[attr])
+        self._cached_attrs.add(attr)
+        setattr(self, attr, value)
+        return value
+
+    def reload(self):
+        for attr in self._cached_attrs:
+            delattr(self, attr)
+        self._cached_attrs.clear()
+
+
+subscription_settings = SubscriptionSettings(DEFAULTS)
+
+
+def reload_subscription_settings(*args, **kwargs):
+    if kwargs['setting'] == 'GRAPHENE_SUBSCRIPTIONS':
+        subscription_settings.reload()
+
+
+setting_changed.connect(reload_subscription_settings)
@@ -0,0 +1,79 @@
+import asyncio
+import json
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Optional
+
+import graphql
+
+from graphene_subscriptions.cache import CachedDocument
+
+type ShareKey = tuple[str, Optional[str], str]
+
+
+def context_independent(resolver: Callable[..., Any]) -> Callable[..., Any]:
+    """Marks a subscription field resolver whose results do not depend on
+    `info.context`. Identical subscriptions on such a field (same document,
+    operation and variables) are executed once per event and their encoded
+    payload is shared by every connection holding them"""
+    resolver.context_independent = True
+    return resolver
+
+
+def get_share_key(schema: graphql.GraphQLSchema, document: CachedDocument, operation: graphql.OperationDefinitionNode, variables: Optional[dict[str, Any]] = None) -> Optional[ShareKey]:
+    subscription_type = schema.subscription_type
+    if subscription_type is None:
+        return None
+
+    for selection in operation.selection_set.selections:
+        if not isinstance(selection, graphql.FieldNode):
+            return None
+
+        field_def = subscription_type.fields.get(selection.name.value)
+        if field_def is None or not getattr(field_def.resolve, 'context_independent', False):
+            return None
+
+    operation_name = operation.name.value if operation.name else None
+    return (
+        document.key,
+        operation_name,
+        json.dumps(variables or {}, sort_keys=True, default=str)
+    )
+
+
+class SharedExecutions:
+    """Encoded results of the executions of shared subscriptions for the
+    most recent events. The first subscription reaching an event starts
+    the execution, the others await the same task"""
+
+    def __init__(self, maxsize: int = 1024):
+        self.maxsize = maxsize
+        self._executions: OrderedDict[tuple[str, ShareKey], asyncio.Task] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self._executions)
+
+    async def get_or_execute(self, event_id: str, share_key: ShareKey, execute: Callable[[], Awaitable[str]]) -> str:
+        key = (event_id, share_key)
+        task = self._executions.get(key)
+
+        if task is None or task.get_loop() is not asyncio.get_running_loop():
+            self.misses += 1
+            # The execution runs in its own task so that stopping the
+            # subscription which started it does not cancel it for the others
+            task = asyncio.ensure_future(execute())
+            self._executions[key] = task
+            while len(self._executions) > self.maxsize:
+                self._executions.popitem(last=False)
+        else:
+            self.hits += 1
+        return await asyncio.shield(task)
+
+    def clear(self):
+        self._executions.clear()
+        self.hits = 0
+        self.misses = 0
+
+
+shared_executions = SharedExecutions()
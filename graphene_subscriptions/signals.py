@@ -1,19 +1,77 @@
-from graphene_subscriptions.events import EventNames, ModelSubscriptionEvent
+from contextvars import ContextVar
+from typing import Optional
+
+from django.db import models
+
+from graphene_subscriptions.changes import (SNAPSHOT_ATTR, get_changed_fields,
+                                            take_snapshot)
+from graphene_subscriptions.events import (BulkModelSubscriptionEvent,
+                                           EventNames, ModelSubscriptionEvent)
+from graphene_subscriptions.interest import interest_registry
+from graphene_subscriptions.publisher import publisher
+
+# Model of the bulk operation running the queries it is built on,
+# whose signals for that model must not publish events of their own,
+# e.g. the post_delete sent for each row of a `QuerySet.delete`. The
+# rows of other models, e.g. deleted by cascade, still publish theirs
+_publishing_bulk_event: ContextVar[Optional[type[models.Model]]] = ContextVar(
+    '_publishing_bulk_event',
+    default=None
+)
 
 
 def post_save_subscription(sender, instance, created, **kwargs):
+    if _publishing_bulk_event.get() is sender:
+        return
+
+    changed_fields = None
+    if not created:
+        changed_fields = get_changed_fields(instance, kwargs.get('update_fields'))
+    if hasattr(instance, SNAPSHOT_ATTR):
+        take_snapshot(instance)
+
+    if changed_fields == []:
+        # Saved without changing anything
+        return
+
+    operation = EventNames.CREATED.value if created else EventNames.UPDATED.value
+    if not interest_registry.has_interest(sender, operation):
+        return
+
     event = ModelSubscriptionEvent(
-        operation=EventNames.CREATED.value if created else EventNames.UPDATED.value,
-        instance=instance
+        operation=operation,
+        instance=instance,
+        changed_fields=changed_fields
     )
-
-    event.send()
+    publisher.publish(event, using=kwargs.get('using'))
 
 
 def post_delete_subscription(sender, instance, **kwargs):
+    if _publishing_bulk_event.get() is sender:
+        return
+
+    if not interest_registry.has_interest(sender, EventNames.DELETED.value):
+        return
+
     event = ModelSubscriptionEvent(
         operation=EventNames.DELETED.value, instance=instance
     )
-    event.send()
-    event.send()
-    event.send()
+    publisher.publish(event, using=kwargs.get('using'))
+
+
+def bulk_subscription(model, operation, instances=None, rows=None, using=None, changed_fields=None):
+    """Publishes a single event for an operation on many instances,
+    skipped when there is no instance"""
+    operation = getattr(operation, 'value', operation)
+    if not interest_registry.has_interest(model, operation):
+        return
+
+    event = BulkModelSubscriptionEvent(
+        operation=operation,
+        model=model,
+        instances=instances,
+        rows=rows,
+        changed_fields=changed_fields
+    )
+    if len(event):
+        publisher.publish(event, using=using)
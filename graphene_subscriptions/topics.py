@@ -0,0 +1,71 @@
+import hashlib
+import re
+import zlib
+from typing import TYPE_CHECKING, Any, NamedTuple, Optional
+
+from graphene_subscriptions.settings import subscription_settings
+
+if TYPE_CHECKING:
+    from graphene_subscriptions.events import BaseEvent
+
+# Group joined by the connections holding subscriptions
+# that did not declare the events they listen to
+GLOBAL_GROUP = 'subscriptions'
+
+VALID_GROUP_NAME = re.compile(r'^[a-zA-Z\d\-_.]+$')
+
+
+def get_instance_bucket(pk: str) -> int:
+    # Stable across processes unlike the builtin hash
+    return zlib.crc32(pk.encode('utf-8')) % subscription_settings.INSTANCE_GROUP_BUCKETS
+
+
+def build_group_name(*parts: Any) -> str:
+    name = '.'.join([GLOBAL_GROUP, *map(str, parts)])
+    if len(name) >= 100 or VALID_GROUP_NAME.match(name) is None:
+        # Channel layers only accept short ASCII group names
+        digest = hashlib.sha1(name.encode('utf-8')).hexdigest()
+        return f'{GLOBAL_GROUP}.hash.{digest}'
+    return name
+
+
+class Topic(NamedTuple):
+    """The events a subscription listens to: a custom operation or
+    the operation on a model, optionally restricted to one instance"""
+
+    operation: str
+    app_label: Optional[str] = None
+    model_name: Optional[str] = None
+    pk: Optional[str] = None
+
+    @property
+    def is_model_topic(self) -> bool:
+        return self.model_name is not None
+
+    @property
+    def group_name(self) -> str:
+        if not self.is_model_topic:
+            return build_group_name('event', self.operation)
+
+        parts = ['model', self.app_label, self.model_name, self.operation]
+        if self.pk is not None:
+            # Instances share a fixed number of groups so that a write
+            # touching many rows is sent to a bounded number of groups
+            parts.append(f'bucket-{get_instance_bucket(self.pk)}')
+        return build_group_name(*parts)
+
+    def matches(self, event: 'BaseEvent') -> bool:
+        if event.operation != self.operation:
+            return False
+
+        if not self.is_model_topic:
+            return True
+
+        model = getattr(event, 'model', None)
+        if model is None:
+            return False
+
+        options = model._meta
+        if options.app_label != self.app_label or options.model_name != self.model_name:
+            return False
+        return self.pk is None or str(event.pk) == self.pk
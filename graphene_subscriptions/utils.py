@@ -1,9 +1,14 @@
 import asyncio
 import enum
-from typing import Any, AsyncIterable
+from collections import deque
+from typing import (Any, AsyncIterable, Awaitable, Callable, Hashable,
+                    NamedTuple, Optional)
 
 from reactivex import Observable
 
+from graphene_subscriptions.metrics import metrics
+from graphene_subscriptions.settings import subscription_settings
+
 
 class WsOperationTypes(enum.Enum):
     INITIAL_CONNECTION = "initial_connection"
@@ -12,32 +17,340 @@ class WsOperationTypes(enum.Enum):
     SUBSCRIBE = "subscribe"
 
 
-async def observable_to_async_iterable(observable: Observable) -> AsyncIterable:
-    queue = asyncio.Queue()
-    DONE = object()  # sentinel
+class SourceEvent(NamedTuple):
+    """Value emitted by a subscription along with the id
+    of the event that produced it"""
+
+    value: Any
+    event_id: Optional[str]
+    seq: Optional[str] = None
+
+
+class OverflowPolicies(enum.Enum):
+    DROP_OLDEST = 'drop_oldest'
+    DROP_NEWEST = 'drop_newest'
+    KEEP_LATEST = 'keep_latest'
+    DISCONNECT = 'disconnect'
+
+
+class SubscriptionOverflow(Exception):
+    """Raised to the consumer iterating a subscription whose
+    queue overflowed with the disconnect policy"""
+
+
+class QueueStats:
+    def __init__(self):
+        self.dropped = 0
+        self.disconnected = 0
+
+    def reset(self):
+        self.dropped = 0
+        self.disconnected = 0
+
+
+queue_stats = QueueStats()
+
+
+def default_queue_key(item: Any) -> Optional[Hashable]:
+    value = item.value if isinstance(item, SourceEvent) else item
+    options = getattr(value, '_meta', None)
+    if options is None:
+        return None
+    return (options.label_lower, value.pk)
+
+
+class SubscriptionQueue:
+    """Queue of the values waiting to be executed and sent for one
+    subscription. Once `maxsize` values are pending, new values are
+    handled according to the overflow policy:
+
+    * `drop_oldest`: the oldest pending value is dropped
+    * `drop_newest`: the new value is dropped
+    * `keep_latest`: the oldest pending value is dropped. Unlike the
+      other policies, it also applies before the queue is full: a
+      pending value with the same key (by default the model and primary
+      key of the instance) is replaced by the new one at any depth, and
+      counted as dropped
+    * `disconnect`: the consumer is told to close the slow connection
+
+    The storage of the pending values is only allocated while there is a
+    backlog, so that idle subscriptions stay small
+    """
 
-    def on_next(value):
-        queue.put_nowait(value)
+    __slots__ = ('maxsize', 'policy', 'key', 'dropped', 'overflowed', '_items', '_keys', '_getter')
 
-    def on_error(error):
-        queue.put_nowait(error)
+    def __init__(self, maxsize: Optional[int] = None, policy: OverflowPolicies | str = OverflowPolicies.DROP_OLDEST, key: Callable[[Any], Optional[Hashable]] = default_queue_key):
+        self.maxsize = maxsize
+        self.policy = OverflowPolicies(policy)
+        self.key = key
+        self.dropped = 0
+        self.overflowed = False
+        # Pending values are held in single item lists so that
+        # keep_latest can replace them in place
+        self._items: Optional[deque[list[Any]]] = None
+        self._keys: Optional[dict[Hashable, list[Any]]] = None
+        self._getter: Optional[asyncio.Future] = None
+
+    def __len__(self):
+        return 0 if self._items is None else len(self._items)
+
+    @classmethod
+    def from_settings(cls, maxsize: Optional[int] = None, policy: Optional[OverflowPolicies | str] = None) -> 'SubscriptionQueue':
+        return cls(
+            maxsize=subscription_settings.QUEUE_MAXSIZE if maxsize is None else maxsize,
+            policy=policy or subscription_settings.QUEUE_OVERFLOW_POLICY
+        )
+
+    def _drop(self, count: int = 1):
+        self.dropped += count
+        queue_stats.dropped += count
+        metrics.inc('graphene_subscriptions_queue_dropped_total', count)
+
+    def _wakeup(self):
+        if self._getter is not None and not self._getter.done():
+            self._getter.set_result(None)
+
+    def _append(self, holder: list[Any]):
+        if self._items is None:
+            self._items = deque()
+        self._items.append(holder)
+
+    def _popleft(self) -> Any:
+        holder = self._items.popleft()
+        if not self._items:
+            self._items = self._keys = None
+        elif self._keys:
+            key = self.key(holder[0])
+            if key is not None and self._keys.get(key) is holder:
+                del self._keys[key]
+        return holder[0]
+
+    def put_nowait(self, item: Any, control: bool = False):
+        if control or not self.maxsize:
+            self._append([item])
+            self._wakeup()
+            return
+
+        metrics.observe('graphene_subscriptions_queue_depth', len(self))
+        key = None
+        if self.policy is OverflowPolicies.KEEP_LATEST:
+            key = self.key(item)
+            holder = self._keys.get(key) if key is not None and self._keys else None
+            if holder is not None:
+                holder[0] = item
+                self._drop()
+                return
+
+        if len(self) >= self.maxsize:
+            match self.policy:
+                case OverflowPolicies.DROP_NEWEST:
+                    self._drop()
+                    return
+                case OverflowPolicies.DISCONNECT:
+                    if not self.overflowed:
+                        self.overflowed = True
+                        queue_stats.disconnected += 1
+                        metrics.inc('graphene_subscriptions_queue_disconnected_total')
+                    self._wakeup()
+                    return
+                case _:
+                    self._popleft()
+                    self._drop()
+
+        holder = [item]
+        self._append(holder)
+        if key is not None:
+            if self._keys is None:
+                self._keys = {}
+            self._keys[key] = holder
+        self._wakeup()
+
+    async def get(self) -> Any:
+        while not self._items and not self.overflowed:
+            self._getter = asyncio.get_running_loop().create_future()
+            try:
+                await self._getter
+            finally:
+                self._getter = None
+
+        if self.overflowed:
+            raise SubscriptionOverflow()
+        return self._popleft()
+
+
+class ObservableAsyncIterator:
+    """Async iterator over the values emitted by an observable. The
+    observable is subscribed right away so that the values emitted
+    before the iteration starts are kept in the queue, and the
+    subscription is disposed once the iterator is closed"""
+
+    DONE = object()  # sentinel
 
-    def on_completed():
-        queue.put_nowait(DONE)
+    __slots__ = ('queue', 'get_event_id', 'get_event_seq', 'loop', 'closed', 'subscription')
 
-    observable.subscribe(
-        on_next=on_next,
-        on_error=on_error,
-        on_completed=on_completed,
-    )
+    def __init__(self, observable: Observable, get_event_id: Optional[Callable[[], Optional[str]]] = None, queue: Optional[SubscriptionQueue] = None, get_event_seq: Optional[Callable[[], Optional[str]]] = None):
+        self.queue = SubscriptionQueue() if queue is None else queue
+        self.get_event_id = get_event_id
+        self.get_event_seq = get_event_seq
+        self.loop = asyncio.get_running_loop()
+        self.closed = False
+        self.subscription = observable.subscribe(
+            on_next=self.on_next,
+            on_error=self.on_error,
+            on_completed=self.on_completed,
+        )
 
-    while True:
-        item = await queue.get()
-        if item is DONE:
+    def put(self, value: Any, control: bool = False):
+        if self.closed:
             return
+
+        # Observers can be called from the worker thread
+        # of a sync consumer
+        try:
+            running_loop = asyncio.get_running_loop()
+        except RuntimeError:
+            running_loop = None
+
+        if running_loop is self.loop:
+            self.queue.put_nowait(value, control)
+        elif not self.loop.is_closed():
+            self.loop.call_soon_threadsafe(self.queue.put_nowait, value, control)
+
+    def on_next(self, value: Any):
+        if self.get_event_id is None:
+            self.put(value)
+        else:
+            self.put(SourceEvent(
+                value,
+                self.get_event_id(),
+                None if self.get_event_seq is None else self.get_event_seq()
+            ))
+
+    def on_error(self, error: Exception):
+        self.put(error, control=True)
+
+    def on_completed(self):
+        self.put(self.DONE, control=True)
+
+    def dispose(self):
+        if not self.closed:
+            self.closed = True
+            self.subscription.dispose()
+
+    def __aiter__(self) -> 'ObservableAsyncIterator':
+        return self
+
+    async def __anext__(self) -> Any:
+        if self.closed:
+            raise StopAsyncIteration
+
+        item = await self.queue.get()
+        if item is self.DONE:
+            self.dispose()
+            raise StopAsyncIteration
         if isinstance(item, Exception):
+            self.dispose()
             raise item
-        yield item
+        return item
+
+    async def aclose(self):
+        self.dispose()
+
+
+class MappedAsyncIterator:
+    """Async iterator over the results of an async callback for each value
+    of another async iterator. Unlike `graphql.MapAsyncIterator`, waiting
+    for the next value does not keep extra tasks and events alive, so
+    idle subscriptions only hold the task iterating them"""
+
+    __slots__ = ('iterator', 'callback')
+
+    def __init__(self, iterable: AsyncIterable, callback: Callable[[Any], Awaitable[Any]]):
+        self.iterator = iterable.__aiter__()
+        self.callback = callback
+
+    def __aiter__(self) -> 'MappedAsyncIterator':
+        return self
+
+    async def __anext__(self) -> Any:
+        return await self.callback(await self.iterator.__anext__())
+
+    async def aclose(self):
+        aclose = getattr(self.iterator, 'aclose', None)
+        if aclose is not None:
+            await aclose()
+
+
+def observable_to_async_iterable(observable: Observable, get_event_id: Optional[Callable[[], Optional[str]]] = None, queue: Optional[SubscriptionQueue] = None, get_event_seq: Optional[Callable[[], Optional[str]]] = None) -> ObservableAsyncIterator:
+    return ObservableAsyncIterator(observable, get_event_id, queue, get_event_seq)
+
+
+def subscription_queue(maxsize: Optional[int] = None, policy: Optional[OverflowPolicies | str] = None) -> Callable[[Callable[..., Any]], Callable[..., Any]]:
+    """Overrides the maximum depth and the overflow policy of the queues
+    of the subscriptions on the decorated resolver, `maxsize=0` for
+    unbounded queues"""
+    def decorator(resolver: Callable[..., Any]) -> Callable[..., Any]:
+        resolver.queue_options = {'maxsize': maxsize, 'policy': policy}
+        return resolver
+    return decorator
+
+
+class TimeoutPolicies(enum.Enum):
+    SKIP = 'skip'
+    STOP = 'stop'
+    DISCONNECT = 'disconnect'
+
+
+class SubscriptionTimeout(Exception):
+    """Raised to the consumer iterating a subscription whose execution
+    timed out with the stop or disconnect policy"""
+
+    def __init__(self, policy: TimeoutPolicies):
+        super().__init__('Subscription execution timed out')
+        self.policy = policy
+
+
+class ExecutionScheduler:
+    """Runs the executions of the subscriptions of a connection, at most
+    `concurrency` of them at once and each one within `timeout` seconds.
+    An execution that times out is skipped, or raises `SubscriptionTimeout`
+    so that the subscription or the connection is closed.
+
+    Only the resolvers awaiting can be interrupted, a synchronous resolver
+    holds the event loop until it returns"""
+
+    def __init__(self, concurrency: Optional[int] = None, timeout: Optional[float] = None, policy: TimeoutPolicies | str = TimeoutPolicies.SKIP):
+        self.semaphore = asyncio.Semaphore(concurrency) if concurrency else None
+        self.timeout = timeout
+        self.policy = TimeoutPolicies(policy)
+        self.timeouts = 0
+
+    @classmethod
+    def from_settings(cls) -> 'ExecutionScheduler':
+        return cls(
+            concurrency=subscription_settings.EXECUTION_CONCURRENCY,
+            timeout=subscription_settings.EXECUTION_TIMEOUT,
+            policy=subscription_settings.EXECUTION_TIMEOUT_POLICY
+        )
+
+    async def run(self, execute: Callable[[], Awaitable[Any]]) -> Any:
+        if self.semaphore is None:
+            return await self._run(execute)
+        async with self.semaphore:
+            return await self._run(execute)
+
+    async def _run(self, execute: Callable[[], Awaitable[Any]]) -> Any:
+        if self.timeout is None:
+            return await execute()
+
+        try:
+            return await asyncio.wait_for(execute(), self.timeout)
+        except TimeoutError:
+            self.timeouts += 1
+            metrics.inc('graphene_subscriptions_execution_timeouts_total')
+            if self.policy is TimeoutPolicies.SKIP:
+                return None
+            raise SubscriptionTimeout(self.policy)
 
 
 async def value_to_async_iterable(value: Any) -> AsyncIterable:
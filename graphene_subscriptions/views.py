@@ -0,0 +1,15 @@
+from django.http import HttpRequest, HttpResponse
+
+from graphene_subscriptions.metrics import PrometheusSink, metrics
+
+
+def prometheus_metrics(request: HttpRequest) -> HttpResponse:
+    """Metrics of the process in the Prometheus text format"""
+    sink = metrics.get_sink(PrometheusSink)
+    if sink is None:
+        return HttpResponse('Metrics are disabled', status=404, content_type='text/plain')
+
+    return HttpResponse(
+        sink.render(),
+        content_type='text/plain; version=0.0.4; charset=utf-8'
+    )
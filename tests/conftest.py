@@ -0,0 +1,16 @@
+import pytest
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+
+from graphene_subscriptions.topics import GLOBAL_GROUP
+from tests.utils import ChannelListener
+
+
+@pytest.fixture
+def listener():
+    """Listener of the events published to the global group"""
+    channel_layer = get_channel_layer()
+    channel_name = async_to_sync(channel_layer.new_channel)()
+    async_to_sync(channel_layer.group_add)(GLOBAL_GROUP, channel_name)
+    yield ChannelListener(channel_layer, channel_name)
+    async_to_sync(channel_layer.group_discard)(GLOBAL_GROUP, channel_name)
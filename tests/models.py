@@ -1,5 +1,26 @@
 from django.db import models
 
+from graphene_subscriptions.querysets import SubscriptionManager
+
 
 class TestModel(models.Model):
     name = models.CharField(max_length=50)
+
+
+class TestValuesModel(models.Model):
+    name = models.CharField(max_length=50)
+    description = models.TextField(blank=True)
+    price = models.DecimalField(max_digits=10, decimal_places=2, null=True)
+    metadata = models.JSONField(null=True)
+    created_on = models.DateTimeField(null=True)
+
+
+class TestBulkModel(models.Model):
+    name = models.CharField(max_length=50)
+
+    objects = SubscriptionManager()
+
+
+class TestRelatedModel(models.Model):
+    parent = models.ForeignKey(TestModel, on_delete=models.CASCADE, related_name='children')
+    name = models.CharField(max_length=50)
@@ -1,31 +1,39 @@
+import asyncio
+
 import graphene
 from graphene_django.types import DjangoObjectType
 from reactivex import Subject, operators
 
+from graphene_subscriptions.changes import get_selected_fields
 from graphene_subscriptions.events import EventNames
-from tests.models import TestModel
+from graphene_subscriptions.sharing import context_independent
+from tests.models import TestModel, TestRelatedModel
+
+
+class TestRelatedModelType(DjangoObjectType):
+    class Meta:
+        model = TestRelatedModel
+        fields = ['id', 'name']
 
 
 class TestModelType(DjangoObjectType):
+    children = graphene.List(TestRelatedModelType)
+
     class Meta:
         model = TestModel
         fields = ['id', 'name']
 
+    async def resolve_children(root, info):
+        return await info.context.loader.related(root, 'children')
+
 
 class TestModelCreateSubscription(graphene.ObjectType):
     test_model_created = graphene.Field(TestModelType)
 
-    def resolve_test_model_created(root: Subject, info):
-        return root.pipe(
-            operators.filter(
-                lambda event: (
-                    event.operation == EventNames.CREATED.value
-                    and isinstance(event.instance, TestModel)
-                )
-            ),
-            operators.map(
-                lambda event: event.instance
-            )
+    @context_independent
+    def resolve_test_model_created(root, info):
+        return root.model_events(TestModel, [EventNames.CREATED]).pipe(
+            operators.map(lambda event: event.instance)
         )
 
 
@@ -33,23 +41,60 @@ class TestModelDeletedSubscription(graphene.ObjectType):
     test_model_deleted = graphene.Field(TestModelType, id=graphene.ID())
 
     def resolve_test_model_deleted(root, info, id):
-        return root.filter(
-            lambda event: event.operation == EventNames.DELETED.value
-            and isinstance(event.instance, TestModel)
-            and event.instance.pk == int(id)
-        ).map(lambda event: event.instance)
+        return root.model_events(TestModel, [EventNames.DELETED], pk=id).pipe(
+            operators.map(lambda event: event.instance)
+        )
+
+
+class TestModelUpdatedSubscription(graphene.ObjectType):
+    test_model_updated = graphene.Field(TestModelType)
+
+    def resolve_test_model_updated(root, info):
+        return root.model_events(
+            TestModel,
+            [EventNames.UPDATED],
+            fields=get_selected_fields(info, TestModel)
+        ).pipe(
+            operators.map(lambda event: event.instance)
+        )
+
+
+class TestModelNameSubscription(graphene.ObjectType):
+    test_model_name_delayed = graphene.String()
+    test_model_name_checked = graphene.String()
+
+    def resolve_test_model_name_delayed(root, info):
+        # Resolved after as many seconds as the name says
+        return root.model_events(TestModel, [EventNames.CREATED]).pipe(
+            operators.map(
+                lambda event: asyncio.sleep(float(event.instance.name), event.instance.name)
+            )
+        )
+
+    def resolve_test_model_name_checked(root, info):
+        def check(event):
+            if event.instance.name == 'invalid':
+                raise ValueError('Invalid name')
+            return event.instance.name
+
+        return root.model_events(TestModel, [EventNames.CREATED]).pipe(
+            operators.map(check)
+        )
 
 
 class CustomEventSubscription(graphene.ObjectType):
     test_model_subscription = graphene.String()
 
-    def resolve_test_model_subscription(root, info):
-        return root.filter(
-            lambda event: event.operation == EventNames.CUSTOM_EVENT.value
-        ).map(lambda event: event.instance)
+    def resolve_test_model_subscription(root: Subject, info):
+        return root.pipe(
+            operators.filter(
+                lambda event: event.operation == EventNames.CUSTOM_EVENT.value
+            ),
+            operators.map(lambda event: event.instance)
+        )
 
 
-class Subscription(TestModelCreateSubscription, TestModelDeletedSubscription, CustomEventSubscription):
+class Subscription(TestModelCreateSubscription, TestModelDeletedSubscription, TestModelUpdatedSubscription, TestModelNameSubscription, CustomEventSubscription):
     hello = graphene.String()
 
     def resolve_hello(root, info):
@@ -0,0 +1,126 @@
+import pytest
+from django.db import connection
+from django.db.models.signals import post_delete, post_save
+
+from graphene_subscriptions.consumers import EventStream
+from graphene_subscriptions.events import (BaseEvent,
+                                           BulkModelSubscriptionEvent,
+                                           EventNames)
+from graphene_subscriptions.querysets import SubscriptionQuerySet
+from graphene_subscriptions.signals import (post_delete_subscription,
+                                            post_save_subscription)
+from tests.models import TestBulkModel, TestModel, TestRelatedModel
+
+
+@pytest.mark.django_db
+def test_bulk_operations_publish_one_event(listener, django_capture_on_commit_callbacks):
+    with django_capture_on_commit_callbacks(execute=True):
+        TestBulkModel.objects.bulk_create(
+            TestBulkModel(name=f'item {i}') for i in range(50)
+        )
+    [created] = listener.events()
+    assert isinstance(created, BulkModelSubscriptionEvent)
+    assert created.operation == EventNames.CREATED.value
+    assert len(created) == 50
+    assert None not in created.pks
+
+    with django_capture_on_commit_callbacks(execute=True):
+        TestBulkModel.objects.filter(name__in=['item 1', 'item 2']).update(name='renamed')
+    [updated] = listener.events()
+    assert updated.operation == EventNames.UPDATED.value
+    assert [event.instance.name for event in updated.events()] == ['renamed', 'renamed']
+
+    instances = list(TestBulkModel.objects.all()[:10])
+    for instance in instances:
+        instance.name = 'bulk updated'
+    with django_capture_on_commit_callbacks(execute=True):
+        TestBulkModel.objects.bulk_update(instances, ['name'], batch_size=3)
+    [updated] = listener.events()
+    assert len(updated) == 10
+    assert updated.rows[0]['name'] == 'bulk updated'
+
+    with django_capture_on_commit_callbacks(execute=True):
+        TestBulkModel.objects.filter(name='bulk updated').delete()
+    [deleted] = listener.events()
+    assert deleted.operation == EventNames.DELETED.value
+    assert sorted(deleted.pks) == sorted(instance.pk for instance in instances)
+
+    with django_capture_on_commit_callbacks(execute=True):
+        TestBulkModel.objects.filter(name='missing').update(name='other')
+    assert listener.events() == []
+
+
+def test_bulk_event_is_dispatched_per_instance():
+    event = BulkModelSubscriptionEvent(
+        operation=EventNames.UPDATED.value,
+        instances=[TestBulkModel(id=i, name=f'item {i}') for i in range(1, 6)],
+        model=TestBulkModel
+    )
+    event.id = 'bulk'
+    event = BaseEvent.from_dict(event.to_dict())
+    event.id = 'bulk'
+
+    stream = EventStream()
+    received = {'model': [], 'instance': [], 'fallback': []}
+    stream.model_events(TestBulkModel, [EventNames.UPDATED]).subscribe(
+        lambda e: received['model'].append((e.pk, stream.get_current_event_id()))
+    )
+    stream.model_events(TestBulkModel, [EventNames.UPDATED], pk=3).subscribe(
+        lambda e: received['instance'].append(e.instance.name)
+    )
+    stream.subscribe(lambda e: received['fallback'].append(e.pk))
+
+    stream.on_next(event)
+
+    assert received['model'] == [(i, f'bulk.{i - 1}') for i in range(1, 6)]
+    assert received['instance'] == ['item 3']
+    assert received['fallback'] == [1, 2, 3, 4, 5]
+
+
+@pytest.mark.django_db
+def test_bulk_operations_with_the_signals_connected(listener, django_capture_on_commit_callbacks, monkeypatch):
+    post_save.connect(post_save_subscription, sender=TestBulkModel, dispatch_uid='test_bulk_post_save')
+    post_delete.connect(post_delete_subscription, sender=TestBulkModel, dispatch_uid='test_bulk_post_delete')
+    try:
+        with django_capture_on_commit_callbacks(execute=True):
+            TestBulkModel.objects.bulk_create(TestBulkModel(name=f'item {i}') for i in range(5))
+        listener.events()
+
+        # The rows updated are selected in batches
+        monkeypatch.setattr(connection.ops, 'bulk_batch_size', lambda fields, objs: 2)
+        with django_capture_on_commit_callbacks(execute=True):
+            TestBulkModel.objects.update(name='renamed')
+        [updated] = listener.events()
+        assert len(updated) == 5
+
+        # The post_delete of each row is not published on its own
+        with django_capture_on_commit_callbacks(execute=True):
+            TestBulkModel.objects.filter(pk__in=updated.pks[:3]).delete()
+        [deleted] = listener.events()
+        assert isinstance(deleted, BulkModelSubscriptionEvent)
+        assert len(deleted) == 3
+    finally:
+        post_save.disconnect(sender=TestBulkModel, dispatch_uid='test_bulk_post_save')
+        post_delete.disconnect(sender=TestBulkModel, dispatch_uid='test_bulk_post_delete')
+
+
+@pytest.mark.django_db
+def test_bulk_delete_publishes_cascaded_rows(listener, django_capture_on_commit_callbacks):
+    parent = TestModel.objects.create(name='parent')
+    child = TestRelatedModel.objects.create(parent=parent, name='child')
+    post_delete.connect(post_delete_subscription, sender=TestModel, dispatch_uid='test_cascade_parent')
+    post_delete.connect(post_delete_subscription, sender=TestRelatedModel, dispatch_uid='test_cascade_child')
+    try:
+        with django_capture_on_commit_callbacks(execute=True):
+            SubscriptionQuerySet(TestModel).filter(pk=parent.pk).delete()
+    finally:
+        post_delete.disconnect(sender=TestModel, dispatch_uid='test_cascade_parent')
+        post_delete.disconnect(sender=TestRelatedModel, dispatch_uid='test_cascade_child')
+
+    events = {(event.operation, type(event).__name__): event for event in listener.events()}
+    assert set(events) == {
+        (EventNames.DELETED.value, 'BulkModelSubscriptionEvent'),
+        (EventNames.DELETED.value, 'ModelSubscriptionEvent')
+    }
+    assert events[EventNames.DELETED.value, 'BulkModelSubscriptionEvent'].pks == [parent.pk]
+    assert events[EventNames.DELETED.value, 'ModelSubscriptionEvent'].pk == child.pk
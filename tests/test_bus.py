@@ -0,0 +1,87 @@
+import asyncio
+
+import pytest
+
+from graphene_subscriptions.bus import local_bus
+from graphene_subscriptions.consumers import (AsyncGraphqlSubscriptionConsumer,
+                                              GraphqlSubscriptionConsumer)
+from graphene_subscriptions.publisher import EventBatch
+from tests.utils import (connect, create_consumer, created_event, sent_frames,
+                         start_subscription)
+
+CREATED_GROUP = 'subscriptions.model.tests.testmodel.created'
+
+
+@pytest.fixture
+def local_delivery(settings):
+    settings.GRAPHENE_SUBSCRIPTIONS = {'LOCAL_DELIVERY': True}
+
+
+async def _consumer() -> tuple[AsyncGraphqlSubscriptionConsumer, list[dict]]:
+    consumer, sent = await create_consumer()
+    await start_subscription(consumer, 1, 'subscription { testModelCreated { name } }')
+    return consumer, sent
+
+
+def _names(sent):
+    return [frame['payload']['data']['testModelCreated']['name'] for frame in sent_frames(sent)]
+
+
+@pytest.mark.asyncio
+@pytest.mark.django_db
+async def test_local_consumers_skip_the_channel_layer(local_delivery):
+    consumer, sent = await _consumer()
+    assert consumer.local_delivery
+
+    event = created_event(1, 'local')
+    await event.asend()
+    # Later changes to the instance are not seen by the subscriptions
+    event.instance.name = 'changed'
+    await asyncio.sleep(0.05)
+    assert _names(sent) == ['local']
+
+    message = await consumer.channel_layer.receive(consumer.channel_name)
+    assert message['origin'] == local_bus.origin
+    await consumer.signal_fired(message)
+    await asyncio.sleep(0.05)
+    assert _names(sent) == ['local']
+
+    # Events from other processes are still received
+    message = {**created_event(2, 'remote').to_message(), 'origin': 'other'}
+    await consumer.signal_fired(message)
+    await asyncio.sleep(0.05)
+    assert _names(sent) == ['local', 'remote']
+
+    await consumer._stop_streams()
+    assert CREATED_GROUP not in local_bus._groups
+
+
+@pytest.mark.asyncio
+@pytest.mark.django_db
+async def test_local_delivery_only(settings):
+    settings.GRAPHENE_SUBSCRIPTIONS = {
+        'LOCAL_DELIVERY': True,
+        'REMOTE_DELIVERY': False
+    }
+    consumer, sent = await _consumer()
+
+    await EventBatch([created_event(1, 'first'), created_event(2, 'second')]).asend()
+    await asyncio.sleep(0.05)
+    assert _names(sent) == ['first', 'second']
+    assert consumer.channel_name not in consumer.channel_layer.channels
+
+    await consumer._stop_streams()
+
+
+@pytest.mark.asyncio
+@pytest.mark.django_db
+async def test_sync_consumers_use_the_channel_layer(local_delivery):
+    communicator = await connect(GraphqlSubscriptionConsumer)
+    await start_subscription(communicator, 1, 'subscription { testModelCreated { name } }')
+    await asyncio.sleep(0.1)
+
+    await created_event(1, 'sync').asend()
+    frame = await communicator.receive_json_from()
+    assert frame['payload']['data'] == {'testModelCreated': {'name': 'sync'}}
+    assert await communicator.receive_nothing()
+    await communicator.disconnect()
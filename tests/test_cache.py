@@ -0,0 +1,76 @@
+import pytest
+from channels.testing import WebsocketCommunicator
+
+from graphene_subscriptions.cache import DocumentCache, document_cache, hash_query
+from graphene_subscriptions.consumers import AsyncGraphqlSubscriptionConsumer
+from tests.schema import schema
+
+
+def test_document_cache_eviction():
+    cache = DocumentCache(maxsize=2)
+
+    first = cache.parse(schema.graphql_schema, 'subscription { hello }')
+    assert cache.parse(schema.graphql_schema, 'subscription { hello }') is first
+    assert cache.info()['hits'] == 1
+    assert cache.info()['misses'] == 1
+
+    cache.parse(schema.graphql_schema, 'query { base }')
+    cache.parse(schema.graphql_schema, 'subscription { testModelCreated { name } }')
+    assert len(cache) == 2
+    assert cache.evictions == 1
+    assert hash_query('subscription { hello }') not in cache
+
+
+def test_document_cache_keeps_validation_errors():
+    cache = DocumentCache(maxsize=2)
+    cached = cache.parse(schema.graphql_schema, 'subscription { unknownField }')
+    assert len(cached.errors) == 1
+    assert cached.get_operation() is cached.get_operation()
+
+
+@pytest.mark.asyncio
+@pytest.mark.django_db
+async def test_persisted_query(settings):
+    settings.GRAPHENE_SUBSCRIPTIONS = {'PERSISTED_QUERIES': True}
+    document_cache.clear()
+
+    query = 'subscription { hello }'
+    extensions = {
+        'persistedQuery': {
+            'version': 1,
+            'sha256Hash': hash_query(query)
+        }
+    }
+
+    communicator = WebsocketCommunicator(
+        AsyncGraphqlSubscriptionConsumer.as_asgi(),
+        '/graphql/'
+    )
+    connected, _ = await communicator.connect()
+    assert connected
+
+    await communicator.send_json_to({
+        'id': 1,
+        'type': 'start_subscription',
+        'payload': {'extensions': extensions}
+    })
+    response = await communicator.receive_json_from()
+    assert response['payload'] == {'data': None, 'errors': ['PersistedQueryNotFound']}
+
+    await communicator.send_json_to({
+        'id': 2,
+        'type': 'start_subscription',
+        'payload': {'query': query, 'extensions': extensions}
+    })
+    response = await communicator.receive_json_from()
+    assert response['payload']['data'] == {'hello': 'Hello World!'}
+
+    await communicator.send_json_to({
+        'id': 3,
+        'type': 'start_subscription',
+        'payload': {'extensions': extensions}
+    })
+    response = await communicator.receive_json_from()
+    assert response['id'] == 3
+    assert response['payload']['data'] == {'hello': 'Hello World!'}
+    await communicator.disconnect()
@@ -0,0 +1,95 @@
+import asyncio
+
+import pytest
+from channels.testing import WebsocketCommunicator
+from django.db.models.signals import post_init, post_save
+
+from graphene_subscriptions.changes import (get_changed_fields,
+                                            post_init_subscription)
+from graphene_subscriptions.consumers import AsyncGraphqlSubscriptionConsumer
+from graphene_subscriptions.events import EventNames, ModelSubscriptionEvent
+from graphene_subscriptions.publisher import publisher
+from graphene_subscriptions.signals import post_save_subscription
+from tests.models import TestModel, TestValuesModel
+
+
+@pytest.fixture
+def tracked_events(monkeypatch):
+    published = []
+    monkeypatch.setattr(publisher, 'publish', lambda event, using=None: published.append(event))
+    post_init.connect(post_init_subscription, sender=TestValuesModel, dispatch_uid='test_changes_init')
+    post_save.connect(post_save_subscription, sender=TestValuesModel, dispatch_uid='test_changes_save')
+    yield published
+    post_init.disconnect(sender=TestValuesModel, dispatch_uid='test_changes_init')
+    post_save.disconnect(sender=TestValuesModel, dispatch_uid='test_changes_save')
+
+
+@pytest.mark.django_db
+def test_only_updates_changing_fields_are_sent(tracked_events):
+    instance = TestValuesModel.objects.create(name='test', metadata={'tags': []})
+    assert [event.operation for event in tracked_events] == ['created']
+    tracked_events.clear()
+
+    instance.save()
+    instance = TestValuesModel.objects.get(pk=instance.pk)
+    instance.save()
+    instance.save(update_fields=['name'])
+    assert tracked_events == []
+
+    instance.name = 'renamed'
+    instance.metadata['tags'].append('new')
+    instance.save()
+    assert tracked_events[-1].changed_fields == ['name', 'metadata']
+
+    instance.description = 'described'
+    instance.price = 2
+    instance.save(update_fields=['price'])
+    assert tracked_events[-1].changed_fields == ['price']
+    assert tracked_events[-1].to_dict()['d'] == ['price']
+
+
+def test_untracked_instances():
+    instance = TestModel(id=1, name='test')
+    assert get_changed_fields(instance) is None
+    assert get_changed_fields(instance, ['name']) == ['name']
+
+
+async def _updated(communicator: WebsocketCommunicator, changed_fields):
+    await ModelSubscriptionEvent(
+        operation=EventNames.UPDATED.value,
+        instance=TestModel(id=1, name='test'),
+        changed_fields=changed_fields
+    ).asend()
+    if await communicator.receive_nothing():
+        return None
+    return await communicator.receive_json_from()
+
+
+@pytest.mark.asyncio
+@pytest.mark.django_db
+@pytest.mark.parametrize('query, delivered', [
+    ('subscription { testModelUpdated { id } }', [False, True]),
+    ('subscription { testModelUpdated { id name } }', [True, True]),
+    ('subscription { testModelUpdated { ...Fields } } fragment Fields on TestModelType { name }', [True, True]),
+    ('subscription { testModelUpdated { id __typename } }', [False, True]),
+])
+async def test_subscription_fields_are_inferred(query, delivered):
+    communicator = WebsocketCommunicator(
+        AsyncGraphqlSubscriptionConsumer.as_asgi(),
+        '/graphql/'
+    )
+    connected, _ = await communicator.connect()
+    assert connected
+    await communicator.send_json_to({
+        'id': 1,
+        'type': 'start_subscription',
+        'payload': {'query': query}
+    })
+    await asyncio.sleep(0.1)
+
+    received = [
+        await _updated(communicator, ['name']) is not None,
+        await _updated(communicator, None) is not None,
+    ]
+    assert received == delivered
+    await communicator.disconnect()
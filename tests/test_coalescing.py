@@ -0,0 +1,155 @@
+import asyncio
+
+import pytest
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from reactivex.subject import Subject
+
+from graphene_subscriptions.coalescing import (Coalescer, coalesce_events,
+                                               model_coalescers)
+from graphene_subscriptions.events import (BaseEvent, EventNames,
+                                           ModelSubscriptionEvent)
+from graphene_subscriptions.publisher import publisher
+from graphene_subscriptions.topics import GLOBAL_GROUP
+from tests.models import TestModel
+
+
+def _event(operation: EventNames, pk: int, name: str = '') -> ModelSubscriptionEvent:
+    return ModelSubscriptionEvent(
+        operation=operation.value,
+        instance=TestModel(id=pk, name=name)
+    )
+
+
+@pytest.fixture
+def coalescer():
+    emitted = []
+    scheduled = []
+    coalescer = Coalescer(
+        0.1,
+        emitted.extend,
+        lambda delay, callback: scheduled.append(callback)
+    )
+    return coalescer, emitted, scheduled
+
+
+def test_updates_are_collapsed_into_the_latest(coalescer):
+    coalescer, emitted, scheduled = coalescer
+
+    for i in range(5):
+        coalescer.add(_event(EventNames.UPDATED, 1, f'name {i}'))
+    coalescer.add(_event(EventNames.UPDATED, 2, 'other'))
+
+    assert emitted == []
+    assert len(scheduled) == 1
+
+    scheduled[0]()
+
+    assert [(e.operation, e.pk, e.instance.name) for e in emitted] == [
+        ('updated', 1, 'name 4'),
+        ('updated', 2, 'other'),
+    ]
+    assert coalescer.coalesced == 4
+
+
+def test_created_then_deleted_cancel_out(coalescer):
+    coalescer, emitted, scheduled = coalescer
+
+    coalescer.add(_event(EventNames.CREATED, 1, 'first'))
+    coalescer.add(_event(EventNames.UPDATED, 1, 'second'))
+    coalescer.add(_event(EventNames.DELETED, 1))
+    coalescer.add(_event(EventNames.CREATED, 2, 'kept'))
+    coalescer.add(_event(EventNames.UPDATED, 2, 'updated'))
+    scheduled[0]()
+
+    assert [(e.operation, e.pk, e.instance.name) for e in emitted] == [
+        ('created', 2, 'updated'),
+    ]
+
+
+def test_other_events_are_not_delayed(coalescer):
+    coalescer, emitted, scheduled = coalescer
+
+    event = BaseEvent(operation='custom')
+    coalescer.add(event)
+
+    assert emitted == [event]
+    assert scheduled == []
+
+
+def test_subscription_coalescing():
+    async def run():
+        subject = Subject()
+        received = []
+        subject.pipe(coalesce_events(0.05)).subscribe(received.append)
+
+        for i in range(10):
+            subject.on_next(_event(EventNames.UPDATED, 1, f'name {i}'))
+        await asyncio.sleep(0)
+        assert received == []
+
+        await asyncio.sleep(0.1)
+        return received
+
+    received = asyncio.run(run())
+    assert [(e.operation, e.instance.name) for e in received] == [
+        ('updated', 'name 9'),
+    ]
+
+
+def test_model_coalescing_setting(settings):
+    settings.GRAPHENE_SUBSCRIPTIONS = {
+        'COALESCE_MODELS': {'tests.TestModel': 60}
+    }
+    channel_layer = get_channel_layer()
+    channel_name = async_to_sync(channel_layer.new_channel)()
+    async_to_sync(channel_layer.group_add)(GLOBAL_GROUP, channel_name)
+
+    try:
+        for i in range(10):
+            publisher.publish(_event(EventNames.UPDATED, 1, f'name {i}'))
+        assert channel_name not in channel_layer.channels
+
+        model_coalescers.flush()
+
+        _, message = channel_layer.channels[channel_name].get_nowait()
+        assert message['type'] == 'signal.fired'
+        assert message['event']['f']['name'] == 'name 9'
+    finally:
+        model_coalescers.clear()
+        async_to_sync(channel_layer.group_discard)(GLOBAL_GROUP, channel_name)
+
+
+def test_changed_fields_of_updates_are_merged(coalescer):
+    coalescer, emitted, scheduled = coalescer
+
+    for changed_fields in (['name'], ['id'], ['name']):
+        coalescer.add(ModelSubscriptionEvent(
+            operation=EventNames.UPDATED.value,
+            instance=TestModel(id=1, name='test'),
+            changed_fields=changed_fields
+        ))
+    scheduled[0]()
+
+    assert emitted[0].changed_fields == ['name', 'id']
+
+
+def test_held_events_keep_their_values_and_position(coalescer):
+    coalescer, emitted, scheduled = coalescer
+
+    deleted = _event(EventNames.DELETED, 2, 'deleted')
+    updated = _event(EventNames.UPDATED, 1, 'first')
+    latest = _event(EventNames.UPDATED, 1, 'second')
+    latest.seq = '7'
+    for event in (deleted, updated, latest):
+        coalescer.add(event)
+
+    # As done by the deletion once the transaction is committed
+    deleted.instance.pk = None
+    latest.instance.name = 'changed after'
+    scheduled[0]()
+
+    assert [(e.operation, e.pk, e.instance.name, e.seq) for e in emitted] == [
+        ('deleted', 2, 'deleted', None),
+        ('updated', 1, 'second', '7'),
+    ]
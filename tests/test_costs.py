@@ -0,0 +1,159 @@
+import json
+
+import graphql
+import pytest
+
+from graphene_subscriptions.consumers import (AsyncGraphqlSubscriptionConsumer,
+                                              GraphqlSubscriptionConsumer)
+from graphene_subscriptions.costs import (CostAnalyzer, SubscriptionCost,
+                                          process_costs)
+from tests.utils import connect, start_subscription
+
+SCHEMA = graphql.build_schema('''
+    type Author {
+        name: String
+        books(first: Int): [Book]
+    }
+
+    type Book {
+        title: String
+        authors: [Author]
+    }
+
+    type Query {
+        base: String
+    }
+
+    type Subscription {
+        bookUpdated: Book
+        authorUpdated: Author
+    }
+''')
+
+
+def _cost(query, variables=None, **kwargs) -> SubscriptionCost:
+    document = graphql.parse(query)
+    operation = graphql.get_operation_ast(document)
+    return CostAnalyzer(SCHEMA, document, variables, **kwargs).analyze(operation)
+
+
+def test_field_costs():
+    assert _cost('subscription { bookUpdated { title } }') == (2, 2)
+    assert _cost('subscription { bookUpdated { title __typename } }') == (2, 2)
+    assert _cost(
+        'subscription { bookUpdated { title } }',
+        field_weights={'Subscription.bookUpdated': 5, 'Book.title': 2}
+    ) == (7, 2)
+
+
+def test_list_costs():
+    assert _cost('subscription { bookUpdated { authors { name } } }') == (12, 3)
+    assert _cost(
+        'subscription { bookUpdated { authors { name } } }',
+        list_size=3
+    ) == (5, 3)
+    assert _cost('subscription { authorUpdated { books(first: 2) { title } } }') == (4, 3)
+    assert _cost(
+        'subscription($n: Int) { authorUpdated { books(first: $n) { authors { name } } } }',
+        {'n': 3}
+    ) == (1 + 1 + 3 * (1 + 10), 4)
+
+
+def test_fragment_costs():
+    query = '''
+        subscription {
+            bookUpdated { ...BookFields ... on Book { authors { name } } }
+        }
+        fragment BookFields on Book { title }
+    '''
+    assert _cost(query) == (13, 3)
+
+
+@pytest.mark.asyncio
+@pytest.mark.django_db
+@pytest.mark.parametrize('consumer_class', [GraphqlSubscriptionConsumer, AsyncGraphqlSubscriptionConsumer])
+async def test_admission_limits(settings, consumer_class):
+    settings.GRAPHENE_SUBSCRIPTIONS = {
+        'MAX_SUBSCRIPTION_DEPTH': 2,
+        'MAX_CONNECTION_COST': 5
+    }
+    communicator = await connect(consumer_class)
+
+    await start_subscription(communicator, 1, 'subscription { testModelCreated { id name } }')
+    await start_subscription(communicator, 2, 'subscription { testModelDeleted(id: 1) { id name } }')
+    frame = await communicator.receive_json_from()
+    assert frame == {
+        'id': 2,
+        'type': 'error',
+        'payload': {
+            'message': 'Subscription cost 3 exceeds the 2 left to the connection',
+            'cost': 3,
+            'limit': 5
+        }
+    }
+    assert process_costs.admitted == 3
+
+    # Replacing a subscription frees its cost
+    await start_subscription(communicator, 1, 'subscription { testModelDeleted(id: 1) { name } }')
+    await start_subscription(communicator, 3, 'subscription { testModelNameChecked }')
+    assert await communicator.receive_nothing()
+    assert process_costs.admitted == 3
+
+    await communicator.disconnect()
+    assert process_costs.admitted == 0
+
+
+@pytest.mark.asyncio
+@pytest.mark.django_db
+async def test_process_limit(settings):
+    settings.GRAPHENE_SUBSCRIPTIONS = {'MAX_PROCESS_COST': 3}
+    communicators = []
+    for _ in range(2):
+        communicator = await connect()
+        await start_subscription(communicator, 1, 'subscription { testModelCreated { name } }')
+        communicators.append(communicator)
+
+    frame = await communicators[1].receive_json_from()
+    assert frame['type'] == 'error'
+    assert json.dumps(frame['payload']['message']) == '"Subscription cost 2 exceeds the 1 left to the server"'
+    assert await communicators[0].receive_nothing()
+
+    for communicator in communicators:
+        await communicator.disconnect()
+    assert process_costs.admitted == 0
+
+
+@pytest.mark.asyncio
+@pytest.mark.django_db
+async def test_depth_limit(settings):
+    settings.GRAPHENE_SUBSCRIPTIONS = {'MAX_SUBSCRIPTION_DEPTH': 1}
+    communicator = await connect()
+
+    await start_subscription(communicator, 1, 'subscription { testModelCreated { name } }')
+    frame = await communicator.receive_json_from()
+    assert frame['payload'] == {
+        'message': 'Subscription depth 2 exceeds the limit of 1',
+        'depth': 2,
+        'limit': 1
+    }
+
+    await communicator.disconnect()
+
+
+@pytest.mark.asyncio
+@pytest.mark.django_db
+async def test_process_limit_replacing(settings):
+    settings.GRAPHENE_SUBSCRIPTIONS = {'MAX_PROCESS_COST': 3}
+    communicator = await connect()
+
+    await start_subscription(communicator, 1, 'subscription { testModelCreated { id name } }')
+    assert await communicator.receive_nothing()
+    assert process_costs.admitted == 3
+
+    # The replaced subscription frees its cost for the new one
+    await start_subscription(communicator, 1, 'subscription { testModelCreated { name } }')
+    assert await communicator.receive_nothing()
+    assert process_costs.admitted == 2
+
+    await communicator.disconnect()
+    assert process_costs.admitted == 0
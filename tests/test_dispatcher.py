@@ -0,0 +1,72 @@
+from reactivex import operators
+
+from graphene_subscriptions.consumers import EventStream
+from graphene_subscriptions.dispatcher import SubscriptionDispatcher
+from graphene_subscriptions.events import (BaseEvent, EventNames,
+                                           ModelSubscriptionEvent)
+from graphene_subscriptions.topics import Topic
+from tests.models import TestModel
+
+
+class Collector:
+    def __init__(self):
+        self.values = []
+
+    def on_next(self, value):
+        self.values.append(value)
+
+    def on_error(self, error):
+        raise error
+
+    def on_completed(self):
+        pass
+
+
+def _event(operation: EventNames, pk: int):
+    return ModelSubscriptionEvent(
+        operation=operation.value,
+        instance=TestModel(id=pk, name='test')
+    )
+
+
+def test_dispatch_only_reaches_candidates():
+    dispatcher = SubscriptionDispatcher()
+    created = Collector()
+    deleted_one = Collector()
+    deleted_two = Collector()
+
+    dispatcher.register([Topic('created', 'tests', 'testmodel')], created)
+    dispatcher.register([Topic('deleted', 'tests', 'testmodel', '1')], deleted_one)
+    disposable = dispatcher.register(
+        [Topic('deleted', 'tests', 'testmodel', '2')],
+        deleted_two
+    )
+
+    assert dispatcher.dispatch(_event(EventNames.DELETED, 1)) == 1
+    assert dispatcher.dispatch(_event(EventNames.CREATED, 5)) == 1
+    assert dispatcher.dispatch(_event(EventNames.UPDATED, 1)) == 0
+    assert len(created.values) == 1
+    assert len(deleted_one.values) == 1
+    assert deleted_two.values == []
+
+    disposable.dispose()
+    assert len(dispatcher) == 2
+    assert dispatcher.dispatch(_event(EventNames.DELETED, 2)) == 0
+
+
+def test_event_stream_keeps_rx_fallback():
+    stream = EventStream()
+    declared = []
+    fallback = []
+
+    stream.model_events(TestModel, [EventNames.CREATED]).subscribe(declared.append)
+    stream.pipe(
+        operators.filter(lambda event: event.operation == EventNames.CUSTOM_EVENT.value)
+    ).subscribe(fallback.append)
+
+    stream.on_next(_event(EventNames.CREATED, 1))
+    stream.on_next(BaseEvent(operation=EventNames.CUSTOM_EVENT.value, instance='custom'))
+
+    assert [event.operation for event in declared] == ['created']
+    assert [event.instance for event in fallback] == ['custom']
+    assert len(stream.dispatcher) == 1
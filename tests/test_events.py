@@ -0,0 +1,92 @@
+import datetime
+import json
+from decimal import Decimal
+
+import pytest
+from django.db.models import DurationField
+
+from graphene_subscriptions.events import (BaseEvent, EventNames,
+                                           ModelSubscriptionEvent,
+                                           encode_value, get_event_fields)
+from tests.models import TestModel, TestValuesModel
+
+
+def _values_instance():
+    return TestValuesModel(
+        id=3,
+        name='test',
+        description='a long description ' * 100,
+        price=Decimal('10.50'),
+        metadata={'key': [1, 2]},
+        created_on=datetime.datetime(2026, 1, 2, 3, 4, 5, tzinfo=datetime.timezone.utc)
+    )
+
+
+def test_wire_format_is_serializable():
+    event = ModelSubscriptionEvent(
+        operation=EventNames.UPDATED.value,
+        instance=_values_instance()
+    )
+
+    data = event.to_dict()
+    assert data['v'] == 1
+    assert data['c'] == 'graphene_subscriptions.events.ModelSubscriptionEvent'
+    assert data['m'] == 'tests.testvaluesmodel'
+    assert data['f']['price'] == '10.50'
+    assert data['f']['created_on'] == '2026-01-02T03:04:05+00:00'
+    # Only plain types reach the channel layer
+    json.dumps(data)
+
+
+def test_lazy_rehydration():
+    data = ModelSubscriptionEvent(
+        operation=EventNames.UPDATED.value,
+        instance=_values_instance()
+    ).to_dict()
+
+    event = BaseEvent.from_dict(data)
+    assert isinstance(event, ModelSubscriptionEvent)
+    assert event.pk == 3
+    assert [topic.pk for topic in event.topics()] == [None, '3']
+    assert event._instance is None
+
+    instance = event.instance
+    assert isinstance(instance, TestValuesModel)
+    assert instance._state.adding is False
+    assert instance.price == Decimal('10.50')
+    assert instance.metadata == {'key': [1, 2]}
+    assert instance.created_on == datetime.datetime(2026, 1, 2, 3, 4, 5, tzinfo=datetime.timezone.utc)
+    assert event.instance is instance
+
+
+def test_declared_event_fields(settings):
+    settings.GRAPHENE_SUBSCRIPTIONS = {
+        'EVENT_FIELDS': {'tests.TestValuesModel': ['name', 'price']}
+    }
+
+    assert [field.attname for field in get_event_fields(TestValuesModel)] == ['id', 'name', 'price']
+    data = ModelSubscriptionEvent(
+        operation=EventNames.UPDATED.value,
+        instance=_values_instance()
+    ).to_dict()
+    assert data['f'] == {'id': 3, 'name': 'test', 'price': '10.50'}
+
+    instance = BaseEvent.from_dict(data).instance
+    assert instance.get_deferred_fields() == {'description', 'metadata', 'created_on'}
+
+
+def test_unversioned_messages_are_rejected():
+    with pytest.raises(ValueError):
+        BaseEvent.from_dict({
+            'operation': 'created',
+            'instance': {'id': 1, 'name': 'unversioned'},
+            '__class__': ('graphene_subscriptions.events', 'ModelSubscriptionEvent')
+        })
+
+
+def test_durations_are_encoded():
+    duration = datetime.timedelta(days=1, hours=2, microseconds=30)
+    value = encode_value(duration)
+    assert json.loads(json.dumps(value)) == value
+    assert DurationField().to_python(value) == duration
+    assert DurationField().to_python(encode_value(-duration)) == -duration
@@ -0,0 +1,121 @@
+import asyncio
+import json
+
+import pytest
+from channels.testing import WebsocketCommunicator
+
+from graphene_subscriptions.consumers import AsyncGraphqlSubscriptionConsumer
+from graphene_subscriptions.events import EventNames, ModelSubscriptionEvent
+from graphene_subscriptions.frames import FrameBuffer
+from tests.models import TestModel
+
+
+def _frame(id: int) -> dict:
+    return {'type': 'websocket.send', 'text': json.dumps({'id': id, 'type': 'data'})}
+
+
+@pytest.mark.asyncio
+async def test_frames_are_batched_after_a_send():
+    sent = []
+
+    async def send(message):
+        sent.append(json.loads(message['text']))
+
+    buffer = FrameBuffer(send, 0.2, 3)
+
+    await buffer.add(_frame(1))
+    await buffer.add(_frame(2))
+    await buffer.add(_frame(3))
+    assert sent == [{'id': 1, 'type': 'data'}]
+
+    await asyncio.sleep(0.25)
+    assert sent[1] == {
+        'type': 'batch',
+        'payload': [{'id': 2, 'type': 'data'}, {'id': 3, 'type': 'data'}]
+    }
+
+    # Still within the window of the last flush
+    for id in range(4, 7):
+        await buffer.add(_frame(id))
+    assert [frame['id'] for frame in sent[2]['payload']] == [4, 5, 6]
+
+    await asyncio.sleep(0.25)
+    await buffer.add(_frame(7))
+    assert sent[3] == {'id': 7, 'type': 'data'}
+
+
+@pytest.mark.asyncio
+async def test_closing_cancels_the_pending_flush():
+    started = asyncio.Event()
+    sent = []
+
+    async def send(message):
+        if sent:
+            # The flush is still sending when the connection closes
+            started.set()
+            await asyncio.Event().wait()
+        sent.append(message)
+
+    buffer = FrameBuffer(send, 0.05, 10)
+    await buffer.add(_frame(1))
+    await buffer.add(_frame(2))
+
+    await asyncio.wait_for(started.wait(), 1)
+    task = buffer._flush_task
+    assert task is not None
+
+    buffer.close()
+    await asyncio.sleep(0)
+    assert task.cancelled()
+    assert buffer._flush_task is None
+
+
+async def _receive_all(communicator) -> list[dict]:
+    frames = []
+    while not await communicator.receive_nothing(timeout=0.2):
+        frames.append(await communicator.receive_json_from())
+    return frames
+
+
+@pytest.mark.asyncio
+@pytest.mark.django_db
+@pytest.mark.parametrize('batch', [True, False])
+async def test_consumer_batches_frames(settings, batch):
+    settings.GRAPHENE_SUBSCRIPTIONS = {'FRAME_BATCH_WINDOW': 0.05}
+    communicator = WebsocketCommunicator(
+        AsyncGraphqlSubscriptionConsumer.as_asgi(),
+        '/graphql/'
+    )
+    connected, _ = await communicator.connect()
+    assert connected
+
+    await communicator.send_json_to({'type': 'initial_connection', 'payload': {'batch': batch}})
+    for id in range(1, 4):
+        await communicator.send_json_to({
+            'id': id,
+            'type': 'start_subscription',
+            'payload': {'query': 'subscription { testModelCreated { name } }'}
+        })
+    await asyncio.sleep(0.1)
+
+    for pk in (1, 2):
+        await ModelSubscriptionEvent(
+            operation=EventNames.CREATED.value,
+            instance=TestModel(id=pk, name=f'item {pk}')
+        ).asend()
+
+    frames = await _receive_all(communicator)
+    data = []
+    for frame in frames:
+        data.extend(frame['payload'] if frame['type'] == 'batch' else [frame])
+
+    assert sorted((d['id'], d['payload']['data']['testModelCreated']['name']) for d in data) == [
+        (id, f'item {pk}') for id in range(1, 4) for pk in (1, 2)
+    ]
+    if batch:
+        assert len(frames) < 6
+        assert frames[0]['type'] == 'data'
+        assert frames[1]['type'] == 'batch'
+    else:
+        assert len(frames) == 6
+    await communicator.disconnect()
@@ -0,0 +1,171 @@
+import asyncio
+
+import pytest
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from django.db.models.signals import post_save
+
+from graphene_subscriptions.interest import (ANY_INTEREST,
+                                             CacheInterestBackend,
+                                             ChannelLayerInterestBackend,
+                                             interest_registry)
+from graphene_subscriptions.signals import post_save_subscription
+from graphene_subscriptions.topics import GLOBAL_GROUP
+from tests.models import TestModel
+from tests.utils import connect, start_subscription
+
+
+@pytest.fixture
+def local_interest(settings):
+    settings.GRAPHENE_SUBSCRIPTIONS = {
+        'INTEREST_BACKEND': 'graphene_subscriptions.interest.LocalInterestBackend'
+    }
+    return interest_registry.backend
+
+
+def test_every_event_is_sent_without_backend():
+    assert interest_registry.backend is None
+    assert interest_registry.has_interest(TestModel, 'created')
+
+
+@pytest.mark.asyncio
+@pytest.mark.django_db
+async def test_consumers_advertise_their_interest(local_interest):
+    assert not interest_registry.has_interest(TestModel, 'created')
+
+    communicator = await connect()
+    await start_subscription(communicator, 1, 'subscription { testModelCreated { name } }')
+    await asyncio.sleep(0.1)
+    assert local_interest.counts == {'tests.testmodel.created': 1}
+    assert interest_registry.has_interest(TestModel, 'created')
+    assert not interest_registry.has_interest(TestModel, 'updated')
+
+    await communicator.disconnect()
+    assert local_interest.counts == {}
+
+    communicator = await connect()
+    await start_subscription(communicator, 1, 'subscription { testModelSubscription }')
+    await asyncio.sleep(0.1)
+    assert local_interest.counts == {ANY_INTEREST: 1}
+    assert interest_registry.has_interest(TestModel, 'updated')
+    await communicator.disconnect()
+
+
+@pytest.mark.django_db
+def test_events_without_interest_are_not_sent(local_interest, django_capture_on_commit_callbacks):
+    channel_layer = get_channel_layer()
+    channel_name = async_to_sync(channel_layer.new_channel)()
+    async_to_sync(channel_layer.group_add)(GLOBAL_GROUP, channel_name)
+    post_save.connect(post_save_subscription, sender=TestModel, dispatch_uid='test_interest')
+
+    try:
+        with django_capture_on_commit_callbacks(execute=True) as callbacks:
+            TestModel.objects.create(name='nobody listens')
+        assert callbacks == []
+        assert channel_name not in channel_layer.channels
+
+        async_to_sync(local_interest.add)(['tests.testmodel.created'])
+        with django_capture_on_commit_callbacks(execute=True):
+            TestModel.objects.create(name='somebody listens')
+        assert not channel_layer.channels[channel_name].empty()
+    finally:
+        post_save.disconnect(sender=TestModel, dispatch_uid='test_interest')
+        async_to_sync(channel_layer.group_discard)(GLOBAL_GROUP, channel_name)
+
+
+def test_cache_backend(settings):
+    settings.CACHES = {
+        'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}
+    }
+    settings.GRAPHENE_SUBSCRIPTIONS = {
+        'INTEREST_BACKEND': 'graphene_subscriptions.interest.CacheInterestBackend',
+        'INTEREST_CACHE_TTL': 60
+    }
+    backend = interest_registry.backend
+    assert isinstance(backend, CacheInterestBackend)
+
+    async_to_sync(backend.add)(['tests.testmodel.updated'])
+    async_to_sync(backend.add)(['tests.testmodel.updated'])
+    assert backend.get_counts(['tests.testmodel.updated']) == {'tests.testmodel.updated': 2}
+    assert interest_registry.has_interest(TestModel, 'updated')
+
+    async_to_sync(backend.remove)(['tests.testmodel.updated'])
+    async_to_sync(backend.remove)(['tests.testmodel.updated'])
+    assert backend.get_counts(['tests.testmodel.updated']) == {'tests.testmodel.updated': 0}
+    # Publishers keep the counts they read for INTEREST_CACHE_TTL
+    assert interest_registry.has_interest(TestModel, 'updated')
+    interest_registry.reset()
+    assert not interest_registry.has_interest(TestModel, 'updated')
+
+
+def test_new_interest_is_seen_at_once(settings):
+    settings.CACHES = {
+        'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}
+    }
+    settings.GRAPHENE_SUBSCRIPTIONS = {
+        'INTEREST_BACKEND': 'graphene_subscriptions.interest.CacheInterestBackend',
+        'INTEREST_CACHE_TTL': 60
+    }
+    assert not interest_registry.has_interest(TestModel, 'created')
+
+    # The zero kept by the publishers of the process is dropped
+    async_to_sync(interest_registry.add)(['tests.testmodel.created'])
+    assert interest_registry.has_interest(TestModel, 'created')
+
+
+class FakeRedis:
+    def __init__(self):
+        self.values = {}
+
+    async def incr(self, name):
+        self.values[name] = self.values.get(name, 0) + 1
+
+    async def decr(self, name):
+        self.values[name] = self.values.get(name, 0) - 1
+
+    async def get(self, name):
+        value = self.values.get(name)
+        return None if value is None else str(value).encode()
+
+
+class FakeRedisChannelLayer:
+    """The parts of the channels_redis layer the backend uses"""
+
+    prefix = 'asgi'
+
+    def __init__(self):
+        self.shards = [FakeRedis(), FakeRedis()]
+
+    def consistent_hash(self, value):
+        return len(value) % len(self.shards)
+
+    def connection(self, index):
+        return self.shards[index]
+
+
+def test_channel_layer_backend(settings, monkeypatch):
+    settings.GRAPHENE_SUBSCRIPTIONS = {
+        'INTEREST_BACKEND': 'graphene_subscriptions.interest.ChannelLayerInterestBackend',
+        'INTEREST_CACHE_TTL': 60
+    }
+    # The in memory layer only reaches the process
+    backend = interest_registry.backend
+    assert not backend.shared
+    async_to_sync(backend.add)(['tests.testmodel.created'])
+    assert backend.counts == {'tests.testmodel.created': 1}
+
+    channel_layer = FakeRedisChannelLayer()
+    monkeypatch.setattr('graphene_subscriptions.interest.get_channel_layer', lambda: channel_layer)
+    backend = ChannelLayerInterestBackend()
+    assert backend.shared and backend.cache_ttl == 60
+
+    async_to_sync(backend.add)(['tests.testmodel.created', 'tests.testmodel.deleted'])
+    async_to_sync(backend.add)(['tests.testmodel.created'])
+    async_to_sync(backend.remove)(['tests.testmodel.deleted', 'tests.testmodel.updated'])
+    assert backend.get_counts(['tests.testmodel.created', 'tests.testmodel.deleted', 'tests.testmodel.updated']) == {
+        'tests.testmodel.created': 2,
+        'tests.testmodel.deleted': 0,
+        'tests.testmodel.updated': 0
+    }
+    shard = channel_layer.shards[channel_layer.consistent_hash('tests.testmodel.created')]
+    assert shard.values['asgi:interest:tests.testmodel.created'] == 2
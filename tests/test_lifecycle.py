@@ -0,0 +1,69 @@
+import asyncio
+
+import pytest
+from channels.exceptions import StopConsumer
+
+from tests.utils import create_consumer, receive_json, start_subscription
+
+
+@pytest.mark.asyncio
+@pytest.mark.django_db
+async def test_stop_releases_the_subscription():
+    consumer, _ = await create_consumer()
+
+    await start_subscription(consumer, 1, 'subscription { testModelCreated { name } }')
+    await start_subscription(consumer, 2, 'subscription { testModelSubscription }')
+    record = consumer.subscriptions[1]
+    task = record.task
+
+    assert len(consumer.stream.dispatcher) == 1
+    assert len(consumer.stream.observers) == 1
+    assert set(consumer.group_members) == {
+        'subscriptions',
+        'subscriptions.model.tests.testmodel.created'
+    }
+
+    await receive_json(consumer, {'id': 1, 'type': 'stop_subscription'})
+    await asyncio.sleep(0)
+
+    assert task.cancelled()
+    assert record.disposables == []
+    assert len(consumer.stream.dispatcher) == 0
+    assert set(consumer.group_members) == {'subscriptions'}
+
+    await receive_json(consumer, {'id': 2, 'type': 'stop_subscription'})
+    assert consumer.subscriptions == {}
+    assert consumer.stream.observers == []
+    assert consumer.group_members == {}
+
+
+@pytest.mark.asyncio
+@pytest.mark.django_db
+async def test_disconnect_releases_every_subscription():
+    consumer, _ = await create_consumer()
+    channel_layer = consumer.channel_layer
+
+    for id in range(10):
+        await start_subscription(consumer, id, 'subscription { testModelCreated { name } }')
+    # Reusing an operation id replaces the subscription
+    await start_subscription(consumer, 0, 'subscription { testModelCreated { name } }')
+    assert len(consumer.stream.dispatcher) == 10
+
+    with pytest.raises(StopConsumer):
+        await consumer.websocket_disconnect({})
+
+    assert consumer.subscriptions == {}
+    assert len(consumer.stream.dispatcher) == 0
+    assert 'subscriptions.model.tests.testmodel.created' not in channel_layer.groups
+
+
+@pytest.mark.asyncio
+@pytest.mark.django_db
+async def test_failed_subscription_is_released():
+    consumer, sent = await create_consumer()
+
+    await start_subscription(consumer, 1, 'subscription { testModelCreated { unknownField } }')
+
+    assert 'errors' in sent[-1]['text']
+    assert consumer.subscriptions == {}
+    assert len(consumer.stream.dispatcher) == 0
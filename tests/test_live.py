@@ -0,0 +1,121 @@
+import asyncio
+import copy
+import json
+
+import pytest
+
+from graphene_subscriptions.consumers import AsyncGraphqlSubscriptionConsumer
+from graphene_subscriptions.events import EventNames, ModelSubscriptionEvent
+from graphene_subscriptions.live import JsonPatch, LiveResult, json_patch
+from tests.models import TestModel
+from tests.utils import create_consumer, sent_frames, start_subscription
+
+
+def _apply(document, patch):
+    document = copy.deepcopy(document)
+    for operation in patch:
+        *parents, last = [
+            token.replace('~1', '/').replace('~0', '~')
+            for token in operation['path'].split('/')[1:]
+        ] or [None]
+        if last is None:
+            document = operation['value']
+            continue
+        target = document
+        for token in parents:
+            target = target[int(token) if isinstance(target, list) else token]
+        if isinstance(target, list):
+            last = int(last)
+        if operation['op'] == 'remove':
+            del target[last]
+        elif operation['op'] == 'add' and isinstance(target, list):
+            target.insert(last, operation['value'])
+        else:
+            target[last] = operation['value']
+    return document
+
+
+@pytest.mark.parametrize('previous, current', [
+    ({'a': 1, 'b': 2}, {'a': 1, 'b': 3, 'c': 4}),
+    ({'a': {'b': [1, 2, 3]}}, {'a': {'b': [1, 5]}}),
+    ({'a': [{'id': 1}]}, {'a': [{'id': 1}, {'id': 2}, {'id': 3}]}),
+    ({'a/b': 1, 'c~d': None}, {'a/b': 2}),
+    ({'a': 1}, {'a': True}),
+    ([1], {'a': 1}),
+])
+def test_json_patch(previous, current):
+    assert _apply(previous, json_patch(previous, current)) == current
+
+
+def test_unchanged_values():
+    assert json_patch({'a': [1, {'b': None}]}, {'a': [1, {'b': None}]}) == []
+
+
+def test_live_result():
+    live = LiveResult()
+    assert live.update('{"data": 1}') == '{"data": 1}'
+    assert live.update('{"data": 1}') is None
+    assert live.update('{"data": 2}') == '{"data": 2}'
+
+    live = LiveResult(patch=True)
+    first = json.dumps({'data': {'items': list(range(20))}})
+    assert live.update(first) == first
+    second = json.dumps({'data': {'items': [*range(19), 42]}})
+    patch = live.update(second)
+    assert isinstance(patch, JsonPatch)
+    assert json.loads(patch) == [{'op': 'replace', 'path': '/data/items/19', 'value': 42}]
+    # A patch larger than the result is not sent
+    third = json.dumps({'data': None})
+    assert live.update(third) == third
+
+    assert LiveResult.from_payload({'query': ''}) is None
+    assert not LiveResult.from_payload({'live': True}).patch
+    assert LiveResult.from_payload({'patch': True}).patch
+
+
+async def _consumer(**flags) -> tuple[AsyncGraphqlSubscriptionConsumer, list[dict]]:
+    consumer, sent = await create_consumer()
+    aliases = ' '.join(f'id{i}: id' for i in range(10))
+    await start_subscription(
+        consumer,
+        1,
+        f'subscription {{ testModelCreated {{ {aliases} name }} }}',
+        **flags
+    )
+    return consumer, sent
+
+
+async def _send_names(consumer, names):
+    for name in names:
+        event = ModelSubscriptionEvent(
+            operation=EventNames.CREATED.value,
+            instance=TestModel(id=1, name=name)
+        )
+        await consumer.signal_fired(event.to_message())
+        await asyncio.sleep(0.02)
+
+
+@pytest.mark.asyncio
+@pytest.mark.django_db
+async def test_live_subscription():
+    consumer, sent = await _consumer(live=True)
+    await _send_names(consumer, ['first', 'first', 'second', 'second'])
+
+    frames = sent_frames(sent)
+    assert [frame['type'] for frame in frames] == ['data', 'data']
+    assert [frame['payload']['data']['testModelCreated']['name'] for frame in frames] == ['first', 'second']
+    await consumer._stop_streams()
+
+
+@pytest.mark.asyncio
+@pytest.mark.django_db
+async def test_live_subscription_patches():
+    consumer, sent = await _consumer(patch=True)
+    await _send_names(consumer, ['first', 'first', 'second'])
+
+    frames = sent_frames(sent)
+    assert [frame['type'] for frame in frames] == ['data', 'patch']
+    assert frames[1]['payload'] == [
+        {'op': 'replace', 'path': '/data/testModelCreated/name', 'value': 'second'}
+    ]
+    await consumer._stop_streams()
@@ -0,0 +1,83 @@
+import asyncio
+
+import pytest
+from asgiref.sync import sync_to_async
+from channels.testing import WebsocketCommunicator
+
+from graphene_subscriptions.consumers import AsyncGraphqlSubscriptionConsumer
+from graphene_subscriptions.events import EventNames, ModelSubscriptionEvent
+from graphene_subscriptions.loaders import EventLoader, event_loaders
+from tests.models import TestModel, TestRelatedModel
+
+
+def _create_models() -> list[TestModel]:
+    parents = [TestModel.objects.create(name=f'parent {i}') for i in range(3)]
+    for parent in parents[:2]:
+        for i in range(2):
+            TestRelatedModel.objects.create(parent=parent, name=f'{parent.name} child {i}')
+    return parents
+
+
+@pytest.mark.asyncio
+@pytest.mark.django_db(transaction=True)
+async def test_lookups_are_batched():
+    parents = await sync_to_async(_create_models)()
+    child = await sync_to_async(TestRelatedModel.objects.first)()
+    loader = EventLoader()
+
+    results = await asyncio.gather(
+        *(loader.related(parent, 'children') for parent in parents),
+        loader.related(child, 'parent'),
+        loader.load(TestModel, str(parents[0].pk)),
+        loader.load(TestModel, -1)
+    )
+    assert [[child.name for child in children] for children in results[:3]] == [
+        ['parent 0 child 0', 'parent 0 child 1'],
+        ['parent 1 child 0', 'parent 1 child 1'],
+        []
+    ]
+    assert results[3] == results[4] == parents[0]
+    assert results[5] is None
+    assert loader.queries == 2
+
+    # Repeated lookups are answered by the loader
+    assert await loader.related(parents[1], 'children') is results[1]
+    assert loader.queries == 2
+
+
+@pytest.mark.asyncio
+@pytest.mark.django_db(transaction=True)
+async def test_executions_share_the_loader_of_the_event():
+    parents = await sync_to_async(_create_models)()
+
+    communicators = []
+    for fields in ('name children { name }', 'id children { name }', 'children { id }'):
+        communicator = WebsocketCommunicator(
+            AsyncGraphqlSubscriptionConsumer.as_asgi(),
+            '/graphql/'
+        )
+        await communicator.connect()
+        await communicator.send_json_to({
+            'id': 1,
+            'type': 'start_subscription',
+            'payload': {'query': f'subscription {{ testModelCreated {{ {fields} }} }}'}
+        })
+        communicators.append(communicator)
+    await asyncio.sleep(0.1)
+
+    event = ModelSubscriptionEvent(
+        operation=EventNames.CREATED.value,
+        instance=parents[0]
+    )
+    await event.asend()
+
+    frames = [await communicator.receive_json_from() for communicator in communicators]
+    assert frames[0]['payload']['data']['testModelCreated'] == {
+        'name': 'parent 0',
+        'children': [{'name': 'parent 0 child 0'}, {'name': 'parent 0 child 1'}]
+    }
+    assert len(frames[2]['payload']['data']['testModelCreated']['children']) == 2
+    assert event_loaders.get(event.id).queries == 1
+
+    for communicator in communicators:
+        await communicator.disconnect()
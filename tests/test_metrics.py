@@ -0,0 +1,96 @@
+import pytest
+from channels.testing import WebsocketCommunicator
+from django.test import RequestFactory
+
+from graphene_subscriptions.consumers import AsyncGraphqlSubscriptionConsumer
+from graphene_subscriptions.events import EventNames, ModelSubscriptionEvent
+from graphene_subscriptions.metrics import (NULL_TIMER, PrometheusSink,
+                                            metrics)
+from graphene_subscriptions.views import prometheus_metrics
+from tests.models import TestModel
+
+
+@pytest.fixture
+def enabled_metrics(settings):
+    settings.GRAPHENE_SUBSCRIPTIONS = {'METRICS_ENABLED': True}
+    yield metrics.get_sink(PrometheusSink)
+    metrics.reset()
+
+
+def test_disabled_metrics_have_no_sink():
+    assert metrics.sinks == []
+    assert metrics.timer('graphene_subscriptions_send_seconds') is NULL_TIMER
+    metrics.inc('graphene_subscriptions_connections')
+
+    response = prometheus_metrics(RequestFactory().get('/metrics'))
+    assert response.status_code == 404
+
+
+def test_prometheus_histogram():
+    sink = PrometheusSink()
+    for value in (0.0001, 0.003, 0.003, 20):
+        sink.observe('graphene_subscriptions_send_seconds', value)
+    sink.inc('graphene_subscriptions_connections', 3)
+    sink.inc('graphene_subscriptions_connections', -1)
+
+    lines = sink.render().splitlines()
+    assert 'graphene_subscriptions_connections 2' in lines
+    assert '# TYPE graphene_subscriptions_send_seconds histogram' in lines
+    assert 'graphene_subscriptions_send_seconds_bucket{le="0.0005"} 1' in lines
+    assert 'graphene_subscriptions_send_seconds_bucket{le="0.005"} 3' in lines
+    assert 'graphene_subscriptions_send_seconds_bucket{le="10"} 3' in lines
+    assert 'graphene_subscriptions_send_seconds_bucket{le="+Inf"} 4' in lines
+    assert 'graphene_subscriptions_send_seconds_count 4' in lines
+    assert 'graphene_subscriptions_send_seconds_sum 20.0061' in lines
+
+
+def test_prometheus_values_are_not_rounded():
+    sink = PrometheusSink()
+    sink.inc('graphene_subscriptions_events_received_total', 1234567)
+    sink.set('graphene_subscriptions_admitted_cost', 1234567.5)
+
+    lines = sink.render().splitlines()
+    assert 'graphene_subscriptions_events_received_total 1234567' in lines
+    assert 'graphene_subscriptions_admitted_cost 1234567.5' in lines
+
+
+@pytest.mark.asyncio
+@pytest.mark.django_db
+async def test_consumer_metrics(enabled_metrics):
+    communicator = WebsocketCommunicator(
+        AsyncGraphqlSubscriptionConsumer.as_asgi(),
+        '/graphql/'
+    )
+    connected, _ = await communicator.connect()
+    assert connected
+
+    await communicator.send_json_to({
+        'id': 1,
+        'type': 'start_subscription',
+        'payload': {'query': 'subscription { testModelCreated { name } }'}
+    })
+    assert await communicator.receive_nothing()
+    assert enabled_metrics.values['graphene_subscriptions_subscriptions'] == 1
+
+    await ModelSubscriptionEvent(
+        operation=EventNames.CREATED.value,
+        instance=TestModel(id=1, name='test')
+    ).asend()
+    await communicator.receive_json_from()
+    await communicator.disconnect()
+
+    assert enabled_metrics.values == {
+        'graphene_subscriptions_connections': 0,
+        'graphene_subscriptions_connections_total': 1,
+        'graphene_subscriptions_subscriptions': 0,
+        'graphene_subscriptions_subscriptions_total': 1,
+        'graphene_subscriptions_admitted_cost': 0,
+        'graphene_subscriptions_events_received_total': 1,
+        'graphene_subscriptions_frames_sent_total': 1,
+    }
+    for name in ('subscription_cost', 'subscribe_seconds', 'dispatch_seconds', 'execution_seconds', 'send_seconds'):
+        assert enabled_metrics.histograms[f'graphene_subscriptions_{name}'][1][1] == 1
+
+    response = prometheus_metrics(RequestFactory().get('/metrics'))
+    assert response.status_code == 200
+    assert b'graphene_subscriptions_frames_sent_total 1' in response.content
@@ -0,0 +1,100 @@
+import asyncio
+import os
+import threading
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+
+from graphene_subscriptions.events import EventNames, ModelSubscriptionEvent
+from graphene_subscriptions.profiling import profiler, read_reports
+from tests.models import TestModel
+from tests.utils import create_consumer, start_subscription
+
+QUERY = 'subscription Delayed { testModelNameDelayed }'
+
+
+async def _execute(names):
+    consumer, _ = await create_consumer()
+    await start_subscription(consumer, 1, QUERY)
+    for name in names:
+        event = ModelSubscriptionEvent(
+            operation=EventNames.CREATED.value,
+            instance=TestModel(id=1, name=name)
+        )
+        await consumer.signal_fired(event.to_message())
+    await asyncio.sleep(0.3)
+    await consumer._stop_streams()
+
+
+@pytest.mark.asyncio
+@pytest.mark.django_db
+async def test_slow_executions_are_reported(settings, tmp_path):
+    settings.GRAPHENE_SUBSCRIPTIONS = {
+        'PROFILE_SLOW_THRESHOLD': 0.1,
+        'PROFILE_REPORTS': 2,
+        'PROFILE_DIRECTORY': str(tmp_path)
+    }
+    await _execute(['0', '0.15', '0'])
+
+    profiler.flush()
+    report, = read_reports(str(tmp_path))
+    assert report['operation'] == 'Delayed'
+    assert len(report['document']) == 64
+    assert report['duration'] >= 0.15
+    assert not report['sampled']
+    assert report['profile'] is None
+    path, duration = report['resolvers'][-1]
+    assert path == 'testModelNameDelayed'
+    assert duration >= 0.15
+
+
+@pytest.mark.asyncio
+@pytest.mark.django_db
+async def test_sampled_executions(settings, tmp_path):
+    settings.GRAPHENE_SUBSCRIPTIONS = {
+        'PROFILE_SAMPLE_RATE': 1,
+        'PROFILE_CPROFILE': True,
+        'PROFILE_REPORTS': 2,
+        'PROFILE_DIRECTORY': str(tmp_path)
+    }
+    await _execute(['0', '0', '0'])
+
+    # The ring keeps the last reports of the process
+    profiler.flush()
+    reports = read_reports(str(tmp_path))
+    assert len(reports) == 2
+    assert all(report['sampled'] for report in reports)
+    assert all(os.path.exists(report['profile']) for report in reports)
+
+    output = StringIO()
+    call_command('subscription_profiles', directory=str(tmp_path), stats=5, stdout=output)
+    lines = output.getvalue().splitlines()
+    assert 'operation=Delayed' in lines[0]
+    assert lines[1].endswith('testModelNameDelayed')
+    assert 'function calls' in output.getvalue()
+
+    call_command('subscription_profiles', directory=str(tmp_path), clear=True)
+    assert read_reports(str(tmp_path)) == []
+
+
+@pytest.mark.asyncio
+@pytest.mark.django_db
+async def test_reports_are_written_off_the_event_loop(settings, tmp_path, monkeypatch):
+    settings.GRAPHENE_SUBSCRIPTIONS = {
+        'PROFILE_SAMPLE_RATE': 1,
+        'PROFILE_DIRECTORY': str(tmp_path)
+    }
+    threads = []
+    write = profiler.write
+
+    def recording_write(*args):
+        threads.append(threading.current_thread())
+        write(*args)
+
+    monkeypatch.setattr(profiler, 'write', recording_write)
+    await _execute(['0'])
+
+    profiler.flush()
+    assert len(read_reports(str(tmp_path))) == 1
+    assert threads and threading.main_thread() not in threads
@@ -0,0 +1,200 @@
+import asyncio
+
+import pytest
+from channels.testing import WebsocketCommunicator
+from django.db import connection, transaction
+from django.db.models.signals import post_delete, post_save
+
+from graphene_subscriptions.consumers import AsyncGraphqlSubscriptionConsumer
+from graphene_subscriptions.events import EventNames, ModelSubscriptionEvent
+from graphene_subscriptions.publisher import EventBatch, publisher
+from graphene_subscriptions.signals import (post_delete_subscription,
+                                            post_save_subscription)
+from tests.models import TestModel
+from tests.utils import ChannelListener
+
+
+@pytest.fixture
+def listener(listener):
+    post_save.connect(
+        post_save_subscription,
+        sender=TestModel,
+        dispatch_uid='test_publisher_post_save'
+    )
+    yield listener
+    post_save.disconnect(
+        post_save_subscription,
+        sender=TestModel,
+        dispatch_uid='test_publisher_post_save'
+    )
+
+
+@pytest.mark.django_db
+def test_events_are_batched_until_commit(listener, django_capture_on_commit_callbacks):
+
+    with django_capture_on_commit_callbacks(execute=True) as callbacks:
+        for i in range(20):
+            TestModel.objects.create(name=f'item {i}')
+        assert listener.messages() == []
+
+    assert len(callbacks) == 1
+    messages = listener.messages()
+    assert len(messages) == 1
+    assert messages[0]['type'] == 'signal.batch'
+    assert len(messages[0]['events']) == 20
+
+
+@pytest.mark.django_db
+def test_rolled_back_events_are_not_sent(listener, django_capture_on_commit_callbacks):
+
+    with django_capture_on_commit_callbacks(execute=True):
+        TestModel.objects.create(name='kept')
+        try:
+            with transaction.atomic():
+                TestModel.objects.create(name='rolled back')
+                raise ValueError()
+        except ValueError:
+            pass
+
+        # A new savepoint after the rollback gets its own batch
+        with transaction.atomic():
+            TestModel.objects.create(name='after rollback')
+
+    names = [
+        message['event']['f']['name']
+        for message in listener.messages()
+        for message in message.get('events', [message])
+    ]
+    assert names == ['kept', 'after rollback']
+
+
+@pytest.mark.django_db(transaction=True)
+def test_events_outside_transactions_are_sent_immediately(listener):
+    assert publisher.get_buffer() is None
+
+    TestModel.objects.create(name='autocommit')
+    messages = listener.messages()
+    assert len(messages) == 1
+    assert messages[0]['type'] == 'signal.fired'
+
+
+@pytest.mark.asyncio
+@pytest.mark.django_db
+async def test_consumer_receives_batches():
+    communicator = WebsocketCommunicator(
+        AsyncGraphqlSubscriptionConsumer.as_asgi(),
+        '/graphql/'
+    )
+    connected, _ = await communicator.connect()
+    assert connected
+
+    await communicator.send_json_to({
+        'id': 1,
+        'type': 'start_subscription',
+        'payload': {'query': 'subscription { testModelCreated { name } }'}
+    })
+    await asyncio.sleep(0.1)
+
+    batch = EventBatch()
+    for i in range(3):
+        batch.add(ModelSubscriptionEvent(
+            operation=EventNames.CREATED.value,
+            instance=TestModel(id=i + 1, name=f'item {i}')
+        ))
+    await batch.asend()
+
+    for i in range(3):
+        response = await communicator.receive_json_from()
+        assert response['payload']['data'] == {'testModelCreated': {'name': f'item {i}'}}
+    assert await communicator.receive_nothing()
+    await communicator.disconnect()
+
+
+def _sent_events(listener: ChannelListener) -> list[dict]:
+    return [
+        message['event']
+        for message in listener.messages()
+        for message in message.get('events', [message])
+    ]
+
+
+@pytest.mark.django_db
+def test_events_keep_the_order_they_were_sent_in(listener, django_capture_on_commit_callbacks):
+
+    with django_capture_on_commit_callbacks(execute=True):
+        TestModel.objects.create(name='a')
+        with transaction.atomic():
+            TestModel.objects.create(name='b')
+        TestModel.objects.create(name='c')
+        try:
+            with transaction.atomic():
+                TestModel.objects.create(name='rolled back')
+                with transaction.atomic():
+                    TestModel.objects.create(name='nested rolled back')
+                raise ValueError()
+        except ValueError:
+            pass
+        TestModel.objects.create(name='d')
+        # The events of the rolled back savepoints are not kept around
+        assert len(publisher.get_buffer()) == 4
+
+    events = _sent_events(listener)
+    assert [event['f']['name'] for event in events] == ['a', 'b', 'c', 'd']
+
+
+@pytest.mark.django_db
+def test_events_keep_the_values_they_were_sent_with(listener, django_capture_on_commit_callbacks):
+    post_delete.connect(
+        post_delete_subscription,
+        sender=TestModel,
+        dispatch_uid='test_publisher_post_delete'
+    )
+
+    try:
+        with django_capture_on_commit_callbacks(execute=True):
+            instance = TestModel.objects.create(name='saved')
+            instance.name = 'changed without saving'
+            pk = instance.pk
+            instance.delete()
+    finally:
+        post_delete.disconnect(
+            post_delete_subscription,
+            sender=TestModel,
+            dispatch_uid='test_publisher_post_delete'
+        )
+
+    events = _sent_events(listener)
+    assert [(event['o'], event['f']['id'], event['f']['name']) for event in events] == [
+        ('created', pk, 'saved'),
+        ('deleted', pk, 'changed without saving')
+    ]
+
+
+@pytest.mark.django_db(transaction=True)
+def test_events_are_sent_in_order_by_a_real_commit(listener):
+    # Django runs the callbacks of a real commit from a list of its own
+    with transaction.atomic():
+        TestModel.objects.create(name='a')
+        with transaction.atomic():
+            TestModel.objects.create(name='b')
+        try:
+            with transaction.atomic():
+                TestModel.objects.create(name='rolled back')
+                raise ValueError()
+        except ValueError:
+            pass
+        TestModel.objects.create(name='c')
+
+    events = _sent_events(listener)
+    assert [event['f']['name'] for event in events] == ['a', 'b', 'c']
+
+
+@pytest.mark.django_db
+def test_unsupported_commit_callbacks_raise(listener, monkeypatch):
+    TestModel.objects.create(name='buffered')
+    # The layout of the commit callbacks before Django 4.2
+    monkeypatch.setattr(connection, 'run_on_commit', [
+        item[:2] for item in connection.run_on_commit
+    ])
+    with pytest.raises(RuntimeError):
+        TestModel.objects.create(name='unsupported')
@@ -0,0 +1,83 @@
+import asyncio
+
+import pytest
+
+from graphene_subscriptions.utils import (OverflowPolicies, SubscriptionOverflow,
+                                          SubscriptionQueue, queue_stats)
+from tests.models import TestModel
+
+
+def _drain(queue: SubscriptionQueue) -> list:
+    return [queue._popleft() for _ in range(len(queue))]
+
+
+def test_drop_oldest_and_drop_newest():
+    queue_stats.reset()
+
+    oldest = SubscriptionQueue(maxsize=2, policy=OverflowPolicies.DROP_OLDEST)
+    newest = SubscriptionQueue(maxsize=2, policy='drop_newest')
+    for value in range(4):
+        oldest.put_nowait(value)
+        newest.put_nowait(value)
+
+    assert _drain(oldest) == [2, 3]
+    assert _drain(newest) == [0, 1]
+    assert oldest.dropped == newest.dropped == 2
+    assert queue_stats.dropped == 4
+
+
+def test_keep_latest_replaces_pending_values():
+    queue = SubscriptionQueue(maxsize=10, policy=OverflowPolicies.KEEP_LATEST)
+    for name in ('first', 'second', 'third'):
+        queue.put_nowait(TestModel(id=1, name=name))
+    queue.put_nowait(TestModel(id=2, name='other'))
+
+    values = _drain(queue)
+    assert [(value.pk, value.name) for value in values] == [(1, 'third'), (2, 'other')]
+    assert queue.dropped == 2
+
+    # The key is released once the value is consumed
+    queue.put_nowait(TestModel(id=1, name='fourth'))
+    assert len(queue) == 1
+
+
+@pytest.mark.asyncio
+async def test_disconnect_policy():
+    queue_stats.reset()
+    queue = SubscriptionQueue(maxsize=1, policy=OverflowPolicies.DISCONNECT)
+
+    getter = asyncio.ensure_future(queue.get())
+    queue.put_nowait('first')
+    assert await getter == 'first'
+
+    queue.put_nowait('second')
+    queue.put_nowait('third')
+    assert queue_stats.disconnected == 1
+
+    with pytest.raises(SubscriptionOverflow):
+        await queue.get()
+
+
+def test_storage_only_held_while_backlogged():
+    queue = SubscriptionQueue(maxsize=10, policy=OverflowPolicies.KEEP_LATEST)
+    assert queue._items is None and len(queue) == 0
+
+    queue.put_nowait(TestModel(id=1, name='first'))
+    queue.put_nowait(TestModel(id=2, name='second'))
+    assert len(queue) == 2
+
+    _drain(queue)
+    assert queue._items is None and queue._keys is None
+
+
+def test_queue_options_override_the_settings(settings):
+    settings.GRAPHENE_SUBSCRIPTIONS = {'QUEUE_MAXSIZE': 2}
+
+    assert SubscriptionQueue.from_settings().maxsize == 2
+    assert SubscriptionQueue.from_settings(maxsize=5).maxsize == 5
+
+    # Unbounded queues can be requested even when the setting is not
+    unbounded = SubscriptionQueue.from_settings(maxsize=0)
+    for value in range(10):
+        unbounded.put_nowait(value)
+    assert len(unbounded) == 10 and unbounded.dropped == 0
@@ -0,0 +1,176 @@
+import asyncio
+import threading
+
+import pytest
+from channels.layers import get_channel_layer
+
+from graphene_subscriptions.events import (BulkModelSubscriptionEvent,
+                                           EventNames)
+from graphene_subscriptions.publisher import EventBatch
+from graphene_subscriptions.replay import (CacheReplayBackend,
+                                           LocalReplayBackend,
+                                           parse_event_seq, replay_log)
+from graphene_subscriptions.topics import Topic
+from tests.models import TestModel
+from tests.utils import connect, created_event, start_subscription
+
+CREATED = Topic('created', 'tests', 'testmodel')
+DELETED = Topic('deleted', 'tests', 'testmodel')
+CREATED_SUBSCRIPTION = 'subscription { testModelCreated { name } }'
+
+
+class ThreadRecordingBackend(LocalReplayBackend):
+    """Local backend keeping the threads recording the events"""
+
+    def __init__(self, size: int):
+        super().__init__(size)
+        self.threads = []
+
+    def record(self, topics, message):
+        self.threads.append(threading.get_ident())
+        super().record(topics, message)
+
+
+@pytest.fixture
+def replay(settings):
+    settings.GRAPHENE_SUBSCRIPTIONS = {'REPLAY_BUFFER_SIZE': 5}
+    return replay_log.backend
+
+
+def test_parse_event_seq():
+    assert parse_event_seq('12') == (12, -1)
+    assert parse_event_seq('12.3') == (12, 3)
+    assert parse_event_seq(12) == (12, -1)
+    assert parse_event_seq('latest') is None
+
+
+@pytest.mark.parametrize('backend_class', [LocalReplayBackend, CacheReplayBackend])
+def test_backends(settings, backend_class):
+    settings.CACHES = {
+        'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}
+    }
+    backend = backend_class(3)
+    messages = []
+    for i, topic in enumerate([CREATED, DELETED, CREATED._replace(pk='1'), CREATED, CREATED]):
+        message = {'id': str(i)}
+        backend.record([topic], message)
+        messages.append(message)
+
+    seqs = [message['seq'] for message in messages]
+    assert seqs == sorted(set(seqs))
+
+    replayed = backend.replay([CREATED._replace(pk='2')], seqs[2])
+    assert [message['id'] for message in replayed] == ['2', '3', '4']
+    assert backend.replay([DELETED], seqs[4] + 1) == []
+    # The first message is no longer kept
+    assert backend.replay([CREATED], seqs[0]) is None
+
+
+@pytest.mark.asyncio
+@pytest.mark.django_db
+async def test_resume_after_reconnect(replay):
+    communicator = await connect()
+    await start_subscription(communicator, 1, CREATED_SUBSCRIPTION)
+    await asyncio.sleep(0.1)
+    await created_event(1).asend()
+    first = await communicator.receive_json_from()
+    assert first['payload']['data'] == {'testModelCreated': {'name': 'item 1'}}
+    await communicator.disconnect()
+
+    for pk in (2, 3):
+        await created_event(pk).asend()
+
+    communicator = await connect()
+    await start_subscription(communicator, 1, CREATED_SUBSCRIPTION, lastEventId=first['seq'])
+    await asyncio.sleep(0.1)
+    missed = [await communicator.receive_json_from() for _ in range(2)]
+    assert [frame['payload']['data']['testModelCreated']['name'] for frame in missed] == ['item 2', 'item 3']
+    assert int(first['seq']) < int(missed[0]['seq']) < int(missed[1]['seq'])
+
+    await created_event(4).asend()
+    live = await communicator.receive_json_from()
+    assert live['payload']['data'] == {'testModelCreated': {'name': 'item 4'}}
+    assert await communicator.receive_nothing()
+    await communicator.disconnect()
+
+    for pk in range(5, 12):
+        await created_event(pk).asend()
+    communicator = await connect()
+    await start_subscription(communicator, 1, CREATED_SUBSCRIPTION, lastEventId=first['seq'])
+    await asyncio.sleep(0.1)
+    assert await communicator.receive_json_from() == {'id': 1, 'type': 'resync_required'}
+    await communicator.disconnect()
+
+
+@pytest.mark.asyncio
+@pytest.mark.django_db
+async def test_resume_inside_a_bulk_event(replay):
+    event = BulkModelSubscriptionEvent(
+        operation=EventNames.CREATED.value,
+        model=TestModel,
+        instances=[TestModel(id=pk, name=f'item {pk}') for pk in (1, 2, 3)]
+    )
+    await event.asend()
+
+    communicator = await connect()
+    await start_subscription(communicator, 1, CREATED_SUBSCRIPTION, lastEventId=f'{event.seq}.0')
+    await asyncio.sleep(0.1)
+    missed = [await communicator.receive_json_from() for _ in range(2)]
+    assert [frame['seq'] for frame in missed] == [f'{event.seq}.1', f'{event.seq}.2']
+    assert await communicator.receive_nothing()
+    await communicator.disconnect()
+
+
+@pytest.mark.asyncio
+@pytest.mark.django_db
+async def test_resumed_subscriptions_are_deduplicated_on_their_own(replay):
+    communicator = await connect()
+    await start_subscription(communicator, 1, CREATED_SUBSCRIPTION)
+    await asyncio.sleep(0.1)
+    await created_event(1).asend()
+    first = await communicator.receive_json_from()
+    second_event = created_event(2)
+    await second_event.asend()
+    await communicator.receive_json_from()
+
+    # The first subscription received item 2 live, the one resumed
+    # on the same connection still misses it
+    await start_subscription(communicator, 2, CREATED_SUBSCRIPTION, lastEventId=first['seq'])
+    missed = await communicator.receive_json_from()
+    assert missed['id'] == 2
+    assert missed['payload']['data'] == {'testModelCreated': {'name': 'item 2'}}
+    assert await communicator.receive_nothing()
+    await communicator.disconnect()
+
+    # A replayed event still on its way through the channel
+    # layer is not sent a second time
+    communicator = await connect()
+    await start_subscription(communicator, 1, CREATED_SUBSCRIPTION, lastEventId=first['seq'])
+    await asyncio.sleep(0.1)
+    replayed = await communicator.receive_json_from()
+    assert replayed['payload']['data'] == {'testModelCreated': {'name': 'item 2'}}
+    channel_layer = get_channel_layer()
+    message = second_event.to_message()
+    for group_name in second_event.group_names():
+        await channel_layer.group_send(group_name, message)
+    assert await communicator.receive_nothing()
+    await communicator.disconnect()
+
+
+@pytest.mark.asyncio
+async def test_events_are_recorded_off_the_event_loop(settings):
+    settings.GRAPHENE_SUBSCRIPTIONS = {
+        'REPLAY_BUFFER_SIZE': 5,
+        'REPLAY_BACKEND': 'tests.test_replay.ThreadRecordingBackend'
+    }
+    backend = replay_log.backend
+
+    event = created_event(1)
+    await event.asend()
+    events = [created_event(2), created_event(3)]
+    await EventBatch(events).asend()
+
+    assert len(backend.threads) == 3
+    assert threading.get_ident() not in backend.threads
+    assert event.seq is not None
+    assert all(event.seq is not None for event in events)
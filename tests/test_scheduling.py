@@ -0,0 +1,109 @@
+import asyncio
+
+import pytest
+
+from graphene_subscriptions.utils import (ExecutionScheduler,
+                                          SubscriptionTimeout,
+                                          TimeoutPolicies)
+from tests.utils import (create_consumer, created_event, sent_frames,
+                         start_subscription)
+
+
+@pytest.mark.asyncio
+async def test_scheduler_bounds_concurrency():
+    scheduler = ExecutionScheduler(concurrency=2)
+    running = []
+    peak = 0
+
+    async def execute():
+        nonlocal peak
+        running.append(None)
+        peak = max(peak, len(running))
+        await asyncio.sleep(0.01)
+        running.pop()
+        return 'done'
+
+    results = await asyncio.gather(*(scheduler.run(execute) for _ in range(6)))
+    assert results == ['done'] * 6
+    assert peak == 2
+
+
+@pytest.mark.asyncio
+async def test_scheduler_timeout_policies():
+    async def execute():
+        await asyncio.sleep(1)
+
+    scheduler = ExecutionScheduler(timeout=0.01)
+    assert await scheduler.run(execute) is None
+    assert scheduler.timeouts == 1
+
+    scheduler = ExecutionScheduler(timeout=0.01, policy='stop')
+    with pytest.raises(SubscriptionTimeout) as error:
+        await scheduler.run(execute)
+    assert error.value.policy is TimeoutPolicies.STOP
+
+
+@pytest.mark.asyncio
+@pytest.mark.django_db
+async def test_slow_subscription_is_skipped(settings):
+    settings.GRAPHENE_SUBSCRIPTIONS = {'EXECUTION_TIMEOUT': 0.2}
+    consumer, sent = await create_consumer()
+    await start_subscription(consumer, 1, 'subscription { testModelNameDelayed }')
+    await start_subscription(consumer, 2, 'subscription { testModelCreated { name } }')
+
+    await consumer.signal_fired(created_event(1, '1').to_message())
+    await asyncio.sleep(0.05)
+    # The fast subscription is not held back by the slow one
+    assert sent_frames(sent) == [
+        {'id': 2, 'type': 'data', 'payload': {'data': {'testModelCreated': {'name': '1'}}, 'errors': None}}
+    ]
+
+    await asyncio.sleep(0.2)
+    assert consumer.scheduler.timeouts == 1
+    await consumer.signal_fired(created_event(1, '0').to_message())
+    await asyncio.sleep(0.05)
+    assert {'id': 1, 'type': 'data', 'payload': {'data': {'testModelNameDelayed': '0'}, 'errors': None}} in sent_frames(sent)
+    assert len(sent_frames(sent)) == 3
+    assert 1 in consumer.subscriptions
+    await consumer._stop_streams()
+
+
+@pytest.mark.asyncio
+@pytest.mark.django_db
+async def test_slow_subscription_is_stopped(settings):
+    settings.GRAPHENE_SUBSCRIPTIONS = {
+        'EXECUTION_TIMEOUT': 0.1,
+        'EXECUTION_TIMEOUT_POLICY': 'stop'
+    }
+    consumer, sent = await create_consumer()
+    await start_subscription(consumer, 1, 'subscription { testModelNameDelayed }')
+    await start_subscription(consumer, 2, 'subscription { testModelCreated { name } }')
+
+    await consumer.signal_fired(created_event(1, '1').to_message())
+    await asyncio.sleep(0.2)
+    frames = sent_frames(sent)
+    assert frames[1] == {
+        'id': 1,
+        'type': 'data',
+        'payload': {'data': None, 'errors': ['Subscription execution timed out']}
+    }
+    assert set(consumer.subscriptions) == {2}
+    await consumer._stop_streams()
+
+
+@pytest.mark.asyncio
+@pytest.mark.django_db
+async def test_failing_subscription_is_isolated():
+    consumer, sent = await create_consumer()
+    await start_subscription(consumer, 1, 'subscription { testModelNameChecked }')
+    await start_subscription(consumer, 2, 'subscription { testModelCreated { name } }')
+
+    await consumer.signal_fired(created_event(1, 'invalid').to_message())
+    await asyncio.sleep(0.05)
+    assert set(consumer.subscriptions) == {2}
+    assert {'id': 1, 'type': 'data', 'payload': {'data': None, 'errors': ['Invalid name']}} in sent_frames(sent)
+
+    await consumer.signal_fired(created_event(1, 'valid').to_message())
+    await asyncio.sleep(0.05)
+    assert [frame['id'] for frame in sent_frames(sent)].count(2) == 2
+    await consumer._stop_streams()
@@ -0,0 +1,66 @@
+import asyncio
+import json
+
+import pytest
+from channels.testing import WebsocketCommunicator
+
+from graphene_subscriptions.cache import document_cache
+from graphene_subscriptions.consumers import AsyncGraphqlSubscriptionConsumer
+from graphene_subscriptions.events import EventNames, ModelSubscriptionEvent
+from graphene_subscriptions.sharing import get_share_key, shared_executions
+from tests.models import TestModel
+from tests.schema import schema
+
+
+def test_share_key_requires_context_independent_fields():
+    created = document_cache.parse(
+        schema.graphql_schema,
+        'subscription { testModelCreated { name } }'
+    )
+    deleted = document_cache.parse(
+        schema.graphql_schema,
+        'subscription { testModelDeleted(id: 1) { name } }'
+    )
+
+    assert get_share_key(schema.graphql_schema, created, created.get_operation()) is not None
+    assert get_share_key(schema.graphql_schema, deleted, deleted.get_operation()) is None
+
+    first = get_share_key(schema.graphql_schema, created, created.get_operation(), {'a': 1, 'b': 2})
+    second = get_share_key(schema.graphql_schema, created, created.get_operation(), {'b': 2, 'a': 1})
+    assert first == second
+
+
+@pytest.mark.asyncio
+@pytest.mark.django_db
+async def test_identical_subscriptions_execute_once():
+    shared_executions.clear()
+    communicators = [
+        WebsocketCommunicator(AsyncGraphqlSubscriptionConsumer.as_asgi(), '/graphql/')
+        for _ in range(3)
+    ]
+
+    for i, communicator in enumerate(communicators):
+        connected, _ = await communicator.connect()
+        assert connected
+        await communicator.send_json_to({
+            'id': f'operation-{i}',
+            'type': 'start_subscription',
+            'payload': {'query': 'subscription { testModelCreated { name } }'}
+        })
+    await asyncio.sleep(0.1)
+
+    event = ModelSubscriptionEvent(
+        operation=EventNames.CREATED.value,
+        instance=TestModel(id=1, name='shared')
+    )
+    await event.asend()
+
+    for i, communicator in enumerate(communicators):
+        text = await communicator.receive_from()
+        response = json.loads(text)
+        assert response['id'] == f'operation-{i}'
+        assert response['payload']['data'] == {'testModelCreated': {'name': 'shared'}}
+        await communicator.disconnect()
+
+    assert shared_executions.misses == 1
+    assert shared_executions.hits == 2
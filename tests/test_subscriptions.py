@@ -1,9 +1,13 @@
+import asyncio
+
 import pytest
 from asgiref.sync import sync_to_async
 from channels.testing import WebsocketCommunicator
 from django.db.models.signals import post_save
 
-from graphene_subscriptions.consumers import GraphqlSubscriptionConsumer
+from graphene_subscriptions.consumers import (AsyncGraphqlSubscriptionConsumer,
+                                             GraphqlSubscriptionConsumer)
+from graphene_subscriptions.events import EventNames, ModelSubscriptionEvent
 from graphene_subscriptions.signals import post_save_subscription
 from tests.models import TestModel
 
@@ -81,6 +85,86 @@ async def test_subscription_model_creation_sucess():
     """
 
     await _query_helper(subscription, communicator)
+    # The connection only joins the groups of the subscription
+    # once the consumer has started it
+    await asyncio.sleep(0.1)
+
+    item = await sync_to_async(TestModel.objects.create)(name="test name")
+
+    response = await communicator.receive_json_from()
+    assert response['payload'] == {
+        'data': {
+            'testModelCreated': {
+                'name': item.name
+            }
+        },
+        'errors': None,
+    }
+
+    post_save.disconnect(
+        post_save_subscription,
+        sender=TestModel,
+        dispatch_uid='test_model_post_save'
+    )
+
+
+@pytest.mark.asyncio
+@pytest.mark.django_db
+async def test_async_subscription_success():
+    communicator = WebsocketCommunicator(
+        AsyncGraphqlSubscriptionConsumer.as_asgi(),
+        '/graphql/'
+    )
+
+    connected, subprotocol = await communicator.connect()
+    assert connected
+    assert subprotocol == 'graphql-ws'
+
+    subscription = """
+    subscription {
+        hello
+    }
+    """
+
+    await _query_helper(subscription, communicator)
+    response = await communicator.receive_json_from()
+    assert response['payload'] == {
+        'data': {
+            'hello': 'Hello World!'
+        },
+        'errors': None
+    }
+    await communicator.disconnect()
+
+
+@pytest.mark.asyncio
+@pytest.mark.django_db
+async def test_async_subscription_model_creation_success():
+    post_save.connect(
+        post_save_subscription,
+        sender=TestModel,
+        dispatch_uid='test_model_post_save'
+    )
+
+    communicator = WebsocketCommunicator(
+        AsyncGraphqlSubscriptionConsumer.as_asgi(),
+        '/graphql/'
+    )
+    connected, subprotocol = await communicator.connect()
+    assert connected
+
+    subscription = """
+    subscription {
+        testModelCreated {
+            name
+        }
+    }
+    """
+
+    await _query_helper(subscription, communicator)
+    # The connection only joins the groups of the subscription
+    # once the consumer has started it
+    await asyncio.sleep(0.1)
 
     item = await sync_to_async(TestModel.objects.create)(name="test name")
 
@@ -94,8 +178,70 @@ async def test_subscription_model_creation_sucess():
         'errors': None,
     }
 
+    await communicator.disconnect()
     post_save.disconnect(
         post_save_subscription,
         sender=TestModel,
         dispatch_uid='test_model_post_save'
     )
+
+
+@pytest.mark.asyncio
+@pytest.mark.django_db
+@pytest.mark.parametrize('consumer_class', [GraphqlSubscriptionConsumer, AsyncGraphqlSubscriptionConsumer])
+async def test_subscription_streams_each_result(consumer_class):
+    communicator = WebsocketCommunicator(consumer_class.as_asgi(), '/graphql/')
+    connected, _ = await communicator.connect()
+    assert connected
+
+    subscription = """
+    subscription {
+        testModelCreated {
+            name
+        }
+    }
+    """
+
+    await _query_helper(subscription, communicator)
+    # Let the consumer subscribe to its stream
+    await asyncio.sleep(0.1)
+
+    for name in ('first', 'second'):
+        event = ModelSubscriptionEvent(
+            operation=EventNames.CREATED.value,
+            instance=TestModel(id=1, name=name)
+        )
+        await event.asend()
+
+        response = await communicator.receive_json_from()
+        assert response['id'] == 1
+        assert response['payload']['data'] == {'testModelCreated': {'name': name}}
+
+    await communicator.send_json_to({'id': 1, 'type': 'stop_subscription'})
+    await asyncio.sleep(0.1)
+
+    event = ModelSubscriptionEvent(
+        operation=EventNames.CREATED.value,
+        instance=TestModel(id=2, name='third')
+    )
+    await event.asend()
+    assert await communicator.receive_nothing()
+    await communicator.disconnect()
+
+
+@pytest.mark.asyncio
+@pytest.mark.django_db
+@pytest.mark.parametrize('consumer_class', [GraphqlSubscriptionConsumer, AsyncGraphqlSubscriptionConsumer])
+async def test_consumers_handle_messages_alike(consumer_class):
+    communicator = WebsocketCommunicator(consumer_class.as_asgi(), '/graphql/')
+    connected, _ = await communicator.connect()
+    assert connected
+
+    await _query_helper('query { base }', communicator)
+    response = await communicator.receive_json_from()
+    assert response == {'id': 1, 'type': 'data', 'payload': {'data': {'base': None}, 'errors': None}}
+
+    await communicator.send_json_to({'type': 'unknown'})
+    assert await communicator.receive_output() == {'type': 'websocket.send', 'message': 'Unknown message type'}
+
+    await communicator.disconnect()
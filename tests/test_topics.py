@@ -0,0 +1,86 @@
+import asyncio
+
+import pytest
+from channels.layers import get_channel_layer
+
+from graphene_subscriptions.events import (BaseEvent, EventNames,
+                                           ModelSubscriptionEvent)
+from graphene_subscriptions.topics import (GLOBAL_GROUP, Topic, build_group_name,
+                                           get_instance_bucket)
+from tests.models import TestModel
+from tests.utils import connect, start_subscription
+
+
+def test_model_event_group_names():
+    event = ModelSubscriptionEvent(
+        operation=EventNames.UPDATED.value,
+        instance=TestModel(id=4, name='test')
+    )
+    assert event.group_names() == [
+        GLOBAL_GROUP,
+        'subscriptions.model.tests.testmodel.updated',
+        f'subscriptions.model.tests.testmodel.updated.bucket-{get_instance_bucket("4")}'
+    ]
+
+
+def test_invalid_group_names_are_hashed():
+    name = build_group_name('event', 'custom event é')
+    assert name.startswith('subscriptions.hash.')
+    assert Topic('custom event é').group_name == name
+
+
+@pytest.mark.asyncio
+@pytest.mark.django_db
+async def test_consumer_joins_topic_groups():
+    channel_layer = get_channel_layer()
+    communicator = await connect()
+
+    await start_subscription(communicator, 1, 'subscription { testModelCreated { name } }')
+    await start_subscription(
+        communicator,
+        2,
+        'subscription ($id: ID) { testModelDeleted(id: $id) { name } }',
+        variables={'id': 3}
+    )
+    await asyncio.sleep(0.1)
+
+    groups = channel_layer.groups
+    assert GLOBAL_GROUP not in groups
+    assert len(groups['subscriptions.model.tests.testmodel.created']) == 1
+    deleted_group = Topic('deleted', 'tests', 'testmodel', '3').group_name
+    assert len(groups[deleted_group]) == 1
+
+    # The instance is in both the model and the pk groups of the
+    # created operation but must only be delivered once
+    event = ModelSubscriptionEvent(
+        operation=EventNames.DELETED.value,
+        instance=TestModel(id=3, name='deleted')
+    )
+    await event.asend()
+    response = await communicator.receive_json_from()
+    assert response['id'] == 2
+    assert await communicator.receive_nothing()
+
+    await communicator.send_json_to({'id': 2, 'type': 'stop_subscription'})
+    await asyncio.sleep(0.1)
+    assert deleted_group not in groups
+
+    await communicator.disconnect()
+    assert 'subscriptions.model.tests.testmodel.created' not in groups
+
+
+@pytest.mark.asyncio
+@pytest.mark.django_db
+async def test_undeclared_subscription_uses_global_group():
+    channel_layer = get_channel_layer()
+    communicator = await connect()
+
+    await start_subscription(communicator, 1, 'subscription { testModelSubscription }')
+    await asyncio.sleep(0.1)
+    assert len(channel_layer.groups[GLOBAL_GROUP]) == 1
+
+    event = BaseEvent(operation=EventNames.CUSTOM_EVENT.value, instance='hello')
+    await event.asend()
+    response = await communicator.receive_json_from()
+    assert response['payload']['data'] == {'testModelSubscription': 'hello'}
+    await communicator.disconnect()
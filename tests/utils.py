@@ -0,0 +1,88 @@
+import json
+from typing import Any, Optional
+
+from channels.layers import get_channel_layer
+from channels.testing import WebsocketCommunicator
+
+from graphene_subscriptions.consumers import AsyncGraphqlSubscriptionConsumer
+from graphene_subscriptions.events import (BaseEvent, EventNames,
+                                           ModelSubscriptionEvent)
+from tests.models import TestModel
+
+
+async def create_consumer() -> tuple[AsyncGraphqlSubscriptionConsumer, list[dict]]:
+    """Async consumer driven directly, without a websocket,
+    and the ASGI messages it sends"""
+    sent = []
+
+    async def base_send(message):
+        sent.append(message)
+
+    consumer = AsyncGraphqlSubscriptionConsumer()
+    consumer.scope = {'type': 'websocket'}
+    consumer.channel_layer = get_channel_layer()
+    consumer.channel_name = await consumer.channel_layer.new_channel()
+    consumer.base_send = base_send
+    return consumer, sent
+
+
+async def connect(consumer_class: type = AsyncGraphqlSubscriptionConsumer) -> WebsocketCommunicator:
+    """Consumer connected through the websocket transport"""
+    communicator = WebsocketCommunicator(consumer_class.as_asgi(), '/graphql/')
+    connected, _ = await communicator.connect()
+    assert connected
+    return communicator
+
+
+async def receive_json(consumer: AsyncGraphqlSubscriptionConsumer | WebsocketCommunicator, message: dict[str, Any]):
+    if isinstance(consumer, WebsocketCommunicator):
+        await consumer.send_json_to(message)
+    else:
+        await consumer.websocket_receive({'text': json.dumps(message)})
+
+
+async def start_subscription(consumer: AsyncGraphqlSubscriptionConsumer | WebsocketCommunicator, id: Any, query: str, **payload: Any):
+    await receive_json(consumer, {
+        'id': id,
+        'type': 'start_subscription',
+        'payload': {'query': query, **payload}
+    })
+
+
+def created_event(pk: int, name: Optional[str] = None) -> ModelSubscriptionEvent:
+    return ModelSubscriptionEvent(
+        operation=EventNames.CREATED.value,
+        instance=TestModel(id=pk, name=f'item {pk}' if name is None else name)
+    )
+
+
+def sent_frames(sent: list[dict]) -> list[dict]:
+    return [
+        json.loads(message['text']) for message in sent
+        if message['type'] == 'websocket.send'
+    ]
+
+
+class ChannelListener:
+    """Channel of the channel layer, collecting the messages sent to
+    the groups it joined"""
+
+    def __init__(self, channel_layer, channel_name: str):
+        self.channel_layer = channel_layer
+        self.channel_name = channel_name
+
+    def messages(self) -> list[dict]:
+        messages = []
+        queue = self.channel_layer.channels.get(self.channel_name)
+        while queue is not None and not queue.empty():
+            _, message = queue.get_nowait()
+            messages.append(message)
+        return messages
+
+    def events(self) -> list[BaseEvent]:
+        """Events of the messages, unpacking the batches sent on commit"""
+        events = []
+        for message in self.messages():
+            for event in message.get('events', [message]):
+                events.append(BaseEvent.from_dict(event['event']))
+        return events